@@ -0,0 +1,189 @@
+import math
+import time
+import heapq
+import asyncio
+import itertools
+import contextlib
+from metrics import REGISTRY
+
+# Priority tiers; lower is admitted first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+
+ADMISSION_REJECTED = {
+    reason: REGISTRY.counter("fraud_admission_rejected_total", "Requests rejected by admission control", reason=reason)
+    for reason in ("queue_full", "evicted", "queue_timeout")
+}
+ADMISSION_IN_FLIGHT = REGISTRY.gauge("fraud_admission_in_flight", "Requests being scored")
+ADMISSION_WAITING = REGISTRY.gauge("fraud_admission_waiting", "Requests waiting for a scoring slot")
+ADMISSION_DEGRADED = REGISTRY.gauge("fraud_admission_degraded", "1 while compliance is skipped because of load")
+ADMISSION_WAIT_SECONDS = REGISTRY.histogram("fraud_admission_wait_seconds", "Time admitted requests waited for a slot")
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is not admitted. status_code is 429 when the
+    queue is full and 503 when the request waited too long for a slot.
+    """
+
+    def __init__(self, status_code, reason, retry_after):
+        super().__init__(f"Scoring is overloaded ({reason}), retry in {retry_after}s")
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Admission control for the scoring endpoints, on the event loop.
+
+    At most max_concurrency requests are scored at once. Up to max_queue
+    more wait for a slot, served by priority and then arrival order. A full
+    queue rejects the request at once, unless it outranks a waiter, which
+    is rejected in its place. A waiter that gets no slot within
+    queue_timeout_ms is rejected too. Rejections carry a Retry-After
+    estimated from the queue depth and recent service times.
+
+    The controller is degraded while the queue is deep: it enters when
+    degrade_depth requests are waiting and leaves when at most
+    recover_depth are, so callers can shed optional work in between.
+    """
+
+    def __init__(self, max_concurrency=64, max_queue=256, queue_timeout_ms=2000.0,
+                 degrade_depth=32, recover_depth=8, max_retry_after_s=30):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_ms = queue_timeout_ms
+        self.degrade_depth = degrade_depth
+        self.recover_depth = recover_depth
+        self.max_retry_after_s = max_retry_after_s
+
+        self.active = 0
+        self.degraded = False
+        self.admitted = 0
+        self.rejected = 0
+
+        # ✅ Smoothed seconds per admitted request, for Retry-After
+        self.service_seconds = 0.1
+
+        self._waiters = []
+        self._sequence = itertools.count()
+
+    @property
+    def waiting(self):
+        return len(self._waiters)
+
+    def retry_after(self):
+        """
+        Seconds until the current queue is likely drained, at least 1.
+        """
+        seconds = (self.waiting + 1) * self.service_seconds / self.max_concurrency
+        return max(1, min(self.max_retry_after_s, math.ceil(seconds)))
+
+    def _reject(self, status_code, reason):
+        self.rejected += 1
+        ADMISSION_REJECTED[reason].inc()
+        return AdmissionRejected(status_code, reason, self.retry_after())
+
+    def _update(self):
+        if not self.degraded and self.waiting >= self.degrade_depth:
+            self.degraded = True
+            print(f"⚠️ Admission queue at {self.waiting}; skipping compliance until it drains")
+        elif self.degraded and self.waiting <= self.recover_depth:
+            self.degraded = False
+            print("✅ Admission queue drained; compliance scoring resumed")
+
+        ADMISSION_IN_FLIGHT.set(self.active)
+        ADMISSION_WAITING.set(self.waiting)
+        ADMISSION_DEGRADED.set(1 if self.degraded else 0)
+
+    async def acquire(self, priority=PRIORITY_NORMAL):
+        """
+        Wait for a scoring slot, or raise AdmissionRejected.
+        """
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            self._update()
+            ADMISSION_WAIT_SECONDS.observe(0.0)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            # ✅ A full queue sheds its lowest-priority, newest waiter for a higher-priority request
+            worst = max(self._waiters, default=None)
+            if worst is None or priority >= worst[0]:
+                raise self._reject(429, "queue_full")
+            self._waiters.remove(worst)
+            heapq.heapify(self._waiters)
+            worst[2].set_exception(self._reject(429, "evicted"))
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._sequence), future)
+        heapq.heappush(self._waiters, entry)
+        self._update()
+
+        try:
+            await asyncio.wait_for(future, timeout=self.queue_timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            self._discard(entry)
+            raise self._reject(503, "queue_timeout")
+        except asyncio.CancelledError:
+            # ✅ A slot handed over just before the caller went away is passed on
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release()
+            self._discard(entry)
+            raise
+
+        self.admitted += 1
+        ADMISSION_WAIT_SECONDS.observe(time.monotonic() - started)
+
+    def _discard(self, entry):
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+        self._update()
+
+    def release(self, service_seconds=None):
+        """
+        Free a slot, handing it straight to the best waiter if there is one.
+        """
+        if service_seconds is not None:
+            self.service_seconds = 0.9 * self.service_seconds + 0.1 * service_seconds
+
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                self._update()
+                return
+
+        self.active -= 1
+        self._update()
+
+    @contextlib.asynccontextmanager
+    async def admit(self, priority=PRIORITY_NORMAL):
+        """
+        Hold a scoring slot for the block. Yields whether the controller is
+        degraded, i.e. whether optional stages should be skipped.
+        """
+        await self.acquire(priority)
+        started = time.monotonic()
+        try:
+            yield self.degraded
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self):
+        return {
+            "in_flight": self.active,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "degraded": self.degraded,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "service_seconds": round(self.service_seconds, 4),
+            "retry_after_s": self.retry_after(),
+        }
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, Request, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
@@ -7,6 +8,8 @@ import os
 import sys
 import json
 import time
+import asyncio
+import httpx
 from datetime import datetime
 
 # Add the parent directory to the path
@@ -14,6 +17,29 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the transaction service
 from backend.transaction_service import TransactionService
+from backend.cache import ScoreCache
+from backend.feed_fetcher import build_sources, merge_sources
+from backend.metrics import REGISTRY
+from backend.pipeline import FeedManager, FeedPipeline, JsonlResultLog, ResultRingBuffer
+from backend.result_store import RISK_CLASSES, SQLiteResultStore
+
+# Result storage settings
+RESULTS_CAPACITY = int(os.environ.get('RESULTS_CAPACITY', '10000'))
+RESULTS_LOG_PATH = os.environ.get('RESULTS_LOG_PATH')
+# Durable, queryable result store, by default in backend/data/ (git-ignored); set
+# RESULTS_DB_PATH to an empty string to disable it
+RESULTS_DB_PATH = os.environ.get('RESULTS_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'results.db'))
+RESULTS_DB_BATCH_SIZE = int(os.environ.get('RESULTS_DB_BATCH_SIZE', '500'))
+RESULTS_DB_FLUSH_S = float(os.environ.get('RESULTS_DB_FLUSH_S', '0.5'))
+FEED_QUEUE_SIZE = int(os.environ.get('FEED_QUEUE_SIZE', '100'))
+RESULTS_PAGE_SIZE = 100
+RESULTS_MAX_PAGE_SIZE = 1000
+STREAM_KEEPALIVE_SECONDS = 15.0
+SCORE_CACHE_SIZE = int(os.environ.get('SCORE_CACHE_SIZE', '50000'))
+SCORE_CACHE_TTL_S = float(os.environ.get('SCORE_CACHE_TTL_S', '600'))
+FEED_PAGE_SIZE = int(os.environ.get('FEED_PAGE_SIZE', '100'))
+FEED_MAX_CONNECTIONS = int(os.environ.get('FEED_MAX_CONNECTIONS', '20'))
+FEED_TIMEOUT_S = float(os.environ.get('FEED_TIMEOUT_S', '10'))
 
 app = FastAPI(title="Transaction API", 
               description="API for handling automated transaction feeding",
@@ -31,14 +57,40 @@ app.add_middleware(
 # Initialize the transaction service
 transaction_service = TransactionService()
 
-# Store results in memory (in a real application, this would be a database)
-results_store = []
+# Keep the most recent results in a fixed-capacity ring buffer, and
+# optionally append every result to an on-disk JSON Lines log
+results_store = ResultRingBuffer(capacity=RESULTS_CAPACITY)
+results_log = JsonlResultLog(RESULTS_LOG_PATH) if RESULTS_LOG_PATH else None
+
+# Every result is also written in batches to SQLite, off the request path
+results_db = SQLiteResultStore(
+    RESULTS_DB_PATH, batch_size=RESULTS_DB_BATCH_SIZE, flush_interval=RESULTS_DB_FLUSH_S
+) if RESULTS_DB_PATH else None
+
+# Running feed pipelines, tracked by feed ID
+feed_manager = FeedManager()
+
+# Results of transactions already scored, so feed replays skip the agent
+score_cache = ScoreCache(max_size=SCORE_CACHE_SIZE, ttl_seconds=SCORE_CACHE_TTL_S)
+
+# Keep-alive connection pool shared by every provider feed, created on first use
+feed_http_client = None
+
+def get_feed_http_client() -> httpx.AsyncClient:
+    global feed_http_client
+    if feed_http_client is None or feed_http_client.is_closed:
+        feed_http_client = httpx.AsyncClient(
+            timeout=FEED_TIMEOUT_S,
+            limits=httpx.Limits(max_connections=FEED_MAX_CONNECTIONS, max_keepalive_connections=FEED_MAX_CONNECTIONS),
+        )
+    return feed_http_client
 
 class AutomatedFeedRequest(BaseModel):
-    api_source: str
+    api_source: str  # Comma-separated, e.g. "plaid,stripe", to pull several providers at once
     api_key: Optional[str] = None
     use_real_api: bool = False
-    limit: Optional[int] = 5
+    limit: Optional[int] = 5  # None or 0 keeps the feed running until stopped
+    interval_seconds: float = 0.0
 
 class TransactionResult(BaseModel):
     fraud_probability: float
@@ -51,34 +103,219 @@ class TransactionResult(BaseModel):
     transaction_text: str
     api_source: str
 
+def store_result(result: Dict[str, Any]) -> None:
+    results_store.append(result)
+    if results_log is not None:
+        results_log.append(result)
+    if results_db is not None:
+        results_db.append(result)
+
+def score_transaction(transaction: Dict[str, Any]) -> Dict[str, Any]:
+    # Replays of the same TransactionID with the same fields reuse the earlier result
+    features = {name: value for name, value in transaction.items() if name != 'TransactionID'}
+    cache_key = score_cache.key(transaction.get('TransactionID'), features)
+
+    cached = score_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+
+    result = transaction_service.process_transaction(transaction)
+    # Keep the identifiers the result store indexes
+    result.setdefault('user_id', transaction.get('UserID'))
+    result.setdefault('transaction_id', transaction.get('TransactionID'))
+    # Sinks add api_source, feed_id and sequence to the result, so cache a copy
+    score_cache.set(cache_key, dict(result))
+    return result
+
+async def mock_transaction_source(limit: Optional[int], interval_seconds: float):
+    count = 0
+    while not limit or count < limit:
+        yield transaction_service.generate_mock_transaction()
+        count += 1
+        if interval_seconds > 0:
+            await asyncio.sleep(interval_seconds)
+
+def score_provider_transaction(transaction: Dict[str, Any]) -> Dict[str, Any]:
+    result = score_transaction(transaction)
+    result["api_source"] = transaction["api_source"]
+    return result
+
 @app.post("/api/automated-feed/start")
-async def start_automated_feed(request: AutomatedFeedRequest, background_tasks: BackgroundTasks):
+async def start_automated_feed(request: AutomatedFeedRequest):
     try:
-        # Start the automated feed in the background
-        background_tasks.add_task(
-            process_automated_feed,
-            request.api_source,
-            request.api_key if request.use_real_api else None,
-            request.limit
-        )
-        
-        return {"status": "started", "message": f"Automated feed from {request.api_source} started successfully"}
+        if request.use_real_api:
+            # Pull every requested provider concurrently and score transactions as they arrive
+            api_sources = [name.strip() for name in request.api_source.split(',') if name.strip()]
+            try:
+                sources = build_sources(api_sources, transaction_service.api_configs, request.api_key, FEED_PAGE_SIZE)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+            pipeline = FeedPipeline(
+                request.api_source,
+                merge_sources(get_feed_http_client(), sources, request.limit, FEED_QUEUE_SIZE),
+                score=score_provider_transaction,
+                sinks=[store_result],
+                queue_size=FEED_QUEUE_SIZE,
+            )
+        else:
+            pipeline = FeedPipeline(
+                request.api_source,
+                mock_transaction_source(request.limit, request.interval_seconds),
+                score=score_transaction,
+                sinks=[store_result],
+                queue_size=FEED_QUEUE_SIZE,
+            )
+
+        feed_id = feed_manager.start(pipeline)
+
+        return {"status": "started", "feed_id": feed_id, "message": f"Automated feed from {request.api_source} started successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error starting automated feed: {str(e)}")
 
 @app.get("/api/automated-feed/results")
-async def get_automated_feed_results():
-    return {"results": results_store}
+async def get_automated_feed_results(
+    offset: Optional[int] = Query(None, ge=0),
+    limit: int = Query(RESULTS_PAGE_SIZE, ge=1, le=RESULTS_MAX_PAGE_SIZE),
+    since: Optional[int] = Query(None, ge=0),
+):
+    # since=<sequence> returns only results newer than the client's last one
+    if since is not None:
+        results = results_store.since(since, limit)
+        next_since = results[-1]["sequence"] if results else since
+        next_offset = None
+    elif offset is not None:
+        results = results_store.page(offset, limit)
+        next_since = results[-1]["sequence"] if results else results_store.latest_sequence
+        next_offset = offset + len(results)
+    else:
+        # ✅ Without since or offset, a poller gets the newest results, not the oldest kept
+        results = results_store.latest(limit)
+        next_since = results[-1]["sequence"] if results else results_store.latest_sequence
+        next_offset = None
+
+    return {
+        "results": results,
+        "count": len(results),
+        "total": results_store.total_appended,
+        "latest_sequence": results_store.latest_sequence,
+        "next_since": next_since,
+        "next_offset": next_offset,
+    }
+
+@app.get("/api/automated-feed/stream")
+async def stream_automated_feed_results(request: Request, since: Optional[int] = Query(None, ge=0)):
+    # Resume from the Last-Event-ID header when the browser reconnects
+    last_event_id = request.headers.get("last-event-id")
+    if since is None:
+        since = int(last_event_id) if last_event_id and last_event_id.isdigit() else results_store.latest_sequence
+
+    async def event_stream():
+        cursor = since
+        new_results = results_store.subscribe()
+        try:
+            while not await request.is_disconnected():
+                new_results.clear()
+                results = results_store.since(cursor, RESULTS_MAX_PAGE_SIZE)
+                for result in results:
+                    yield f"id: {result['sequence']}\nevent: result\ndata: {json.dumps(result, default=str)}\n\n"
+                if results:
+                    cursor = results[-1]["sequence"]
+                    continue
+
+                try:
+                    await asyncio.wait_for(new_results.wait(), STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            results_store.unsubscribe(new_results)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.post("/api/automated-feed/stop")
-async def stop_automated_feed():
-    # In a real implementation, this would stop the background task
-    return {"status": "stopped", "message": "Automated feed stopped successfully"}
+async def stop_automated_feed(feed_id: Optional[str] = None):
+    if feed_id is None:
+        stopped = await feed_manager.stop_all()
+        return {"status": "stopped", "feed_ids": stopped, "message": f"Stopped {len(stopped)} automated feed(s)"}
+
+    if not await feed_manager.stop(feed_id):
+        raise HTTPException(status_code=404, detail=f"Unknown feed: {feed_id}")
+    return {"status": "stopped", "feed_ids": [feed_id], "message": "Automated feed stopped successfully"}
 
 @app.get("/api/automated-feed/status")
 async def get_automated_feed_status():
-    # In a real implementation, this would return the status of the background task
-    return {"status": "running" if len(results_store) > 0 else "idle", "count": len(results_store)}
+    return {
+        "status": "running" if feed_manager.running_count > 0 else "idle",
+        "count": len(results_store),
+        "total": results_store.total_appended,
+        "latest_sequence": results_store.latest_sequence,
+        "feeds": feed_manager.status(),
+        "score_cache": score_cache.stats(),
+    }
+
+def parse_time_range(since_minutes: Optional[float], start: Optional[str], end: Optional[str]):
+    # Returns (start, end) as epoch seconds; since_minutes wins over start
+    try:
+        start_ts = datetime.fromisoformat(start).timestamp() if start else None
+        end_ts = datetime.fromisoformat(end).timestamp() if end else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid timestamp: {str(e)}")
+    if since_minutes is not None:
+        start_ts = time.time() - since_minutes * 60
+    return start_ts, end_ts
+
+def require_results_db() -> SQLiteResultStore:
+    if results_db is None:
+        raise HTTPException(status_code=503, detail="The result store is disabled (RESULTS_DB_PATH is empty)")
+    return results_db
+
+@app.get("/api/results/query")
+async def query_results(
+    user_id: Optional[str] = None,
+    api_source: Optional[str] = None,
+    risk_class: Optional[str] = None,
+    since_minutes: Optional[float] = Query(None, gt=0),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    limit: int = Query(RESULTS_PAGE_SIZE, ge=1, le=RESULTS_MAX_PAGE_SIZE),
+    before_timestamp: Optional[float] = None,
+    before_id: Optional[int] = None,
+):
+    # e.g. ?user_id=USER_123456&risk_class=High&since_minutes=60
+    store = require_results_db()
+    if risk_class is not None and risk_class not in RISK_CLASSES:
+        raise HTTPException(status_code=400, detail=f"risk_class must be one of {', '.join(RISK_CLASSES)}")
+    start_ts, end_ts = parse_time_range(since_minutes, start, end)
+    before = (before_timestamp, before_id) if before_timestamp is not None and before_id is not None else None
+
+    page = await asyncio.get_running_loop().run_in_executor(
+        None, lambda: store.query(user_id, api_source, risk_class, start_ts, end_ts, limit, before)
+    )
+    next_before = page["next_before"]
+
+    return {
+        "results": page["results"],
+        "count": len(page["results"]),
+        "next_before_timestamp": next_before[0] if next_before else None,
+        "next_before_id": next_before[1] if next_before else None,
+    }
+
+@app.get("/api/results/summary")
+async def summarize_results(
+    since_minutes: Optional[float] = Query(None, gt=0),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+):
+    store = require_results_db()
+    start_ts, end_ts = parse_time_range(since_minutes, start, end)
+    groups = await asyncio.get_running_loop().run_in_executor(None, store.summary, start_ts, end_ts)
+    return {"groups": groups, "queued_writes": store.queued}
 
 @app.post("/api/generate-mock-transaction")
 async def generate_mock_transaction():
@@ -87,34 +324,31 @@ async def generate_mock_transaction():
         mock_transaction = transaction_service.generate_mock_transaction()
         
         # Process the transaction
-        result = transaction_service.process_transaction(mock_transaction)
+        result = score_transaction(mock_transaction)
         
         # Add the API source to the result
         result["api_source"] = "mock"
         
         # Add the result to the results store
-        results_store.append(result)
+        store_result(result)
         
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating mock transaction: {str(e)}")
 
-# Background task to process automated feed
-def process_automated_feed(api_source: str, api_key: str = None, limit: int = 5):
-    try:
-        # Start the automated feed
-        feed_results = transaction_service.start_automated_feed(api_source, api_key, limit=limit)
-        
-        # Add the API source to each result
-        for result in feed_results:
-            result["api_source"] = api_source
-        
-        # Add the results to the results store
-        results_store.extend(feed_results)
-        
-        print(f"Automated feed from {api_source} completed successfully")
-    except Exception as e:
-        print(f"Error in automated feed background task: {e}")
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("shutdown")
+async def shutdown_feeds():
+    await feed_manager.stop_all()
+    if feed_http_client is not None:
+        await feed_http_client.aclose()
+    if results_log is not None:
+        results_log.close()
+    if results_db is not None:
+        results_db.close()
 
 if __name__ == "__main__":
     # Run the API server
@@ -0,0 +1,147 @@
+import asyncio
+from metrics import REGISTRY
+
+# Batch-size buckets for the stats histogram
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+# Queued by stop(); the collector flushes what is ahead of it and exits
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Collects single-transaction requests for up to max_batch_size items or
+    max_wait_ms milliseconds, scores them with one predict_batch call and
+    resolves each caller's future with its own row.
+
+    predict_batch runs in executor, or is awaited directly when it is a
+    coroutine function. name labels the batcher's metrics.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=32, max_wait_ms=5.0, executor=None, name="ensemble"):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.executor = executor
+        self.name = name
+        self._is_async = asyncio.iscoroutinefunction(predict_batch)
+
+        self.batch_sizes = REGISTRY.histogram(
+            "fraud_batch_size", "Transactions per micro-batch", BATCH_SIZE_BUCKETS, batcher=name
+        )
+        self.queue_depths = REGISTRY.histogram(
+            "fraud_batch_queue_depth", "Micro-batcher queue depth seen by each submit", BATCH_SIZE_BUCKETS, batcher=name
+        )
+        self.queue_depth = REGISTRY.gauge(
+            "fraud_batch_queue_depth_current", "Transactions waiting in the micro-batcher", batcher=name
+        )
+
+        # ✅ Created in start(), inside the running event loop
+        self._queue = None
+        self._collector = None
+        self._in_flight = set()
+
+    async def start(self):
+        """
+        Start the background collector task.
+        """
+        if self._collector is None:
+            self._queue = asyncio.Queue()
+            self._collector = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        """
+        Stop accepting transactions, score the ones already submitted and
+        wait for every batch in flight, so no caller is left waiting.
+        """
+        if self._collector is not None:
+            collector, self._collector = self._collector, None
+
+            # ✅ A sentinel rather than cancel(): the partial batch and the
+            # queue are flushed instead of being dropped with their callers
+            self._queue.put_nowait(_STOP)
+            try:
+                await collector
+            except asyncio.CancelledError:
+                pass
+
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def submit(self, transaction_data):
+        """
+        Queue a transaction and wait for its (fraud_percent, anomaly_percent).
+        """
+        if self._collector is None:
+            raise RuntimeError("MicroBatcher is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        self.queue_depths.observe(self._queue.qsize())
+        await self._queue.put((transaction_data, future))
+        self.queue_depth.set(self._queue.qsize())
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_wait_ms / 1000
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self.queue_depth.set(self._queue.qsize())
+
+            # ✅ Score in the background so the next batch can start filling
+            task = asyncio.create_task(self._execute(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _execute(self, batch):
+        self.batch_sizes.observe(len(batch))
+        transactions = [transaction for transaction, _ in batch]
+
+        try:
+            if self._is_async:
+                results = await self.predict_batch(transactions)
+            else:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.predict_batch, transactions
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        """
+        Current queue depth plus batch-size and queue-depth histograms.
+        """
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight_batches": len(self._in_flight),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_depth_at_submit": self.queue_depths.snapshot(),
+        }
@@ -0,0 +1,253 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import numpy as np
+
+from transaction_generator import generate_mock_transactions, columns_to_records
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+
+# Allowed slowdown against the baseline before a benchmark counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+
+class StandInClassifier:
+    """
+    Tiny logistic model with the predict_proba interface of the real classifiers.
+    """
+
+    def __init__(self, n_features, seed):
+        rng = np.random.default_rng(seed)
+        self.coef = rng.normal(0, 0.5, n_features)
+        self.intercept = rng.normal()
+
+    def predict_proba(self, X):
+        X = np.nan_to_num(np.asarray(X, dtype=np.float64))
+        p = 1 / (1 + np.exp(-(X @ self.coef + self.intercept)))
+        return np.column_stack([1 - p, p])
+
+
+class StandInIsolationForest:
+    """
+    Tiny anomaly model with the decision_function interface of IsolationForest.
+    """
+
+    def __init__(self, n_features, seed):
+        rng = np.random.default_rng(seed)
+        self.center = rng.normal(0, 1, n_features)
+
+    def decision_function(self, X):
+        X = np.nan_to_num(np.asarray(X, dtype=np.float64))
+        return 0.5 - np.tanh(np.linalg.norm(X - self.center, axis=1) / X.shape[1])
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process so far, in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ✅ ru_maxrss is kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def measure(benchmark):
+    """
+    Run benchmark() and add how far it raised the process's peak RSS. The
+    process peak only grows, so this is the benchmark's own memory cost
+    beyond the highest peak of everything that ran before it.
+    """
+    before = peak_rss_mb()
+    result = benchmark()
+    result["peak_rss_growth_mb"] = round(peak_rss_mb() - before, 1)
+    return result
+
+
+def summarize(latencies, items_per_call=1):
+    """
+    Throughput and latency percentiles from per-call latencies in seconds.
+    """
+    latencies = np.asarray(latencies)
+    return {
+        "calls": len(latencies),
+        "throughput_per_s": round(items_per_call * len(latencies) / latencies.sum(), 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 4),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 4),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 4),
+    }
+
+
+def time_calls(fn, args_list, warmup=20):
+    """
+    Call fn once per entry in args_list and return per-call latencies.
+    """
+    for args in args_list[:warmup]:
+        fn(*args)
+
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def sample_transactions(n, seed):
+    """
+    Reproducible transactions with the /detect_fraud request fields.
+    """
+    from core import numerical_features, categorical_features, boolean_features
+
+    fields = numerical_features + categorical_features + boolean_features
+    columns = generate_mock_transactions(n, seed=seed, fraud_rate=0.05)
+    return columns_to_records({field: columns[field] for field in fields})
+
+
+def build_stand_in_ensemble(transactions):
+    """
+    A FraudEnsembleModel with stand-in models and a preprocessor fitted on
+    the sample, so no real pickles are needed.
+    """
+    import pandas as pd
+    from ensemble import FraudEnsembleModel
+    from preprocessing import FeaturePreprocessor
+
+    # ✅ Lazy against an empty directory: nothing is read from disk, and the
+    # directory (and its default weights) is gone once the model is built
+    with tempfile.TemporaryDirectory(prefix="bench_models_") as model_dir:
+        model = FraudEnsembleModel(model_dir=model_dir, lazy=True)
+    model.preprocessor = FeaturePreprocessor.fit(
+        pd.DataFrame(transactions), FraudEnsembleModel.CATEGORICAL_COLS, FraudEnsembleModel.NUMERICAL_COLS
+    )
+
+    n_features = len(model.preprocessor.columns)
+    model.models = {
+        name: (StandInIsolationForest(n_features, i) if "isolation_forest" in name
+               else StandInClassifier(n_features, i))
+        for i, name in enumerate(model.weights)
+    }
+    model._loaded = True
+    return model
+
+
+async def _run_end_to_end(transactions, concurrency):
+    import httpx
+    import main
+
+    async def stub_compliance_risk(transaction_data):
+        return 42.0
+
+    # ✅ Stand-in models and a stubbed Groq call
+    stand_in = build_stand_in_ensemble(transactions)
+    main.model_registry.swap(stand_in)
+    main.get_compliance_risk = stub_compliance_risk
+
+    await main.ensemble_batcher.start()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def call(transaction, record):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/detect_fraud", json=transaction)
+                elapsed = time.perf_counter() - start
+            response.raise_for_status()
+            if record:
+                latencies.append(elapsed)
+
+        await asyncio.gather(*(call(t, False) for t in transactions[:50]))
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(call(t, True) for t in transactions))
+        wall = time.perf_counter() - wall_start
+
+    await main.ensemble_batcher.stop()
+
+    result = summarize(latencies)
+    # ✅ Requests overlap, so throughput comes from wall time
+    result["throughput_per_s"] = round(len(latencies) / wall, 1)
+    return result
+
+
+def run_benchmarks(n, batch_size, concurrency, seed):
+    import core
+
+    transactions = sample_transactions(n, seed)
+    model = build_stand_in_ensemble(transactions)
+    single = [(t,) for t in transactions]
+    batches = [(transactions[i:i + batch_size],) for i in range(0, n, batch_size)]
+
+    return {
+        "ensemble.preprocess_transaction": measure(lambda: summarize(time_calls(model.preprocess_transaction, single))),
+        "ensemble.predict": measure(lambda: summarize(time_calls(model.predict, single))),
+        f"ensemble.predict_batch[{batch_size}]": measure(lambda: summarize(
+            time_calls(model.predict_batch, batches, warmup=2), items_per_call=batch_size
+        )),
+        "core.preprocess_transaction": measure(lambda: summarize(time_calls(core.preprocess_transaction, single))),
+        "detect_fraud.end_to_end": measure(lambda: asyncio.run(_run_end_to_end(transactions, concurrency))),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Return a list of regressions against the baseline.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["throughput_per_s"] < previous["throughput_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {current['throughput_per_s']}/s vs baseline {previous['throughput_per_s']}/s")
+        if current["p99_ms"] > previous["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {current['p99_ms']}ms vs baseline {previous['p99_ms']}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fraud scoring hot paths.")
+    parser.add_argument("-n", type=int, default=2000, help="Transactions per benchmark")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=64, help="In-flight requests for the end-to-end run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.n, args.batch_size, args.concurrency, args.seed)
+
+    print(f"{'benchmark':40} {'ops/s':>12} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'+rss MB':>8}")
+    for name, r in results.items():
+        print(f"{name:40} {r['throughput_per_s']:>12} {r['p50_ms']:>10} {r['p95_ms']:>10} {r['p99_ms']:>10} {r['peak_rss_growth_mb']:>8}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("⚠️ No baseline found. Run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+
+    if regressions:
+        print("❌ Performance regressions:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+
+    print("✅ No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+import os
+import gc
+import sys
+import json
+import time
+import asyncio
+import sqlite3
+import argparse
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+
+from ensemble import FraudEnsembleModel
+from model_registry import ModelRegistry
+
+MANIFEST_FILE = "_bulk_score.json"
+
+# Same fallback and risk bands as the /detect_fraud response in main.py
+COMPLIANCE_FALLBACK_PERCENT = 50.0
+RISK_BANDS = [33, 66]
+RISK_CLASSES = np.array(["Low", "Medium", "High"])
+
+# Input columns copied to the output when present
+ID_COLUMNS = ["TransactionID", "UserID", "TransactionDateTime"]
+
+# Set in each worker; inherited from the parent when processes are forked
+_model = None
+_compliance_mode = "skip"
+_compliance_cache_path = None
+
+
+class ComplianceDiskCache:
+    """
+    Compliance scores on disk, keyed by the rounded feature vector, so reruns
+    and resumed runs do not call the Groq API again. Shared by all workers.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS compliance (key TEXT PRIMARY KEY, score REAL NOT NULL)")
+
+    def get_many(self, keys):
+        found = {}
+        for key in set(keys):
+            row = self._connection.execute("SELECT score FROM compliance WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                found[key] = row[0]
+        return found
+
+    def set_many(self, scores):
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO compliance (key, score) VALUES (?, ?)", scores.items())
+
+    def close(self):
+        self._connection.close()
+
+
+def _exact_parquet_chunks(path, chunk_size):
+    """
+    DataFrames of exactly chunk_size rows (the last may be shorter).
+    iter_batches stops at row-group boundaries, so its batches are regrouped.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pending, n_pending = [], 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        while batch.num_rows:
+            take = min(chunk_size - n_pending, batch.num_rows)
+            pending.append(batch.slice(0, take))
+            n_pending += take
+            batch = batch.slice(take)
+            if n_pending == chunk_size:
+                yield pa.Table.from_batches(pending).to_pandas()
+                pending, n_pending = [], 0
+
+    if n_pending:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+
+def read_chunks(path, chunk_size):
+    """
+    Yield (index, DataFrame) chunks of a CSV or Parquet file. Chunk i always
+    holds rows [i * chunk_size, (i + 1) * chunk_size), so runs can resume.
+    """
+    if path.endswith(".parquet"):
+        batches = _exact_parquet_chunks(path, chunk_size)
+    else:
+        import pandas as pd
+
+        batches = pd.read_csv(path, chunksize=chunk_size)
+
+    for index, df in enumerate(batches):
+        yield index, df
+
+
+def part_path(output_dir, index, fmt):
+    return os.path.join(output_dir, f"part-{index:06d}.{fmt}")
+
+
+def _init_worker(model_dir, mmap_mode, compliance_mode, compliance_cache_path):
+    global _model, _compliance_mode, _compliance_cache_path
+    if _model is None:
+        _model = FraudEnsembleModel(model_dir=model_dir, mmap_mode=mmap_mode)
+    _compliance_mode = compliance_mode
+    _compliance_cache_path = compliance_cache_path
+
+
+async def _compliance_scores(df):
+    """
+    Compliance risk per row from the Groq API, read through the disk cache
+    when one is configured. Rows that fail are None.
+    """
+    import core
+
+    columns = core.numerical_features + core.categorical_features + core.boolean_features
+    processed = [core.preprocess_transaction(record) for record in df[columns].to_dict("records")]
+    keys = [repr(core.compliance_cache_key(vector)) for vector in processed]
+
+    cache = ComplianceDiskCache(_compliance_cache_path) if _compliance_cache_path else None
+    cached = cache.get_many(keys) if cache is not None else {}
+
+    # ✅ Rows not on disk are scored many per request
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    try:
+        fetched = await core.compliance_client.score_batch([processed[i] for i in missing])
+    finally:
+        # ✅ The pooled client belongs to this chunk's event loop
+        await core.compliance_client.aclose()
+
+    scores = [cached.get(key) for key in keys]
+    for i, risk_score in zip(missing, fetched):
+        scores[i] = risk_score
+
+    if cache is not None:
+        cache.set_many({keys[i]: risk_score for i, risk_score in zip(missing, fetched) if risk_score is not None})
+        cache.close()
+    return scores
+
+
+def score_chunk(index, df, output_dir, fmt):
+    """
+    Score one chunk and write it to its part file. The part is written to a
+    temporary name and renamed, so a part file on disk is always complete.
+    """
+    start = time.perf_counter()
+    rows = _model.predict_frame(df)
+
+    fraud = np.array([fraud_percent for fraud_percent, _ in rows], dtype=np.float64)
+    anomaly = np.array([np.nan if anomaly == "N/A" else anomaly for _, anomaly in rows], dtype=np.float64)
+
+    if _compliance_mode == "llm":
+        scores = asyncio.run(_compliance_scores(df))
+        compliance = np.array([np.nan if score is None else score for score in scores], dtype=np.float64)
+    else:
+        compliance = np.full(len(df), np.nan)
+
+    # ✅ Missing compliance scores fall back exactly as in /detect_fraud
+    degraded = np.isnan(compliance)
+    compliance_used = np.where(degraded, COMPLIANCE_FALLBACK_PERCENT, compliance)
+    overall = np.round((fraud + compliance_used + np.nan_to_num(anomaly)) / 3, 2)
+
+    import pandas as pd
+
+    result = pd.DataFrame({column: df[column].to_numpy() for column in ID_COLUMNS if column in df.columns})
+    result["fraud_percent"] = fraud
+    result["compliance_percent"] = compliance_used
+    result["behavior_anomaly_percent"] = anomaly
+    result["overall_risk"] = overall
+    result["risk_class"] = RISK_CLASSES[np.searchsorted(RISK_BANDS, overall, side="right")]
+    result["degraded"] = degraded
+    result["model_version"] = _model.version
+
+    path = part_path(output_dir, index, fmt)
+    tmp_path = path + ".tmp"
+    if fmt == "parquet":
+        result.to_parquet(tmp_path, index=False)
+    else:
+        result.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+    return index, len(df), time.perf_counter() - start
+
+
+def check_manifest(output_dir, manifest):
+    """
+    Write the run manifest, or check that an existing run used the same settings.
+    """
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            previous = json.load(f)
+        changed = [key for key in manifest if previous.get(key) != manifest[key]]
+        if changed:
+            print(f"❌ {output_dir} holds a run with different {', '.join(changed)}. Use a new output directory.")
+            return False
+        return True
+
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of transactions offline.")
+    parser.add_argument("input", help="CSV or .parquet file with the model feature columns")
+    parser.add_argument("output_dir", help="Directory for part files; rerun with the same one to resume")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--models-root", default="models")
+    parser.add_argument("--model-version", help="Model version to score with (default: the active one)")
+    parser.add_argument("--mmap-mode", default=None, help="joblib mmap_mode for the model pickles, e.g. r")
+    parser.add_argument("--compliance", choices=["skip", "llm"], default="skip",
+                        help="skip uses the fallback score like a degraded /detect_fraud response")
+    parser.add_argument("--compliance-cache", help="SQLite file caching compliance scores across runs")
+    args = parser.parse_args()
+
+    if (args.format == "parquet" or args.input.endswith(".parquet")) and importlib.util.find_spec("pyarrow") is None:
+        print("❌ Parquet input or output needs pyarrow: pip install pyarrow")
+        return 1
+
+    registry = ModelRegistry(root=args.models_root)
+    version = args.model_version or registry.active_version()
+    try:
+        model_dir = registry.version_dir(version)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest = {
+        "input": os.path.abspath(args.input),
+        "chunk_size": args.chunk_size,
+        "format": args.format,
+        "model_version": version or "unversioned",
+        "compliance": args.compliance,
+    }
+    if not check_manifest(args.output_dir, manifest):
+        return 1
+
+    # ✅ Load the models once; forked workers share them copy-on-write
+    global _model
+    _model = FraudEnsembleModel(model_dir=model_dir, mmap_mode=args.mmap_mode)
+    gc.collect()
+    gc.freeze()
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    init_args = (model_dir, args.mmap_mode, args.compliance, args.compliance_cache)
+
+    started = time.perf_counter()
+    scored_rows = skipped_chunks = 0
+    pending = set()
+
+    with ProcessPoolExecutor(args.workers, mp_context=context, initializer=_init_worker, initargs=init_args) as pool:
+        def collect(timeout):
+            nonlocal scored_rows
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                index, n_rows, seconds = future.result()
+                scored_rows += n_rows
+                rate = scored_rows / (time.perf_counter() - started)
+                print(f"✅ part {index:06d}: {n_rows} rows in {seconds:.2f}s ({rate:,.0f} rows/s overall)")
+
+        for index, df in read_chunks(args.input, args.chunk_size):
+            # ✅ Chunks finished by an earlier run are skipped
+            if os.path.exists(part_path(args.output_dir, index, args.format)):
+                skipped_chunks += 1
+                continue
+
+            # ✅ Bound the chunks held in memory while workers are busy
+            while len(pending) >= 2 * args.workers:
+                collect(None)
+            pending.add(pool.submit(score_chunk, index, df, args.output_dir, args.format))
+            collect(0)
+
+        while pending:
+            collect(None)
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Scored {scored_rows} rows in {elapsed:.1f}s, skipped {skipped_chunks} finished chunks")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
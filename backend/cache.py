@@ -0,0 +1,129 @@
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class LRUTTLCache:
+    """
+    Bounded cache with least-recently-used eviction and a per-entry time to live.
+    """
+
+    def __init__(self, max_size=1024, ttl_seconds=300.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for key, or default if missing or expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        """
+        Store value under key, evicting the least recently used entry if full.
+        """
+        if self.max_size <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop every entry. Hit and miss counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Return size and hit/miss counters.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def feature_hash(features):
+    """
+    Stable digest of a transaction's model-relevant fields.
+    """
+    payload = json.dumps(features, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class ScoreCache:
+    """
+    Scored results keyed by transaction ID plus a hash of the model-relevant
+    fields, so replayed and retried transactions are not scored again.
+
+    invalidate() drops every entry and bumps a generation that is part of
+    each key, so a score computed by models that were replaced while it was
+    in flight is never served afterwards.
+
+    Only transactions with an ID are cached. Without one, identical payloads
+    are separate transactions (e.g. a burst of card-testing charges) and
+    must each reach the feature store, so key() returns None and such
+    requests always miss.
+    """
+
+    def __init__(self, max_size=10000, ttl_seconds=300.0):
+        self.cache = LRUTTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.generation = 0
+        self.invalidations = 0
+
+    def key(self, transaction_id, features):
+        if transaction_id is None:
+            return None
+        return (self.generation, transaction_id, feature_hash(features))
+
+    def get(self, key):
+        if key is None:
+            return None
+        return self.cache.get(key)
+
+    def set(self, key, result):
+        # ✅ Keys from before the last invalidation belong to the old models
+        if key is not None and key[0] == self.generation:
+            self.cache.set(key, result)
+
+    def invalidate(self):
+        """
+        Forget every cached score, e.g. after the models are reloaded.
+        """
+        self.generation += 1
+        self.invalidations += 1
+        self.cache.clear()
+
+    def stats(self):
+        return {**self.cache.stats(), "generation": self.generation, "invalidations": self.invalidations}
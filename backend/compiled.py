@@ -0,0 +1,441 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import numpy as np
+
+COMPILED_FILE = "compiled_ensemble.npz"
+
+_EULER_GAMMA = 0.5772156649015329
+
+# LightGBM reads inputs this close to zero as exactly zero (kZeroThreshold = 1e-35f)
+_LIGHTGBM_ZERO_THRESHOLD = float(np.float32(1e-35))
+
+
+def _average_path_length(n_samples):
+    """
+    Average path length of an unsuccessful BST search, as used by IsolationForest.
+    """
+    n = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    large = n > 2
+    result[large] = 2.0 * (np.log(n[large] - 1.0) + _EULER_GAMMA) - 2.0 * (n[large] - 1.0) / n[large]
+    return result
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _leaf_arrays(n_nodes):
+    """
+    Empty node arrays. Leaves keep feature -1 and point to themselves.
+    """
+    return {
+        "feature": np.full(n_nodes, -1, dtype=np.int32),
+        "threshold": np.zeros(n_nodes, dtype=np.float64),
+        "left": np.arange(n_nodes, dtype=np.int32),
+        "right": np.arange(n_nodes, dtype=np.int32),
+        "value": np.zeros(n_nodes, dtype=np.float64),
+        "default_left": np.ones(n_nodes, dtype=bool),
+    }
+
+
+# ✅ Exporters: each returns a model spec plus a list of trees in node-array
+# form. Every split is normalized to "go left if x <= threshold", with
+# default_left deciding where NaN goes.
+
+def _export_isolation_forest(model):
+    trees = []
+    for estimator, features in zip(model.estimators_, model.estimators_features_):
+        tree = estimator.tree_
+        nodes = _leaf_arrays(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        depth = np.zeros(tree.node_count)
+        for i in range(tree.node_count):
+            if not is_leaf[i]:
+                depth[tree.children_left[i]] = depth[i] + 1
+                depth[tree.children_right[i]] = depth[i] + 1
+
+        internal = ~is_leaf
+        nodes["feature"][internal] = np.asarray(features)[tree.feature[internal]]
+        nodes["threshold"][internal] = tree.threshold[internal]
+        nodes["left"][internal] = tree.children_left[internal]
+        nodes["right"][internal] = tree.children_right[internal]
+        nodes["value"][is_leaf] = depth[is_leaf] + _average_path_length(tree.n_node_samples[is_leaf])
+        trees.append(nodes)
+
+    spec = {
+        "type": "isolation_forest",
+        "float32": True,
+        "n_trees": len(trees),
+        "c": float(_average_path_length([model.max_samples_])[0]),
+        "offset": float(model.offset_),
+    }
+    return spec, trees
+
+
+def _export_xgboost(model):
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    learner = json.loads(booster.save_raw(raw_format="json"))["learner"]
+
+    objective = learner["objective"]["name"]
+    if objective not in ("binary:logistic", "reg:logistic"):
+        raise ValueError(f"Unsupported XGBoost objective: {objective}")
+    if learner["gradient_booster"]["name"] != "gbtree":
+        raise ValueError("Only gbtree XGBoost models can be compiled")
+
+    raw_trees = learner["gradient_booster"]["model"]["trees"]
+
+    # ✅ predict_proba stops at the best iteration when early stopping was used
+    best_iteration = learner.get("attributes", {}).get("best_iteration")
+    if best_iteration is not None:
+        trees_per_round = len(raw_trees) // booster.num_boosted_rounds()
+        raw_trees = raw_trees[:(int(best_iteration) + 1) * trees_per_round]
+
+    trees = []
+    for raw in raw_trees:
+        if any(raw.get("split_type", [])):
+            raise ValueError("Categorical XGBoost splits cannot be compiled")
+
+        left = np.asarray(raw["left_children"], dtype=np.int32)
+        right = np.asarray(raw["right_children"], dtype=np.int32)
+        conditions = np.asarray(raw["split_conditions"], dtype=np.float64)
+        nodes = _leaf_arrays(len(left))
+        is_leaf = left == -1
+        internal = ~is_leaf
+
+        nodes["feature"][internal] = np.asarray(raw["split_indices"], dtype=np.int32)[internal]
+        # XGBoost compares in float32, so the JSON decimal is rounded back to
+        # the float32 it came from. It goes left on x < condition;
+        # x <= nextafter(condition, -inf) is equivalent
+        thresholds = conditions[internal].astype(np.float32).astype(np.float64)
+        nodes["threshold"][internal] = np.nextafter(thresholds, -np.inf)
+        nodes["left"][internal] = left[internal]
+        nodes["right"][internal] = right[internal]
+        nodes["default_left"] = np.asarray(raw["default_left"], dtype=bool)
+        nodes["value"][is_leaf] = conditions[is_leaf]
+        trees.append(nodes)
+
+    base_score = float(learner["learner_model_param"]["base_score"])
+    spec = {
+        "type": "binary",
+        "float32": True,
+        "scale": 1.0,
+        "bias": float(np.log(base_score / (1.0 - base_score))),
+    }
+    return spec, trees
+
+
+def _export_lightgbm(model):
+    booster = model.booster_ if hasattr(model, "booster_") else model
+    dump = booster.dump_model()
+
+    objective = dump.get("objective", "")
+    if not objective.startswith("binary"):
+        raise ValueError(f"Unsupported LightGBM objective: {objective}")
+    sigmoid = 1.0
+    for token in objective.split():
+        if token.startswith("sigmoid:"):
+            sigmoid = float(token.split(":", 1)[1])
+
+    trees = []
+    for info in dump["tree_info"]:
+        flat = []
+
+        def visit(node):
+            index = len(flat)
+            flat.append(node)
+            if "split_feature" in node:
+                node["_left"] = visit(node["left_child"])
+                node["_right"] = visit(node["right_child"])
+            return index
+
+        visit(info["tree_structure"])
+        nodes = _leaf_arrays(len(flat))
+
+        for i, node in enumerate(flat):
+            if "split_feature" not in node:
+                nodes["value"][i] = node["leaf_value"]
+                continue
+            if node["decision_type"] != "<=":
+                raise ValueError("Categorical LightGBM splits cannot be compiled")
+
+            threshold = float(node["threshold"])
+            missing_type = node.get("missing_type", "None")
+            if missing_type == "NaN":
+                default_left = node["default_left"]
+            elif missing_type == "None":
+                # ✅ LightGBM treats NaN as 0.0 for these splits
+                default_left = 0.0 <= threshold
+            else:
+                raise ValueError(f"Unsupported LightGBM missing type: {missing_type}")
+
+            nodes["feature"][i] = node["split_feature"]
+            nodes["threshold"][i] = threshold
+            nodes["left"][i] = node["_left"]
+            nodes["right"][i] = node["_right"]
+            nodes["default_left"][i] = default_left
+
+        trees.append(nodes)
+
+    spec = {"type": "binary", "float32": False, "scale": sigmoid, "bias": 0.0}
+    return spec, trees
+
+
+def _export_catboost(model):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.json")
+        model.save_model(path, format="json")
+        with open(path) as f:
+            dump = json.load(f)
+
+    if "oblivious_trees" not in dump:
+        raise ValueError("Only symmetric (oblivious) CatBoost trees can be compiled")
+    if dump["features_info"].get("categorical_features"):
+        raise ValueError("CatBoost models with categorical features cannot be compiled")
+
+    float_features = {f["feature_index"]: f for f in dump["features_info"]["float_features"]}
+
+    trees = []
+    for raw in dump["oblivious_trees"]:
+        splits = raw.get("splits", [])
+        depth = len(splits)
+        leaf_values = np.asarray(raw["leaf_values"], dtype=np.float64)
+        if len(leaf_values) != 2 ** depth:
+            raise ValueError("Multi-dimensional CatBoost leaves cannot be compiled")
+
+        # ✅ Expand the oblivious tree into a full binary tree in heap order
+        n_internal = 2 ** depth - 1
+        nodes = _leaf_arrays(2 ** (depth + 1) - 1)
+        for level, split in enumerate(splits):
+            if split.get("split_type", "FloatFeature") != "FloatFeature":
+                raise ValueError(f"Unsupported CatBoost split: {split.get('split_type')}")
+            feature_info = float_features[split["float_feature_index"]]
+            # CatBoost goes right on x > border; NaN is "Min" (left) unless AsTrue
+            default_left = feature_info.get("nan_value_treatment", "AsIs") != "AsTrue"
+            for k in range(2 ** level - 1, 2 ** (level + 1) - 1):
+                nodes["feature"][k] = feature_info["flat_feature_index"]
+                # Borders are float32 in CatBoost, like the inputs they are compared with
+                nodes["threshold"][k] = float(np.float32(split["border"]))
+                nodes["left"][k] = 2 * k + 1
+                nodes["right"][k] = 2 * k + 2
+                nodes["default_left"][k] = default_left
+
+        # Heap position encodes the path with the first split as the top bit;
+        # CatBoost leaf indices use the first split as the lowest bit
+        for position in range(2 ** depth):
+            leaf_index = sum(((position >> (depth - 1 - level)) & 1) << level for level in range(depth))
+            nodes["value"][n_internal + position] = leaf_values[leaf_index]
+
+        trees.append(nodes)
+
+    scale, bias = dump.get("scale_and_bias", [1.0, [0.0]])
+    bias = bias[0] if isinstance(bias, list) else bias
+    spec = {"type": "binary", "float32": True, "scale": float(scale), "bias": float(bias)}
+    return spec, trees
+
+
+def _exporter_for(model):
+    module = type(model).__module__
+    if module.startswith("xgboost"):
+        return _export_xgboost
+    if module.startswith("lightgbm"):
+        return _export_lightgbm
+    if module.startswith("catboost"):
+        return _export_catboost
+    if type(model).__name__ == "IsolationForest":
+        return _export_isolation_forest
+    raise ValueError(f"Unsupported model type: {type(model).__name__}")
+
+
+class CompiledEnsemble:
+    """
+    Every tree of every ensemble model in one set of flat node arrays,
+    evaluated together with NumPy. Needs no ML library at inference time.
+    """
+
+    def __init__(self, arrays, meta):
+        self.meta = meta
+        self.n_features = meta["n_features"]
+        self.models = meta["models"]
+        self.model_names = [spec["name"] for spec in self.models]
+
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.default_left = arrays["default_left"]
+        self.roots = arrays["roots"]
+        self.tree_model = arrays["tree_model"]
+        self.max_depth = int(meta["max_depth"])
+
+        # ✅ Models that read float32 inputs use the second half of the input matrix
+        node_model = np.repeat(self.tree_model, np.diff(np.append(self.roots, len(self.value))))
+        float32_model = np.array([spec["float32"] for spec in self.models], dtype=bool)
+        self.raw_feature = arrays["feature"]
+        feature = self.raw_feature.astype(np.int64)
+        offset = np.where(float32_model[node_model] & (feature >= 0), self.n_features, 0)
+        self.feature = feature + offset
+
+        # Tree-to-model summation matrix
+        self.tree_weights = np.zeros((len(self.roots), len(self.models)))
+        self.tree_weights[np.arange(len(self.roots)), self.tree_model] = 1.0
+
+    @classmethod
+    def from_models(cls, models, n_features):
+        """
+        Compile an ordered dict of model name -> fitted model.
+        """
+        columns = {key: [] for key in ("feature", "threshold", "left", "right", "value", "default_left")}
+        roots, tree_model, specs = [], [], []
+        n_nodes, max_depth = 0, 0
+
+        for m, (name, model) in enumerate(models.items()):
+            spec, trees = _exporter_for(model)(model)
+            spec["name"] = name
+            specs.append(spec)
+
+            for nodes in trees:
+                roots.append(n_nodes)
+                tree_model.append(m)
+                for key, values in nodes.items():
+                    columns[key].append(values + n_nodes if key in ("left", "right") else values)
+                max_depth = max(max_depth, _tree_depth(nodes))
+                n_nodes += len(nodes["feature"])
+
+        arrays = {key: np.concatenate(values) for key, values in columns.items()}
+        arrays["roots"] = np.asarray(roots, dtype=np.int64)
+        arrays["tree_model"] = np.asarray(tree_model, dtype=np.int64)
+        meta = {"n_features": n_features, "max_depth": max_depth, "models": specs}
+        return cls(arrays, meta)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files if key != "meta"}
+            meta = json.loads(str(data["meta"]))
+        return cls(arrays, meta)
+
+    def save(self, path):
+        np.savez(
+            path,
+            feature=self.raw_feature, threshold=self.threshold, left=self.left,
+            right=self.right, value=self.value, default_left=self.default_left,
+            roots=self.roots, tree_model=self.tree_model, meta=np.array(json.dumps(self.meta)),
+        )
+
+    def model_outputs(self, X):
+        """
+        Raw output of every model for a batch, in one pass over all trees:
+        the positive-class probability for classifiers and the
+        decision_function value for the isolation forest.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        # ✅ The float64 half is only read by LightGBM, which zeroes tiny inputs
+        X64 = np.where(np.abs(X) <= _LIGHTGBM_ZERO_THRESHOLD, 0.0, X)
+        inputs = np.hstack([X64, X.astype(np.float32).astype(np.float64)])
+        rows = np.arange(len(X))[:, None]
+
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            feature = self.feature[node]
+            internal = feature >= 0
+            if not internal.any():
+                break
+            x = inputs[rows, np.where(internal, feature, 0)]
+            go_left = np.where(np.isnan(x), self.default_left[node], x <= self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        sums = self.value[node] @ self.tree_weights
+
+        outputs = {}
+        for m, spec in enumerate(self.models):
+            raw = sums[:, m]
+            if spec["type"] == "isolation_forest":
+                outputs[spec["name"]] = -(2.0 ** (-raw / (spec["n_trees"] * spec["c"]))) - spec["offset"]
+            else:
+                outputs[spec["name"]] = _sigmoid(spec["scale"] * raw + spec["bias"])
+        return outputs
+
+
+def _tree_depth(nodes):
+    depth = np.zeros(len(nodes["feature"]), dtype=np.int64)
+    for i in range(len(depth)):
+        if nodes["feature"][i] >= 0:
+            depth[nodes["left"][i]] = depth[i] + 1
+            depth[nodes["right"][i]] = depth[i] + 1
+    return int(depth.max())
+
+
+def boundary_inputs(compiled, n_samples, rng):
+    """
+    Rows with one feature placed exactly on a split threshold, on its float32
+    rounding, or one float32 step either side. Random inputs almost never
+    land there, so float32/float64 comparison differences would go unseen.
+    """
+    internal = np.flatnonzero(compiled.raw_feature >= 0)
+    picked = rng.choice(internal, size=min(n_samples, len(internal)), replace=False)
+
+    threshold = compiled.threshold[picked]
+    threshold32 = threshold.astype(np.float32)
+    values = np.concatenate([
+        threshold,
+        threshold32.astype(np.float64),
+        np.nextafter(threshold32, np.float32(np.inf)).astype(np.float64),
+        np.nextafter(threshold32, np.float32(-np.inf)).astype(np.float64),
+    ])
+    features = np.tile(compiled.raw_feature[picked], 4)
+
+    X = rng.normal(0, 2, (len(values), compiled.n_features))
+    X[np.arange(len(values)), features] = values
+    return X
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the ensemble pickles into one NumPy tree engine.")
+    parser.add_argument("--samples", type=int, default=2000,
+                        help="Random rows, and split thresholds, used to check the compiled outputs")
+    parser.add_argument("--tolerance", type=float, default=1e-5)
+    parser.add_argument("--force", action="store_true", help="Save even if the check fails")
+    parser.add_argument("--model-dir", default="models", help="Models directory, e.g. models/versions/<version>")
+    args = parser.parse_args()
+
+    from ensemble import FraudEnsembleModel
+
+    ensemble_model = FraudEnsembleModel(model_dir=args.model_dir, use_compiled=False)
+    if ensemble_model.preprocessor is not None:
+        n_features = len(ensemble_model.preprocessor.columns)
+    else:
+        n_features = max(int(getattr(model, "n_features_in_", 0)) for model in ensemble_model.models.values())
+
+    compiled = CompiledEnsemble.from_models(ensemble_model.models, n_features)
+
+    # ✅ Check against the original libraries before writing anything, on
+    # random rows and on rows placed exactly on split thresholds
+    rng = np.random.default_rng(0)
+    X = np.vstack([rng.normal(0, 2, (args.samples, n_features)), boundary_inputs(compiled, args.samples, rng)])
+    expected = ensemble_model.library_outputs(X)
+    actual = compiled.model_outputs(X)
+
+    worst = 0.0
+    for name, values in expected.items():
+        diff = float(np.max(np.abs(values - actual[name])))
+        worst = max(worst, diff)
+        print(f"{name:40} max abs diff {diff:.2e}")
+
+    if worst > args.tolerance and not args.force:
+        print(f"❌ Compiled outputs differ by more than {args.tolerance}. Nothing saved.")
+        return 1
+
+    path = os.path.join(ensemble_model.model_dir, COMPILED_FILE)
+    compiled.save(path)
+    print(f"✅ Compiled ensemble saved to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
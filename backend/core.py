@@ -1,38 +1,55 @@
 import os
 import re
 import json
-import requests
+import math
+import time
+import asyncio
+import threading
+import httpx
 import numpy as np
-import pandas as pd
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from dotenv import load_dotenv
+from cache import LRUTTLCache
+from batcher import MicroBatcher
+from metrics import REGISTRY, stage_timer
+from transaction_record import NUMERICAL_FIELDS, CATEGORICAL_FIELDS, BOOLEAN_FIELDS
 
 # Load API Key from .env file
 load_dotenv(dotenv_path=r"D:\\Projects\\HackNUthon6\\.env")
 API_KEY = os.getenv("GROQ_API_KEY")
+API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
 
-# Initialize encoders and scalers
-scaler = StandardScaler()
-encoder = OneHotEncoder(handle_unknown="ignore")
+# Compliance client settings
+COMPLIANCE_TIMEOUT_S = float(os.getenv("COMPLIANCE_TIMEOUT_S", "10"))
+COMPLIANCE_MAX_CONCURRENCY = int(os.getenv("COMPLIANCE_MAX_CONCURRENCY", "16"))
+COMPLIANCE_MAX_RETRIES = int(os.getenv("COMPLIANCE_MAX_RETRIES", "2"))
+COMPLIANCE_BACKOFF_S = float(os.getenv("COMPLIANCE_BACKOFF_S", "0.25"))
+COMPLIANCE_CACHE_SIZE = int(os.getenv("COMPLIANCE_CACHE_SIZE", "10000"))
+COMPLIANCE_CACHE_TTL_S = float(os.getenv("COMPLIANCE_CACHE_TTL_S", "600"))
+CACHE_KEY_DECIMALS = 2
 
-# Define numerical, categorical, and boolean features
-numerical_features = [
-    "TransactionAmount", "AvgTransactionAmount", "AmountDeviationFromAvg",
-    "TransactionsLast1Hr", "TransactionsLast24Hr", "TimeSinceLastTransaction",
-    "DistanceFromHome", "UserAccountAgeDays"
-]
+# Batched compliance: many transactions per chat completion, fed by a coalescing queue
+COMPLIANCE_BATCH_MODE = os.getenv("COMPLIANCE_BATCH_MODE", "0").lower() in ("1", "true", "yes")
+COMPLIANCE_BATCH_SIZE = int(os.getenv("COMPLIANCE_BATCH_SIZE", "20"))
+COMPLIANCE_BATCH_WAIT_MS = float(os.getenv("COMPLIANCE_BATCH_WAIT_MS", "20"))
+COMPLIANCE_BATCH_RETRIES = int(os.getenv("COMPLIANCE_BATCH_RETRIES", "1"))
 
-categorical_features = [
-    "PaymentMethod", "CardType", "CardIssuer", "CardCountry", "MerchantCategory",
-    "MerchantCountry", "DeviceType", "DeviceOS", "Browser"
-]
+# Compliance stage metrics
+PREPROCESS_SECONDS = stage_timer("compliance_preprocess")
+COMPLIANCE_SECONDS = stage_timer("compliance")
+COMPLIANCE_CACHE_HITS = REGISTRY.counter("fraud_compliance_cache_hits_total", "Compliance scores served from cache")
+COMPLIANCE_ERRORS = REGISTRY.counter("fraud_compliance_errors_total", "Compliance calls that returned no score")
+COMPLIANCE_BATCH_REQUESTS = REGISTRY.counter("fraud_compliance_batch_requests_total", "Batched compliance requests sent")
+COMPLIANCE_BATCH_ITEM_RETRIES = REGISTRY.counter(
+    "fraud_compliance_batch_item_retries_total", "Transactions re-sent after a batched response left them out"
+)
 
-boolean_features = [
-    "IsHighRiskMerchant", "IPIsProxy", "IsNewDevice", "IsEmailGeneric", "IsHoliday"
-]
+# Define numerical, categorical, and boolean features, in the shared record order
+numerical_features = list(NUMERICAL_FIELDS)
+categorical_features = list(CATEGORICAL_FIELDS)
+boolean_features = list(BOOLEAN_FIELDS)
 
-# Dummy dataset for fitting encoders
-dummy_data = pd.DataFrame([{
+# Dummy transaction for fitting encoders
+dummy_transaction = {
     "TransactionAmount": 500, "AvgTransactionAmount": 250, "AmountDeviationFromAvg": 250,
     "TransactionsLast1Hr": 2, "TransactionsLast24Hr": 8, "TimeSinceLastTransaction": 300,
     "DistanceFromHome": 50, "UserAccountAgeDays": 365,
@@ -40,30 +57,114 @@ dummy_data = pd.DataFrame([{
     "MerchantCategory": "Groceries", "MerchantCountry": "US", "DeviceType": "Desktop",
     "DeviceOS": "Windows", "Browser": "Chrome",
     "IsHighRiskMerchant": False, "IPIsProxy": False, "IsNewDevice": True, "IsEmailGeneric": False, "IsHoliday": False
-}])
+}
 
-# Fit encoders and scalers on dummy data
-scaler.fit(dummy_data[numerical_features])
-encoder.fit(dummy_data[categorical_features])
+# Scaler and encoder, fitted on first use so importing this module stays cheap
+_encoders = None
+_layout = None
+_encoders_lock = threading.Lock()
+
+# One preallocated feature vector per thread, reused for every transaction
+_vector_buffers = threading.local()
+
+
+class FeatureLayout:
+    """
+    The fitted scaler and encoder flattened into arrays, so a transaction is
+    written straight into a feature vector without a DataFrame or sklearn.
+    Produces exactly what scaler.transform and encoder.transform did.
+    """
+
+    __slots__ = ("means", "scales", "category_slots", "boolean_offset", "size")
+
+    def __init__(self, scaler, encoder):
+        self.means = np.asarray(scaler.mean_, dtype=np.float64)
+        self.scales = np.asarray(scaler.scale_, dtype=np.float64)
+
+        # ✅ Vector position of each known category; unknown ones encode as all zeros
+        offset = len(numerical_features)
+        self.category_slots = []
+        for categories in encoder.categories_:
+            self.category_slots.append({value: offset + i for i, value in enumerate(categories.tolist())})
+            offset += len(categories)
+
+        self.boolean_offset = offset
+        self.size = offset + len(boolean_features)
+
+    def write(self, transaction_data, out):
+        n_numerical = len(numerical_features)
+        for i, name in enumerate(numerical_features):
+            value = transaction_data.get(name)
+            out[i] = np.nan if value is None else value
+        out[:n_numerical] -= self.means
+        out[:n_numerical] /= self.scales
+
+        out[n_numerical:self.boolean_offset] = 0.0
+        for name, slots in zip(categorical_features, self.category_slots):
+            slot = slots.get(transaction_data.get(name))
+            if slot is not None:
+                out[slot] = 1.0
+
+        for i, name in enumerate(boolean_features):
+            out[self.boolean_offset + i] = transaction_data.get(name)
+        return out
+
+
+def get_encoders():
+    """
+    Return the (scaler, encoder) pair, importing sklearn and fitting them on
+    the dummy transaction the first time.
+    """
+    global _encoders, _layout
+    if _encoders is None:
+        with _encoders_lock:
+            if _encoders is None:
+                import pandas as pd
+                from sklearn.preprocessing import StandardScaler, OneHotEncoder
+
+                dummy_data = pd.DataFrame([dummy_transaction])
+                scaler = StandardScaler().fit(dummy_data[numerical_features])
+                encoder = OneHotEncoder(handle_unknown="ignore").fit(dummy_data[categorical_features])
+                _layout = FeatureLayout(scaler, encoder)
+                _encoders = (scaler, encoder)
+    return _encoders
+
+
+def get_feature_layout():
+    get_encoders()
+    return _layout
+
+
+def warm_up():
+    """
+    Import the preprocessing dependencies and fit the encoders ahead of traffic.
+    """
+    get_encoders()
+
+
+def is_warm():
+    return _encoders is not None
 
 
 def preprocess_transaction(transaction_data):
     """
     Preprocess transaction data by scaling numerical features, encoding categorical features,
     and combining them into a single array.
-    """
-    df = pd.DataFrame([transaction_data])
-
-    # Scale numerical features
-    df[numerical_features] = scaler.transform(df[numerical_features])
 
-    # Encode categorical features
-    encoded_cats = encoder.transform(df[categorical_features]).toarray()
+    transaction_data is a dict or a TransactionRecord. The vector is built in
+    this thread's reusable buffer; only the returned list is allocated.
+    """
+    start = time.perf_counter()
+    layout = get_feature_layout()
 
-    # Merge processed data
-    processed_data = np.hstack([df[numerical_features].values, encoded_cats, df[boolean_features].values])
+    vector = getattr(_vector_buffers, "vector", None)
+    if vector is None or len(vector) != layout.size:
+        vector = _vector_buffers.vector = np.empty(layout.size, dtype=np.float64)
+    layout.write(transaction_data, vector)
 
-    return processed_data.tolist()
+    PREPROCESS_SECONDS.observe(time.perf_counter() - start)
+    # ✅ Same one-row nested list the DataFrame version returned
+    return [vector.tolist()]
 
 
 def extract_risk_score(response_text):
@@ -78,38 +179,305 @@ def extract_risk_score(response_text):
         return float(match.group(1)) * 100 if match else None
 
 
-def get_compliance_risk(transaction_data):
+# API Prompt
+prompt_text = """
+You are an AI system designed to assess financial transaction compliance risk.
+Given transaction details, assign a risk score (0.0 to 1.0) based on these factors...
+"""
+
+
+# Prompt for batched requests; the reply must be machine-readable
+batch_prompt_text = prompt_text + """
+You will receive a JSON object with a "transactions" list. Each entry has an "id" and the
+transaction "features". Respond with only a JSON object of the form
+{"scores": [{"id": <id>, "risk_score": <0.0 to 1.0>}, ...]} containing one entry per transaction.
+"""
+
+
+def _load_json_payload(response_text):
     """
-    Sends processed transaction data to the Groq API and returns the compliance risk score (0-100%).
+    Parse a JSON value from a model reply, tolerating markdown fences or
+    prose around it. Returns None if no JSON can be found.
+    """
+    text = response_text.strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    for open_char, close_char in (("{", "}"), ("[", "]")):
+        start, end = text.find(open_char), text.rfind(close_char)
+        if 0 <= start < end:
+            try:
+                return json.loads(text[start:end + 1])
+            except ValueError:
+                continue
+    return None
+
+
+def parse_batch_scores(response_text, n_items):
+    """
+    Per-item risk scores (0-100%) from a batched reply, with None for items
+    that are missing or invalid. Accepts a JSON array, or an object holding
+    one under "scores" or "results". Entries may be objects with an id and
+    a risk_score (or score), or bare numbers in item order.
+    """
+    scores = [None] * n_items
+    data = _load_json_payload(response_text)
+    if isinstance(data, dict):
+        data = data.get("scores", data.get("results"))
+    if not isinstance(data, list):
+        return scores
+
+    for position, entry in enumerate(data):
+        if isinstance(entry, dict):
+            index, value = entry.get("id", position), entry.get("risk_score", entry.get("score"))
+        else:
+            index, value = position, entry
+
+        if isinstance(value, bool):
+            continue
+        try:
+            index, value = int(index), float(value)
+        except (TypeError, ValueError):
+            continue
+
+        # ✅ Out-of-range ids and scores are treated as missing, not clamped
+        if 0 <= index < n_items and math.isfinite(value) and 0.0 <= value <= 1.0:
+            scores[index] = round(value * 100, 2)
+
+    return scores
+
+
+def compliance_cache_key(processed_data):
     """
-    processed_data = preprocess_transaction(transaction_data)
+    Cache key for a preprocessed feature vector. Values are rounded so that
+    near-duplicate transactions share an entry.
+    """
+    return tuple(np.round(np.asarray(processed_data, dtype=np.float64).ravel(), CACHE_KEY_DECIMALS))
+
 
-    # API Prompt
-    prompt_text = """
-    You are an AI system designed to assess financial transaction compliance risk.
-    Given transaction details, assign a risk score (0.0 to 1.0) based on these factors...
+class ComplianceClient:
+    """
+    Async Groq client with a pooled HTTP connection, per-call timeout,
+    bounded concurrency, retry with exponential backoff and an LRU+TTL
+    cache of scores. transport, if given, is the httpx transport the pool
+    sends through, e.g. an httpx.MockTransport in tests.
     """
 
-    json_payload = {
-        "model": "llama3-70b-8192",
-        "messages": [
-            {"role": "system", "content": prompt_text},
-            {"role": "user", "content": json.dumps({"features": processed_data})}
-        ],
-        "temperature": 0.3
-    }
+    def __init__(self, api_url=API_URL, api_key=API_KEY, timeout=COMPLIANCE_TIMEOUT_S,
+                 max_concurrency=COMPLIANCE_MAX_CONCURRENCY, max_retries=COMPLIANCE_MAX_RETRIES,
+                 backoff=COMPLIANCE_BACKOFF_S, cache_size=COMPLIANCE_CACHE_SIZE,
+                 cache_ttl=COMPLIANCE_CACHE_TTL_S, batch_size=COMPLIANCE_BATCH_SIZE,
+                 batch_retries=COMPLIANCE_BATCH_RETRIES, transport=None):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cache = LRUTTLCache(max_size=cache_size, ttl_seconds=cache_ttl)
+        self.batch_size = batch_size
+        self.batch_retries = batch_retries
+        self.transport = transport
+
+        # ✅ Created on first use, inside the running event loop
+        self._client = None
+        self._semaphore = None
+
+    def _get_client(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {self.api_key}"
+                },
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
 
-    API_URL = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {API_KEY}"
-    }
+    async def aclose(self):
+        """
+        Close the pooled HTTP connection.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
-    response = requests.post(API_URL, headers=headers, data=json.dumps(json_payload))
+    async def _post(self, json_payload):
+        """
+        POST the payload, retrying timeouts, connection errors, 429 and 5xx.
+        Returns the response text of the first choice, or None.
+        """
+        client = self._get_client()
+
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = await client.post(self.api_url, json=json_payload)
+                    if response.status_code == 200:
+                        return response.json()["choices"][0]["message"]["content"]
+                    if response.status_code != 429 and response.status_code < 500:
+                        return None
+                except (httpx.TransportError, KeyError, IndexError, ValueError) as e:
+                    print(f"⚠️ Compliance request failed (attempt {attempt + 1}): {e}")
+
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self.backoff * (2 ** attempt))
+
+        return None
+
+    async def score(self, transaction_data):
+        """
+        Return the compliance risk score (0-100%) for a transaction, or None.
+        """
+        return await self.score_processed(preprocess_transaction(transaction_data))
+
+    async def score_processed(self, processed_data):
+        """
+        Return the compliance risk score for an already preprocessed feature vector, or None.
+        """
+        key = compliance_cache_key(processed_data)
+        cached = self.cache.get(key)
+        if cached is not None:
+            COMPLIANCE_CACHE_HITS.inc()
+            return cached
+
+        json_payload = {
+            "model": "llama3-70b-8192",
+            "messages": [
+                {"role": "system", "content": prompt_text},
+                {"role": "user", "content": json.dumps({"features": processed_data})}
+            ],
+            "temperature": 0.3
+        }
+
+        response_text = await self._post(json_payload)
+        if response_text is None:
+            return None
 
-    if response.status_code == 200:
-        response_text = response.json()["choices"][0]["message"]["content"]
         risk_score = extract_risk_score(response_text)
-        return round(risk_score, 2) if risk_score is not None else None
+        if risk_score is None:
+            return None
 
-    return None
+        risk_score = round(risk_score, 2)
+        self.cache.set(key, risk_score)
+        return risk_score
+
+
+    async def _score_chunk(self, processed_batch):
+        """
+        One chat completion for up to batch_size feature vectors.
+        """
+        COMPLIANCE_BATCH_REQUESTS.inc()
+        json_payload = {
+            "model": "llama3-70b-8192",
+            "messages": [
+                {"role": "system", "content": batch_prompt_text},
+                {"role": "user", "content": json.dumps({
+                    "transactions": [{"id": i, "features": features} for i, features in enumerate(processed_batch)]
+                })}
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": 0.3
+        }
+
+        response_text = await self._post(json_payload)
+        if response_text is None:
+            return [None] * len(processed_batch)
+        return parse_batch_scores(response_text, len(processed_batch))
+
+    async def score_batch(self, processed_batch):
+        """
+        Compliance risk scores (0-100%) for many preprocessed feature vectors,
+        with up to batch_size of them packed into each request. Items a reply
+        leaves out or garbles are re-sent on their own, up to batch_retries
+        times; items still without a score come back as None.
+        """
+        keys = [compliance_cache_key(processed_data) for processed_data in processed_batch]
+        scores = {}
+        for key in set(keys):
+            cached = self.cache.get(key)
+            if cached is not None:
+                COMPLIANCE_CACHE_HITS.inc()
+                scores[key] = cached
+
+        # ✅ Identical feature vectors are sent once
+        first_index = {}
+        for i, key in enumerate(keys):
+            if key not in scores:
+                first_index.setdefault(key, i)
+        pending = list(first_index.values())
+
+        for attempt in range(self.batch_retries + 1):
+            if not pending:
+                break
+            if attempt > 0:
+                COMPLIANCE_BATCH_ITEM_RETRIES.inc(len(pending))
+
+            chunks = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+            results = await asyncio.gather(
+                *(self._score_chunk([processed_batch[i] for i in chunk]) for chunk in chunks)
+            )
+
+            failed = []
+            for chunk, chunk_scores in zip(chunks, results):
+                for i, risk_score in zip(chunk, chunk_scores):
+                    if risk_score is None:
+                        failed.append(i)
+                        continue
+                    scores[keys[i]] = risk_score
+                    self.cache.set(keys[i], risk_score)
+            pending = failed
+
+        return [scores.get(key) for key in keys]
+
+
+compliance_client = ComplianceClient()
+
+# Coalesces concurrent compliance calls into shared batched requests
+compliance_batcher = MicroBatcher(
+    compliance_client.score_batch,
+    max_batch_size=COMPLIANCE_BATCH_SIZE,
+    max_wait_ms=COMPLIANCE_BATCH_WAIT_MS,
+    name="compliance",
+)
+
+
+async def close():
+    """
+    Stop the compliance batcher and close the pooled HTTP connection.
+    """
+    await compliance_batcher.stop()
+    await compliance_client.aclose()
+
+
+async def get_compliance_risk(transaction_data):
+    """
+    Sends processed transaction data to the Groq API and returns the compliance risk score (0-100%).
+    """
+    start = time.perf_counter()
+    try:
+        if COMPLIANCE_BATCH_MODE:
+            processed_data = preprocess_transaction(transaction_data)
+            risk_score = compliance_client.cache.get(compliance_cache_key(processed_data))
+            if risk_score is not None:
+                COMPLIANCE_CACHE_HITS.inc()
+            else:
+                # ✅ Share a batched request with other in-flight transactions
+                await compliance_batcher.start()
+                risk_score = await compliance_batcher.submit(processed_data)
+        else:
+            risk_score = await compliance_client.score(transaction_data)
+    finally:
+        COMPLIANCE_SECONDS.observe(time.perf_counter() - start)
+
+    if risk_score is None:
+        COMPLIANCE_ERRORS.inc()
+    return risk_score
@@ -1,106 +1,317 @@
 import os
-import joblib
+import json
+import time
+import threading
 import numpy as np
-import pandas as pd
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from preprocessing import FeaturePreprocessor
+from metrics import REGISTRY, stage_timer
+from compiled import COMPILED_FILE, CompiledEnsemble
+
+PREPROCESS_SECONDS = stage_timer("ensemble_preprocess")
+COMPILED_SECONDS = stage_timer("compiled_ensemble")
 
 class FraudEnsembleModel:
-    def __init__(self, model_dir="models"):
+    # ✅ Define preprocessing columns
+    CATEGORICAL_COLS = [
+        "ProductCategory", "Currency", "PaymentMethod", "CardType",
+        "CardIssuer", "CardCountry", "BillingState", "IPCountry",
+        "DeviceType", "DeviceOS", "Browser", "MerchantCategory",
+        "MerchantCountry", "UserEmail"
+    ]
+
+    NUMERICAL_COLS = [
+        "TransactionAmount", "DistanceFromHome", "TransactionsLast1Hr",
+        "TransactionsLast24Hr", "AvgTransactionAmount",
+        "TimeSinceLastTransaction", "UserAccountAgeDays",
+        "AmountDeviationFromAvg"
+    ]
+
+    PREPROCESSOR_FILE = "preprocessor.json"
+    MANIFEST_FILE = "manifest.json"
+
+    # ✅ Define model weights
+    DEFAULT_WEIGHTS = {
+        "xgb_fraud_model.pkl": 0.20,
+        "catboost_fraud_model.pkl": 0.25,
+        "lgbm_fraud_model.pkl": 0.15,
+        "isolation_forest_fraud_model.pkl": 0.30,
+    }
+
+    def __init__(self, model_dir="models", mmap_mode=None, lazy=False, use_compiled=True,
+                 weights=None, version=None):
         """
         Initialize the ensemble model by loading models and setting up preprocessing.
+        mmap_mode is passed to joblib.load so NumPy-backed model arrays can be
+        memory-mapped and shared between processes instead of copied.
+        With lazy=True nothing is loaded until ensure_loaded() or the first prediction.
+        With use_compiled=True a compiled_ensemble.npz in model_dir replaces the
+        pickles, so XGBoost, CatBoost, LightGBM and sklearn are not needed.
+        Weights and version default to the manifest.json in model_dir, so a
+        model set and its weights are versioned together.
         """
         self.model_dir = os.path.join(os.path.dirname(__file__), model_dir)
+        self.mmap_mode = mmap_mode
+        self.use_compiled = use_compiled
 
-        # ✅ Define model weights
-        self.weights = {
-            "xgb_fraud_model.pkl": 0.20,
-            "catboost_fraud_model.pkl": 0.25,
-            "lgbm_fraud_model.pkl": 0.15,
-            "isolation_forest_fraud_model.pkl": 0.30,
+        manifest = self.load_manifest()
+        self.weights = dict(weights or manifest.get("weights") or self.DEFAULT_WEIGHTS)
+        self.version = version or manifest.get("version") or "unversioned"
+
+        self.models = {}
+        self.compiled = None
+        self.preprocessor = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+        # ✅ Feature matrices are written into per-thread buffers reused across batches
+        self._buffers = threading.local()
+
+        # ✅ Per-model timing and error metrics
+        self.model_seconds = {name: stage_timer("model", model=name) for name in self.weights}
+        self.model_errors = {
+            name: REGISTRY.counter("fraud_model_errors_total", "Ensemble model calls that raised", model=name)
+            for name in self.weights
         }
 
-        self.models = self.load_models()
+        if not lazy:
+            self.ensure_loaded()
 
-        # ✅ Define preprocessing columns
-        self.CATEGORICAL_COLS = [
-            "ProductCategory", "Currency", "PaymentMethod", "CardType",
-            "CardIssuer", "CardCountry", "BillingState", "IPCountry",
-            "DeviceType", "DeviceOS", "Browser", "MerchantCategory",
-            "MerchantCountry", "UserEmail"
-        ]
+    @property
+    def is_loaded(self):
+        return self._loaded
 
-        self.NUMERICAL_COLS = [
-            "TransactionAmount", "DistanceFromHome", "TransactionsLast1Hr",
-            "TransactionsLast24Hr", "AvgTransactionAmount",
-            "TimeSinceLastTransaction", "UserAccountAgeDays",
-            "AmountDeviationFromAvg"
-        ]
+    @property
+    def model_names(self):
+        return self.compiled.model_names if self.compiled is not None else list(self.models)
 
-        # ✅ Initialize scaler
-        self.scaler = StandardScaler()
+    def ensure_loaded(self):
+        """
+        Load the models and the preprocessing artifact once, on first use.
+        """
+        if self._loaded:
+            return
+
+        with self._load_lock:
+            if not self._loaded:
+                compiled_path = os.path.join(self.model_dir, COMPILED_FILE)
+                if self.use_compiled and os.path.exists(compiled_path):
+                    self.compiled = CompiledEnsemble.load(compiled_path)
+                else:
+                    self.models = self.load_models()
+                # ✅ Load the pre-fitted preprocessing artifact once
+                self.preprocessor = self.load_preprocessor()
+                self._loaded = True
+
+    def load_manifest(self):
+        """
+        Read the version and weights stored next to the models, if any.
+        """
+        path = os.path.join(self.model_dir, self.MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
 
     def load_models(self):
         """
         Load the latest trained models from the models directory.
         """
+        import joblib
+
         models = {}
         for model_name in self.weights.keys():
             model_path = os.path.join(self.model_dir, model_name)
             if os.path.exists(model_path):
-                models[model_name] = joblib.load(model_path)
+                models[model_name] = joblib.load(model_path, mmap_mode=self.mmap_mode)
             else:
                 print(f"⚠️ Warning: Model {model_name} not found. Skipping...")
 
         return models
 
+    def load_preprocessor(self):
+        """
+        Load the fitted preprocessing artifact stored next to the models.
+        """
+        path = os.path.join(self.model_dir, self.PREPROCESSOR_FILE)
+        if os.path.exists(path):
+            return FeaturePreprocessor.load(path)
+
+        print(f"⚠️ Warning: {self.PREPROCESSOR_FILE} not found. Falling back to per-transaction preprocessing...")
+        return None
+
     def preprocess_transaction(self, transaction_data):
         """
         Preprocess a single transaction dynamically.
         """
-        df = pd.DataFrame([transaction_data])
+        return self.preprocess_batch([transaction_data])[0]
 
-        # ✅ Handle missing values
-        df.fillna(df.median(numeric_only=True), inplace=True)
+    def matrix_buffer(self, n_rows, n_columns):
+        """
+        An (n_rows, n_columns) view of this thread's reusable feature buffer.
+        The buffer grows to the largest batch seen and is overwritten by the
+        next batch on the same thread, so the view must not be kept.
+        """
+        buffer = getattr(self._buffers, "matrix", None)
+        if buffer is None or buffer.shape[1] != n_columns:
+            buffer = self._buffers.matrix = np.empty((n_rows, n_columns), dtype=np.float64)
+        elif buffer.shape[0] < n_rows:
+            # ✅ Grow geometrically so a slowly rising batch size reallocates rarely
+            buffer = self._buffers.matrix = np.empty((max(n_rows, 2 * buffer.shape[0]), n_columns), dtype=np.float64)
+        return buffer[:n_rows]
 
-        # ✅ Encode categorical columns dynamically
-        for col in self.CATEGORICAL_COLS:
-            if col in df.columns:
-                df[col] = df[col].astype(str)  # Ensure string type
-                df[col] = LabelEncoder().fit_transform(df[col])  # Fit dynamically
+    def preprocess_batch(self, transactions, reuse_buffer=False):
+        """
+        Preprocess a list of transactions into a single (N, n_features) matrix.
+        With reuse_buffer=True the matrix is a view of matrix_buffer() rather
+        than a new array, valid until the next batch on this thread.
+        """
+        self.ensure_loaded()
 
-        # ✅ Standardize numerical columns
-        df[self.NUMERICAL_COLS] = self.scaler.fit_transform(df[self.NUMERICAL_COLS])
+        start = time.perf_counter()
+        if self.preprocessor is not None:
+            out = self.matrix_buffer(len(transactions), len(self.preprocessor.columns)) if reuse_buffer else None
+            matrix = self.preprocessor.transform(transactions, out=out)
+        else:
+            matrix = self._preprocess_unfitted(transactions)
+        PREPROCESS_SECONDS.observe(time.perf_counter() - start)
+        return matrix
 
-        return df.values[0]  # Convert to numpy array for prediction
+    def _preprocess_unfitted(self, transactions):
+        """
+        Legacy preprocessing used when no fitted artifact is available.
+
+        Columns follow the key order of the first transaction, as the
+        one-row DataFrame did. Fitting encoders and the scaler on a single
+        row collapses every encoded categorical and every non-missing
+        numerical value to 0; that result is written directly so each row
+        matches what per-transaction fitting produced.
+        """
+        columns = list(transactions[0].keys())
+        matrix = np.empty((len(transactions), len(columns)), dtype=np.float64)
+
+        for j, col in enumerate(columns):
+            values = [transaction.get(col) for transaction in transactions]
+
+            if col in self.CATEGORICAL_COLS:
+                # ✅ A LabelEncoder fitted on one value always maps it to 0
+                matrix[:, j] = 0.0
+            elif col in self.NUMERICAL_COLS:
+                # ✅ A scaler fitted on one row maps it to 0, missing stays NaN
+                column = np.array(values, dtype=np.float64)
+                matrix[:, j] = np.where(np.isnan(column), np.nan, 0.0)
+            else:
+                matrix[:, j] = np.array(values, dtype=np.float64)
+
+        return matrix
 
     def predict(self, transaction_data):
         """
         Get fraud probability using a weighted stacked ensemble.
         Also, return anomaly score from Isolation Forest.
         """
-        if not self.models:
+        return self.predict_batch([transaction_data])[0]
+
+    def predict_batch(self, transactions):
+        """
+        Score many transactions at once. Each model is called a single time
+        on the whole preprocessed matrix, or all trees are evaluated in one
+        pass when a compiled ensemble is loaded.
+
+        Returns a list of (fraud_percent, anomaly_percent) tuples, one per
+        transaction, identical to calling predict() on each row.
+        """
+        self.ensure_loaded()
+
+        if not self.models and self.compiled is None:
             raise ValueError("❌ No models found! Please check the models directory.")
 
-        # ✅ Preprocess the input transaction
-        processed_data = self.preprocess_transaction(transaction_data)
+        if not transactions:
+            return []
 
-        weighted_sum = 0
-        total_weight = sum(self.weights.values())
-        anomaly_score = None  # Initialize anomaly score
+        # ✅ Preprocess all transactions into one matrix, in this thread's buffer
+        processed_data = self.preprocess_batch(transactions, reuse_buffer=True)
+        return self.score_matrix(processed_data)
+
+    def predict_frame(self, df):
+        """
+        Score a DataFrame of transactions, reading its columns directly. Used
+        for offline bulk scoring; rows match predict_batch on df's records.
+        """
+        self.ensure_loaded()
+
+        if not self.models and self.compiled is None:
+            raise ValueError("❌ No models found! Please check the models directory.")
+
+        if len(df) == 0:
+            return []
+
+        start = time.perf_counter()
+        if self.preprocessor is not None:
+            out = self.matrix_buffer(len(df), len(self.preprocessor.columns))
+            processed_data = self.preprocessor.transform_frame(df, out=out)
+        else:
+            processed_data = self._preprocess_unfitted(df.to_dict("records"))
+        PREPROCESS_SECONDS.observe(time.perf_counter() - start)
+
+        return self.score_matrix(processed_data)
+
+    def score_matrix(self, processed_data):
+        """
+        Ensemble rows for an already preprocessed (N, n_features) matrix.
+        """
+        if self.compiled is not None:
+            start = time.perf_counter()
+            outputs = self.compiled.model_outputs(processed_data)
+            COMPILED_SECONDS.observe(time.perf_counter() - start)
+        else:
+            outputs = self.library_outputs(processed_data)
+
+        return self.combine_outputs(outputs, len(processed_data))
 
+    def library_outputs(self, processed_data):
+        """
+        Raw output of each loaded model: the positive-class probability for
+        classifiers and decision_function for the isolation forest. Models
+        that raise are left out.
+        """
+        outputs = {}
         for model_name, model in self.models.items():
+            start = time.perf_counter()
             try:
                 if "isolation_forest" in model_name:
-                    anomaly_score = model.decision_function([processed_data])[0]
-                    anomaly_score = (1 - anomaly_score) * 100  # Convert to percentage
+                    outputs[model_name] = model.decision_function(processed_data)
                 elif hasattr(model, "predict_proba"):
-                    proba = model.predict_proba([processed_data])[:, 1][0]
+                    outputs[model_name] = model.predict_proba(processed_data)[:, 1]
                 else:
-                    proba = model.predict([processed_data])[0]
+                    outputs[model_name] = model.predict(processed_data)
+
+            except Exception as e:
+                self.model_errors[model_name].inc()
+                print(f"⚠️ Error in model {model_name}: {str(e)}")
+
+            self.model_seconds[model_name].observe(time.perf_counter() - start)
+
+        return outputs
+
+    def combine_outputs(self, outputs, n_transactions):
+        """
+        Weighted ensemble of the per-model outputs, as (fraud_percent, anomaly_percent) rows.
+        """
+        weighted_sum = np.zeros(n_transactions)
+        total_weight = sum(self.weights.values())
+        anomaly_score = None  # Initialize anomaly score
+
+        for model_name, output in outputs.items():
+            try:
+                if "isolation_forest" in model_name:
+                    anomaly_score = (1 - output) * 100  # Convert to percentage
+                else:
+                    proba = output
 
                 weighted_sum += proba * self.weights[model_name]
 
             except Exception as e:
+                self.model_errors[model_name].inc()
                 print(f"⚠️ Error in model {model_name}: {str(e)}")
 
         if total_weight == 0:
@@ -108,4 +319,10 @@ class FraudEnsembleModel:
 
         final_fraud_probability = weighted_sum / total_weight  # Normalize
 
-        return round(final_fraud_probability * 100, 2), round(anomaly_score, 2) if anomaly_score is not None else "N/A"
+        return [
+            (
+                float(round(final_fraud_probability[i] * 100, 2)),
+                float(round(anomaly_score[i], 2)) if anomaly_score is not None else "N/A",
+            )
+            for i in range(n_transactions)
+        ]
@@ -0,0 +1,173 @@
+import time
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+
+# Sliding windows are kept as fixed rings of time buckets
+HOUR_BUCKET_SECONDS = 300   # 12 x 5 minutes covers the last hour
+HOUR_BUCKETS = 12
+DAY_BUCKET_SECONDS = 3600   # 24 x 1 hour covers the last day
+DAY_BUCKETS = 24
+
+# Reported for a user's first transaction, the length of the longest window
+NO_HISTORY_HOURS = 24.0
+
+VELOCITY_FEATURES = [
+    "TransactionsLast1Hr", "TransactionsLast24Hr", "AvgTransactionAmount",
+    "TimeSinceLastTransaction", "AmountDeviationFromAvg"
+]
+
+
+def _advance(buckets, last_slot, slot):
+    """
+    Zero the buckets that fell out of the window between last_slot and slot.
+    """
+    size = len(buckets)
+    if slot - last_slot >= size:
+        for i in range(size):
+            buckets[i] = 0
+    else:
+        for s in range(last_slot + 1, slot + 1):
+            buckets[s % size] = 0
+
+
+class UserVelocityState:
+    """
+    Compact per-user state: bucketed 1h/24h counters and a running mean.
+    """
+
+    __slots__ = ("hour_buckets", "hour_slot", "day_buckets", "day_slot",
+                 "amount_mean", "count", "last_timestamp")
+
+    def __init__(self, timestamp):
+        self.hour_buckets = array("I", bytes(4 * HOUR_BUCKETS))
+        self.hour_slot = int(timestamp // HOUR_BUCKET_SECONDS)
+        self.day_buckets = array("I", bytes(4 * DAY_BUCKETS))
+        self.day_slot = int(timestamp // DAY_BUCKET_SECONDS)
+        self.amount_mean = 0.0
+        self.count = 0
+        self.last_timestamp = None
+
+    def roll(self, timestamp):
+        hour_slot = int(timestamp // HOUR_BUCKET_SECONDS)
+        if hour_slot > self.hour_slot:
+            _advance(self.hour_buckets, self.hour_slot, hour_slot)
+            self.hour_slot = hour_slot
+
+        day_slot = int(timestamp // DAY_BUCKET_SECONDS)
+        if day_slot > self.day_slot:
+            _advance(self.day_buckets, self.day_slot, day_slot)
+            self.day_slot = day_slot
+
+    def record(self, timestamp, amount):
+        # ✅ Out-of-order events land in the current bucket
+        self.hour_buckets[max(self.hour_slot, int(timestamp // HOUR_BUCKET_SECONDS)) % HOUR_BUCKETS] += 1
+        self.day_buckets[max(self.day_slot, int(timestamp // DAY_BUCKET_SECONDS)) % DAY_BUCKETS] += 1
+        self.count += 1
+        self.amount_mean += (amount - self.amount_mean) / self.count
+        if self.last_timestamp is None or timestamp > self.last_timestamp:
+            self.last_timestamp = timestamp
+
+
+class VelocityFeatureStore:
+    """
+    In-process online feature store keyed by UserID.
+
+    Computes the velocity features from the user's history before the
+    current transaction, then records the transaction. Users idle for longer
+    than ttl_seconds are evicted, and at most max_users are kept.
+    """
+
+    def __init__(self, ttl_seconds=7 * 24 * 3600, max_users=1_000_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _timestamp(value):
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, datetime):
+            return value.timestamp()
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value).timestamp()
+            except ValueError:
+                pass
+        return time.time()
+
+    def _evict(self, now):
+        while self._users:
+            user_id, state = next(iter(self._users.items()))
+            idle = now - (state.last_timestamp or now)
+            if len(self._users) <= self.max_users and idle <= self.ttl_seconds:
+                break
+            del self._users[user_id]
+
+    def observe(self, user_id, amount, timestamp=None):
+        """
+        Return the velocity features for a new transaction and record it.
+        """
+        timestamp = self._timestamp(timestamp)
+        amount = float(amount)
+
+        with self._lock:
+            state = self._users.get(user_id)
+            if state is None:
+                state = UserVelocityState(timestamp)
+                self._users[user_id] = state
+            else:
+                self._users.move_to_end(user_id)
+
+            state.roll(timestamp)
+
+            if state.count:
+                avg_amount = state.amount_mean
+                hours_since_last = max(0.0, timestamp - state.last_timestamp) / 3600
+            else:
+                avg_amount = amount
+                hours_since_last = NO_HISTORY_HOURS
+
+            features = {
+                "TransactionsLast1Hr": sum(state.hour_buckets),
+                "TransactionsLast24Hr": sum(state.day_buckets),
+                "AvgTransactionAmount": round(avg_amount, 2),
+                "TimeSinceLastTransaction": round(hours_since_last, 2),
+                "AmountDeviationFromAvg": round(amount - avg_amount, 2),
+            }
+
+            state.record(timestamp, amount)
+            self._evict(timestamp)
+
+        return features
+
+    def enrich(self, transaction_data):
+        """
+        Fill missing velocity features in place from the user's history.
+        Transactions without a UserID are returned unchanged.
+        """
+        user_id = transaction_data.get("UserID")
+        if user_id is None:
+            return transaction_data
+
+        features = self.observe(
+            user_id,
+            transaction_data["TransactionAmount"],
+            transaction_data.get("TransactionDateTime"),
+        )
+        for name, value in features.items():
+            if transaction_data.get(name) is None:
+                transaction_data[name] = value
+        return transaction_data
+
+    def __len__(self):
+        return len(self._users)
+
+    def stats(self):
+        return {
+            "users": len(self._users),
+            "max_users": self.max_users,
+            "ttl_seconds": self.ttl_seconds,
+        }
@@ -0,0 +1,273 @@
+import time
+import asyncio
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from backend.metrics import REGISTRY, stage_timer
+
+# Marks the end of one source in the merged stream
+_DONE = object()
+
+
+class RateLimiter:
+    """
+    Token bucket allowing rate requests per second on average, in bursts of
+    at most burst requests.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if self._tokens < 1:
+                # Wait for the missing fraction of a token, then spend it
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._updated = time.monotonic()
+                self._tokens = 0.0
+            else:
+                self._tokens -= 1
+
+
+class ProviderSource(ABC):
+    """
+    Cursor-paginated transaction source for one provider.
+
+    Subclasses build the request for a cursor, split a response into
+    records and the next cursor, and map a record onto the transaction
+    fields used for scoring. Requests are rate-limited per source and
+    retried with exponential backoff on transport errors, 429 and 5xx.
+    """
+
+    name = "provider"
+
+    def __init__(self, config: Dict[str, Any], page_size: int = 100, max_retries: int = 3,
+                 backoff: float = 0.5):
+        self.config = config
+        self.page_size = page_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.rate_limiter = RateLimiter(config.get("rate_limit", 5.0), config.get("burst", 1))
+
+        self.fetch_seconds = stage_timer("feed_fetch", source=self.name)
+        self.requests = REGISTRY.counter("fraud_feed_provider_requests_total", "Provider API requests", source=self.name)
+        self.fetched = REGISTRY.counter("fraud_feed_provider_transactions_total", "Transactions fetched from providers", source=self.name)
+
+    @abstractmethod
+    def build_request(self, cursor: Optional[str]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def parse_page(self, payload: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def normalize(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def _request(self, client: httpx.AsyncClient, cursor: Optional[str]) -> Dict[str, Any]:
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            self.requests.inc()
+            delay = self.backoff * (2 ** attempt)
+
+            start = time.perf_counter()
+            try:
+                response = await client.request(**self.build_request(cursor))
+                if response.status_code == 200:
+                    return response.json()
+                if response.status_code != 429 and response.status_code < 500:
+                    response.raise_for_status()
+
+                # Honour the provider's Retry-After when it sends one
+                retry_after = response.headers.get("retry-after")
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                print(f"⚠️ {self.name} feed returned {response.status_code} (attempt {attempt + 1})")
+            except httpx.TransportError as e:
+                print(f"⚠️ {self.name} feed request failed (attempt {attempt + 1}): {e}")
+            finally:
+                self.fetch_seconds.observe(time.perf_counter() - start)
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(delay)
+
+        raise RuntimeError(f"{self.name} feed request failed after {self.max_retries + 1} attempts")
+
+    async def transactions(self, client: httpx.AsyncClient, limit: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield normalized transactions page by page until the cursor runs out
+        or limit transactions have been yielded (None or 0 means no limit).
+        """
+        cursor, count = None, 0
+        while True:
+            records, cursor = self.parse_page(await self._request(client, cursor))
+            for record in records:
+                transaction = self.normalize(record)
+                transaction["api_source"] = self.name
+                self.fetched.inc()
+                yield transaction
+
+                count += 1
+                if limit and count >= limit:
+                    return
+
+            if cursor is None:
+                return
+
+
+class PlaidSource(ProviderSource):
+    """
+    Plaid /transactions/sync, paged with next_cursor while has_more is set.
+    """
+
+    name = "plaid"
+
+    def build_request(self, cursor: Optional[str]) -> Dict[str, Any]:
+        body = {
+            "client_id": self.config.get("client_id", ""),
+            "secret": self.config.get("secret", ""),
+            "access_token": self.config.get("access_token", ""),
+            "count": min(self.page_size, 500),
+        }
+        if cursor is not None:
+            body["cursor"] = cursor
+        return {"method": "POST", "url": f"{self.config['base_url']}/transactions/sync", "json": body}
+
+    def parse_page(self, payload: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        next_cursor = payload.get("next_cursor") if payload.get("has_more") else None
+        return payload.get("added", []), next_cursor
+
+    def normalize(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        category = (record.get("personal_finance_category") or {}).get("primary")
+        if category is None and record.get("category"):
+            category = record["category"][0]
+
+        return {
+            "TransactionID": record.get("transaction_id"),
+            "UserID": record.get("account_id"),
+            "TransactionDateTime": record.get("datetime") or record.get("date"),
+            # Plaid amounts are positive for money leaving the account
+            "TransactionAmount": abs(float(record.get("amount") or 0.0)),
+            "Currency": record.get("iso_currency_code"),
+            "PaymentMethod": record.get("payment_channel"),
+            "MerchantCategory": category,
+            "MerchantID": record.get("merchant_entity_id"),
+            "MerchantCountry": (record.get("location") or {}).get("country"),
+        }
+
+
+class StripeSource(ProviderSource):
+    """
+    Stripe /charges, paged with starting_after=<last id> while has_more is set.
+    """
+
+    name = "stripe"
+
+    def build_request(self, cursor: Optional[str]) -> Dict[str, Any]:
+        params = {"limit": min(self.page_size, 100)}
+        if cursor is not None:
+            params["starting_after"] = cursor
+        return {
+            "method": "GET",
+            "url": f"{self.config['base_url']}/charges",
+            "params": params,
+            "headers": {"Authorization": f"Bearer {self.config.get('api_key', '')}"},
+        }
+
+    def parse_page(self, payload: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        records = payload.get("data", [])
+        next_cursor = records[-1]["id"] if payload.get("has_more") and records else None
+        return records, next_cursor
+
+    def normalize(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        details = record.get("payment_method_details") or {}
+        card = details.get("card") or {}
+        address = (record.get("billing_details") or {}).get("address") or {}
+        created = record.get("created")
+
+        return {
+            "TransactionID": record.get("id"),
+            "UserID": record.get("customer"),
+            "TransactionDateTime": datetime.fromtimestamp(created).isoformat() if created else None,
+            # Stripe amounts are in the currency's smallest unit
+            "TransactionAmount": (record.get("amount") or 0) / 100,
+            "Currency": (record.get("currency") or "").upper() or None,
+            "PaymentMethod": details.get("type"),
+            "CardType": card.get("brand"),
+            "CardIssuer": card.get("issuer"),
+            "CardCountry": card.get("country"),
+            "BillingCity": address.get("city"),
+            "BillingState": address.get("state"),
+            "BillingCountry": address.get("country"),
+        }
+
+
+PROVIDER_SOURCES = {source.name: source for source in (PlaidSource, StripeSource)}
+
+FEED_FETCH_ERRORS = REGISTRY.counter("fraud_feed_fetch_errors_total", "Provider sources that stopped with an error")
+
+
+def build_sources(names: List[str], api_configs: Dict[str, Dict[str, Any]], api_key: Optional[str] = None,
+                  page_size: int = 100) -> List[ProviderSource]:
+    """
+    Provider sources for the given names. api_key, when given, replaces the
+    Stripe API key or the Plaid access token.
+    """
+    sources = []
+    for name in names:
+        if name not in PROVIDER_SOURCES or name not in api_configs:
+            raise ValueError(f"Unknown API source: {name}")
+
+        config = dict(api_configs[name])
+        if api_key:
+            config["access_token" if name == "plaid" else "api_key"] = api_key
+        sources.append(PROVIDER_SOURCES[name](config, page_size=page_size))
+    return sources
+
+
+async def merge_sources(client: httpx.AsyncClient, sources: List[ProviderSource], limit: Optional[int] = None,
+                        queue_size: int = 100) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Pull every source concurrently over the shared client and yield
+    transactions as they arrive. limit applies to each source. A source
+    that fails is logged and dropped; the others keep going.
+    """
+    queue = asyncio.Queue(maxsize=queue_size)
+
+    async def pump(source):
+        try:
+            async for transaction in source.transactions(client, limit):
+                await queue.put(transaction)
+        except Exception as e:
+            FEED_FETCH_ERRORS.inc()
+            print(f"⚠️ {source.name} feed stopped: {e}")
+        await queue.put(_DONE)
+
+    tasks = [asyncio.create_task(pump(source)) for source in sources]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            item = await queue.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
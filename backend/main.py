@@ -1,9 +1,50 @@
-from fastapi import FastAPI, HTTPException
+import os
+import hmac
+import asyncio
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, HTTPException, Header
 from pydantic import BaseModel
+from typing import List, Optional, Union
 from core import get_compliance_risk
-from ensemble import FraudEnsembleModel
-import numpy as np
+import core
+from model_registry import ModelRegistry
+from batcher import MicroBatcher
+from cache import ScoreCache
+from feature_store import VelocityFeatureStore, VELOCITY_FEATURES
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from metrics import REGISTRY
+from admission import AdmissionController, AdmissionRejected, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_BULK
+from transaction_record import TransactionRecord
+
+# Scoring settings
+ENSEMBLE_WORKERS = int(os.getenv("ENSEMBLE_WORKERS", "4"))
+COMPLIANCE_DEADLINE_MS = float(os.getenv("COMPLIANCE_DEADLINE_MS", "1500"))
+COMPLIANCE_FALLBACK_PERCENT = float(os.getenv("COMPLIANCE_FALLBACK_PERCENT", "50"))
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE") or None
+FEATURE_STORE_TTL_S = float(os.getenv("FEATURE_STORE_TTL_S", str(7 * 24 * 3600)))
+FEATURE_STORE_MAX_USERS = int(os.getenv("FEATURE_STORE_MAX_USERS", "1000000"))
+SCORE_CACHE_SIZE = int(os.getenv("SCORE_CACHE_SIZE", "50000"))
+SCORE_CACHE_TTL_S = float(os.getenv("SCORE_CACHE_TTL_S", "600"))
+MODEL_WATCH_INTERVAL_S = float(os.getenv("MODEL_WATCH_INTERVAL_S", "30"))
+# Required by the /admin endpoints; they refuse every request while it is unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Admission control settings
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "64"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))
+ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "2000"))
+ADMISSION_DEGRADE_DEPTH = int(os.getenv("ADMISSION_DEGRADE_DEPTH", "32"))
+ADMISSION_RECOVER_DEPTH = int(os.getenv("ADMISSION_RECOVER_DEPTH", "8"))
+PRIORITY_SMALL_AMOUNT = float(os.getenv("PRIORITY_SMALL_AMOUNT", "50"))
+PRIORITY_HIGH_VALUE_AMOUNT = float(os.getenv("PRIORITY_HIGH_VALUE_AMOUNT", "1000"))
+
+COMPLIANCE_FALLBACKS = REGISTRY.counter("fraud_compliance_fallback_total", "Responses that used the compliance fallback")
+COMPLIANCE_TIMEOUTS = REGISTRY.counter("fraud_compliance_timeouts_total", "Compliance calls that missed the latency budget")
+COMPLIANCE_SHED = REGISTRY.counter("fraud_compliance_shed_total", "Compliance calls skipped because of load")
 
 app = FastAPI()
 
@@ -16,17 +57,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize the ensemble model
-ensemble_model = FraudEnsembleModel()
+# Versioned models; the active version is loaded by the startup warm-up or the
+# first request, so importing this module stays fast. New versions are warmed
+# up on canned transactions with the request's model fields before serving.
+model_registry = ModelRegistry(
+    mmap_mode=MODEL_MMAP_MODE,
+    warm_up_fields=core.numerical_features + core.categorical_features + core.boolean_features,
+)
+
+# Thread pool for the CPU-bound ensemble so it overlaps the compliance call
+ensemble_executor = ThreadPoolExecutor(max_workers=ENSEMBLE_WORKERS)
+
+# Micro-batcher that coalesces concurrent /detect_fraud calls
+ensemble_batcher = MicroBatcher(
+    model_registry.predict_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    executor=ensemble_executor,
+)
+
+# Online per-user velocity features
+feature_store = VelocityFeatureStore(ttl_seconds=FEATURE_STORE_TTL_S, max_users=FEATURE_STORE_MAX_USERS)
+
+# Responses for replayed and retried transactions, dropped when the models are swapped
+score_cache = ScoreCache(max_size=SCORE_CACHE_SIZE, ttl_seconds=SCORE_CACHE_TTL_S)
+model_registry.add_swap_listener(score_cache.invalidate)
+
+# Concurrency limit and bounded priority queue in front of scoring. Health
+# and readiness checks are never queued, so they answer under any load.
+admission = AdmissionController(
+    max_concurrency=ADMISSION_MAX_CONCURRENCY,
+    max_queue=ADMISSION_MAX_QUEUE,
+    queue_timeout_ms=ADMISSION_QUEUE_TIMEOUT_MS,
+    degrade_depth=ADMISSION_DEGRADE_DEPTH,
+    recover_depth=ADMISSION_RECOVER_DEPTH,
+)
+
+# Background warm-up started at startup, checked by /ready
+warm_up_future = None
+model_watcher = None
+
+def warm_up():
+    """
+    Load the models and fit the compliance encoders before the first request.
+    """
+    model_registry.ensure_loaded()
+    core.warm_up()
+
+@app.on_event("startup")
+async def start_scoring():
+    global warm_up_future, model_watcher
+    await ensemble_batcher.start()
+    warm_up_future = asyncio.get_running_loop().run_in_executor(ensemble_executor, warm_up)
+    if MODEL_WATCH_INTERVAL_S > 0:
+        model_watcher = asyncio.create_task(model_registry.watch(MODEL_WATCH_INTERVAL_S, ensemble_executor))
+
+@app.on_event("shutdown")
+async def shutdown_scoring():
+    if model_watcher is not None:
+        model_watcher.cancel()
+    await ensemble_batcher.stop()
+    await core.close()
+    ensemble_executor.shutdown(wait=False)
 
 # Define input data model
+# Velocity features may be omitted when UserID is given; they are then
+# computed by the feature store.
 class TransactionData(BaseModel):
     TransactionAmount: float
-    AvgTransactionAmount: float
-    AmountDeviationFromAvg: float
-    TransactionsLast1Hr: int
-    TransactionsLast24Hr: int
-    TimeSinceLastTransaction: float
+    AvgTransactionAmount: Optional[float] = None
+    AmountDeviationFromAvg: Optional[float] = None
+    TransactionsLast1Hr: Optional[int] = None
+    TransactionsLast24Hr: Optional[int] = None
+    TimeSinceLastTransaction: Optional[float] = None
     DistanceFromHome: float
     UserAccountAgeDays: int
     PaymentMethod: str
@@ -43,6 +146,55 @@ class TransactionData(BaseModel):
     IsNewDevice: bool
     IsEmailGeneric: bool
     IsHoliday: bool
+    UserID: Optional[str] = None
+    TransactionDateTime: Optional[str] = None
+    TransactionID: Optional[Union[int, str]] = None
+
+def score_cache_key(request_dict):
+    """
+    Score cache key for a request: its TransactionID plus a hash of every
+    other field. UserID and TransactionDateTime stay in the hash because
+    they decide the velocity features. None without a TransactionID, so
+    repeated payloads are scored and recorded in the feature store each time.
+    """
+    features = {name: value for name, value in request_dict.items() if name != "TransactionID"}
+    return score_cache.key(request_dict.get("TransactionID"), features)
+
+def check_velocity_inputs(request_dict):
+    """
+    Reject a request whose velocity features are neither given nor computable
+    from a UserID. Runs before the feature store records anything.
+    """
+    if request_dict.get("UserID") is not None:
+        return
+
+    missing = [name for name in VELOCITY_FEATURES if request_dict.get(name) is None]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"UserID is required when {', '.join(missing)} are not provided")
+
+def to_scoring_dict(request_dict):
+    """
+    Model input for a request, with velocity features filled from the feature
+    store, as a compact TransactionRecord without the identity fields.
+    """
+    check_velocity_inputs(request_dict)
+    return TransactionRecord.from_mapping(feature_store.enrich(request_dict))
+
+def admission_priority(transaction):
+    """
+    Small and high-value transactions are admitted ahead of the rest.
+    """
+    amount = transaction.TransactionAmount
+    if amount <= PRIORITY_SMALL_AMOUNT or amount >= PRIORITY_HIGH_VALUE_AMOUNT:
+        return PRIORITY_HIGH
+    return PRIORITY_NORMAL
+
+def overloaded_response(error):
+    return JSONResponse(
+        status_code=error.status_code,
+        content={"detail": str(error), "reason": error.reason},
+        headers={"Retry-After": str(error.retry_after)},
+    )
 
 def classify_risk(score):
     """Classify risk based on the overall score."""
@@ -53,32 +205,194 @@ def classify_risk(score):
     else:
         return "High"
 
+async def get_compliance_within_deadline(transaction_dict, shed=False):
+    """
+    Compliance risk from the Groq API, or None if it misses the latency budget
+    or is shed because admission control is degraded.
+    """
+    if shed:
+        COMPLIANCE_SHED.inc()
+        return None
+
+    try:
+        return await asyncio.wait_for(
+            get_compliance_risk(transaction_dict), timeout=COMPLIANCE_DEADLINE_MS / 1000
+        )
+    except asyncio.TimeoutError:
+        COMPLIANCE_TIMEOUTS.inc()
+        return None
+
+def build_risk_response(fraud_percent, compliance_percent, behavior_anomaly_percent, model_version, shed=False):
+    """Combine the three component scores into the API response."""
+    # ✅ If compliance risk failed, timed out or was shed, use the fallback and flag it
+    degraded = compliance_percent is None
+    degraded_reason = None
+    if degraded:
+        degraded_reason = "load_shedding" if shed else "compliance_unavailable"
+        COMPLIANCE_FALLBACKS.inc()
+        compliance_percent = COMPLIANCE_FALLBACK_PERCENT
+
+    # ✅ Compute overall risk (average of all three)
+    overall_risk = round((fraud_percent + compliance_percent + behavior_anomaly_percent) / 3, 2)
+    risk_class = classify_risk(overall_risk)
+
+    return {
+        "fraud_percent": fraud_percent,
+        "compliance_percent": compliance_percent,
+        "behavior_anomaly_percent": behavior_anomaly_percent,
+        "overall_risk": overall_risk,
+        "risk_class": risk_class,
+        "degraded": degraded,
+        "degraded_reason": degraded_reason,
+        "model_version": model_version
+    }
+
+def cache_response(cache_key, response):
+    # ✅ Degraded responses are not cached so a retry can get the real compliance score
+    if not response["degraded"]:
+        score_cache.set(cache_key, response)
+    return response
+
 @app.post("/detect_fraud")
 async def detect_fraud(transaction: TransactionData):
+    request_dict = transaction.dict()
+    cache_key = score_cache_key(request_dict)
+
+    # ✅ A replayed TransactionID is answered from the cache, before the feature
+    # store sees it, so it is neither re-scored nor counted twice
+    cached = score_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # ✅ Reject fast when overloaded, before the feature store records the transaction
     try:
-        transaction_dict = transaction.dict()
+        async with admission.admit(admission_priority(transaction)) as shed:
+            transaction_dict = to_scoring_dict(request_dict)
+
+            try:
+                # ✅ Score via the micro-batcher while the Groq call is in flight
+                (fraud_percent, behavior_anomaly_percent, model_version), compliance_percent = await asyncio.gather(
+                    ensemble_batcher.submit(transaction_dict),
+                    get_compliance_within_deadline(transaction_dict, shed)
+                )
+
+                response = build_risk_response(
+                    fraud_percent, compliance_percent, behavior_anomaly_percent, model_version, shed
+                )
+                return cache_response(cache_key, response)
+
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+
+@app.post("/detect_fraud/batch")
+async def detect_fraud_batch(transactions: List[TransactionData]):
+    request_dicts = [transaction.dict() for transaction in transactions]
+    cache_keys = [score_cache_key(request_dict) for request_dict in request_dicts]
+
+    # ✅ Only transactions without a cached response are scored
+    results = [score_cache.get(cache_key) for cache_key in cache_keys]
+    misses = [i for i, result in enumerate(results) if result is None]
+    if not misses:
+        return {"results": results}
+
+    # ✅ Validate the whole batch first, so a rejected one leaves the feature store untouched
+    for i in misses:
+        check_velocity_inputs(request_dicts[i])
+
+    # ✅ A batch takes one slot, behind single transactions
+    try:
+        async with admission.admit(PRIORITY_BULK) as shed:
+            transaction_dicts = [to_scoring_dict(request_dicts[i]) for i in misses]
+
+            try:
+                loop = asyncio.get_running_loop()
 
-        # ✅ Get fraud and anomaly predictions from ensemble model
-        fraud_percent, behavior_anomaly_percent = ensemble_model.predict(transaction_dict)
+                # ✅ Score the whole batch with one call per ensemble model, while
+                # compliance risk is fetched for every transaction concurrently
+                predictions, compliance_scores = await asyncio.gather(
+                    loop.run_in_executor(ensemble_executor, model_registry.predict_batch, transaction_dicts),
+                    asyncio.gather(
+                        *(get_compliance_within_deadline(transaction_dict, shed) for transaction_dict in transaction_dicts)
+                    )
+                )
 
-        # ✅ Get compliance risk from Groq API
-        compliance_percent = get_compliance_risk(transaction_dict)
+                for i, (fraud_percent, behavior_anomaly_percent, model_version), compliance_percent in zip(
+                    misses, predictions, compliance_scores
+                ):
+                    response = build_risk_response(
+                        fraud_percent, compliance_percent, behavior_anomaly_percent, model_version, shed
+                    )
+                    results[i] = cache_response(cache_keys[i], response)
 
-        # ✅ If compliance risk failed to retrieve, set default
-        if compliance_percent is None:
-            compliance_percent = np.random.uniform(20, 80)  # Fallback
+                return {"results": results}
 
-        # ✅ Compute overall risk (average of all three)
-        overall_risk = round((fraud_percent + compliance_percent + behavior_anomaly_percent) / 3, 2)
-        risk_class = classify_risk(overall_risk)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+    except AdmissionRejected as e:
+        return overloaded_response(e)
 
-        return {
-            "fraud_percent": fraud_percent,
-            "compliance_percent": compliance_percent,
-            "behavior_anomaly_percent": behavior_anomaly_percent,
-            "overall_risk": overall_risk,
-            "risk_class": risk_class
-        }
+@app.get("/health")
+async def health():
+    # Liveness only: answers as soon as the event loop is running
+    return {"status": "ok"}
 
+@app.get("/ready")
+async def ready():
+    if warm_up_future is not None and warm_up_future.done() and warm_up_future.exception() is not None:
+        return JSONResponse(status_code=503, content={"status": "failed", "detail": str(warm_up_future.exception())})
+
+    model = model_registry.current
+    if model is None or not core.is_warm():
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+
+    return {"status": "ready", "models": model.model_names, "model_version": model.version}
+
+def check_admin_token(token):
+    # ✅ Closed by default: no configured token means no admin access
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if token is None or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/models")
+async def get_models(x_admin_token: Optional[str] = Header(None)):
+    check_admin_token(x_admin_token)
+    return model_registry.status()
+
+@app.post("/admin/models/reload")
+async def reload_models(version: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+    """
+    Load, warm up and swap in a model version (default: the active one)
+    while the current version keeps serving. Naming a version also makes it
+    the active one once it is serving, so other workers watching the
+    directory follow; a version that fails to load leaves ACTIVE unchanged.
+    """
+    check_admin_token(x_admin_token)
+    loop = asyncio.get_running_loop()
+
+    try:
+        await loop.run_in_executor(ensemble_executor, partial(model_registry.activate, version, make_active=True))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=f"Model version was not activated: {e}")
+
+    return model_registry.status()
+
+@app.get("/stats/batcher")
+async def get_batcher_stats():
+    return ensemble_batcher.stats()
+
+@app.get("/stats/score_cache")
+async def get_score_cache_stats():
+    return score_cache.stats()
+
+@app.get("/stats/admission")
+async def get_admission_stats():
+    return admission.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,173 @@
+import bisect
+import threading
+
+# Latency buckets in seconds, from 100us to 10s
+LATENCY_BUCKETS = [
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+]
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Observations are counted into the first bucket
+    whose upper bound is >= the value, with a final +Inf bucket.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        """
+        Return per-bucket (non-cumulative) counts, sum and count.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        labels = [str(bound) for bound in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, counts)),
+            "sum": total,
+            "count": count,
+        }
+
+    def cumulative(self):
+        """
+        Return (upper bound, cumulative count) pairs, sum and count.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        running, pairs = 0, []
+        for bound, bucket_count in zip(self.buckets + [float("inf")], counts):
+            running += bucket_count
+            pairs.append((bound, running))
+        return pairs, total, count
+
+
+class Counter:
+    """
+    Monotonically increasing counter.
+    """
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+
+class Gauge:
+    """
+    Value that can go up and down.
+    """
+
+    def __init__(self):
+        self._value = 0
+
+    def set(self, value):
+        self._value = value
+
+    @property
+    def value(self):
+        return self._value
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+class MetricsRegistry:
+    """
+    Named counters and histograms with labels, rendered in the Prometheus
+    text exposition format.
+    """
+
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name, help_text, labels, factory):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.setdefault(name, (kind, help_text, {}))
+            if family[0] != kind:
+                raise ValueError(f"Metric {name} is already registered as a {family[0]}")
+            metrics = family[2]
+            if key not in metrics:
+                metrics[key] = factory()
+            return metrics[key]
+
+    def counter(self, name, help_text, **labels):
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def gauge(self, name, help_text, **labels):
+        return self._get("gauge", name, help_text, labels, Gauge)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, **labels):
+        return self._get("histogram", name, help_text, labels, lambda: Histogram(buckets))
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text format.
+        """
+        with self._lock:
+            families = [(name, kind, help_text, list(metrics.items()))
+                        for name, (kind, help_text, metrics) in sorted(self._families.items())]
+
+        lines = []
+        for name, kind, help_text, metrics in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in metrics:
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(labels)} {metric.value}")
+                    continue
+
+                pairs, total, count = metric.cumulative()
+                for bound, cumulative_count in pairs:
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_bound(bound)))} {cumulative_count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry served on /metrics
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = "fraud_stage_duration_seconds"
+STAGE_HELP = "Time spent in each scoring stage"
+
+
+def stage_timer(stage, **labels):
+    """
+    Histogram for the duration of one scoring stage.
+    """
+    return REGISTRY.histogram(STAGE_SECONDS, STAGE_HELP, stage=stage, **labels)
@@ -0,0 +1,349 @@
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import threading
+import numpy as np
+from datetime import datetime
+from ensemble import FraudEnsembleModel
+from metrics import REGISTRY
+from transaction_generator import generate_mock_transactions, columns_to_records
+
+# Layout under the models root
+VERSIONS_DIR = "versions"
+ACTIVE_FILE = "ACTIVE"
+
+# Canned transactions scored by a new version before it is swapped in
+WARM_UP_SIZE = 32
+
+MODEL_SWAPS = REGISTRY.counter("fraud_model_swaps_total", "Model versions swapped into service")
+MODEL_LOAD_FAILURES = REGISTRY.counter(
+    "fraud_model_load_failures_total", "Model versions that failed to load or warm up"
+)
+
+
+def canned_transactions(fields, n=WARM_UP_SIZE, seed=0):
+    """
+    Reproducible transactions with just the given request fields.
+    """
+    columns = generate_mock_transactions(n, seed=seed, fraud_rate=0.1)
+    return columns_to_records({field: columns[field] for field in fields})
+
+
+class ModelRegistry:
+    """
+    Versioned model sets, served one at a time and swapped without downtime.
+
+    Each version lives in <root>/versions/<version>/ with its pickles (or
+    compiled_ensemble.npz), preprocessor.json and a manifest.json holding
+    its weights. <root>/ACTIVE names the version to serve; without it the
+    newest version is used, and without any versions the files in <root>
+    itself are served as before.
+
+    A new version is loaded and warmed up while the current one keeps
+    serving, then swapped in with a single assignment. Batches already
+    running hold a reference to the old model and finish on it.
+    """
+
+    def __init__(self, root="models", mmap_mode=None, warm_up_fields=None, warm_up_size=WARM_UP_SIZE):
+        self.root = os.path.join(os.path.dirname(__file__), root)
+        self.mmap_mode = mmap_mode
+        self.warm_up_transactions = canned_transactions(warm_up_fields, warm_up_size) if warm_up_fields else []
+
+        self.current = None
+        self.fingerprint = None
+        self.failed_fingerprint = None
+        self.loaded_at = None
+        self.last_error = None
+
+        self._load_lock = threading.Lock()
+        self._swap_listeners = []
+
+    def versions(self):
+        """
+        Published version names, oldest first.
+        """
+        versions_dir = os.path.join(self.root, VERSIONS_DIR)
+        if not os.path.isdir(versions_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(versions_dir)
+            if os.path.isdir(os.path.join(versions_dir, name)) and not name.startswith(".")
+        )
+
+    def active_version(self):
+        """
+        Version named by the ACTIVE file, else the newest one, else None for
+        the unversioned models in the root directory.
+        """
+        path = os.path.join(self.root, ACTIVE_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                version = f.read().strip()
+            if version:
+                return version
+
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def set_active(self, version):
+        """
+        Point the ACTIVE file at version, so every worker watching the
+        directory switches to it.
+        """
+        self.version_dir(version)
+        _write_atomic(os.path.join(self.root, ACTIVE_FILE), version + "\n")
+
+    def version_dir(self, version):
+        if version is None:
+            return self.root
+
+        path = os.path.join(self.root, VERSIONS_DIR, version)
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"Unknown model version: {version}")
+        return path
+
+    def _fingerprint(self, version):
+        """
+        Name, size and mtime of every file of a version, to notice changes.
+        """
+        path = self.version_dir(version)
+        files = []
+        for entry in sorted(os.scandir(path), key=lambda entry: entry.name):
+            if entry.is_file() and entry.name != ACTIVE_FILE and not entry.name.startswith("."):
+                stat = entry.stat()
+                files.append((entry.name, stat.st_size, stat.st_mtime_ns))
+        return version, tuple(files)
+
+    def add_swap_listener(self, listener):
+        self._swap_listeners.append(listener)
+
+    def ensure_loaded(self, warm_up=True):
+        """
+        Return the serving model, loading the active version on first use.
+        With warm_up=False the version is loaded without scoring anything,
+        e.g. in a parent process that forks workers; call warm_up() later.
+        """
+        if self.current is None:
+            with self._load_lock:
+                if self.current is None:
+                    self._activate(self.active_version(), warm_up=warm_up)
+        return self.current
+
+    def warm_up(self):
+        """
+        Score the canned transactions on the serving model.
+        """
+        self._warm_up(self.ensure_loaded())
+
+    def activate(self, version=None, make_active=False):
+        """
+        Load and warm up version (default: the active one), then swap it in.
+        If anything fails the current model keeps serving. With make_active
+        the ACTIVE file is pointed at version only once it is serving, so a
+        broken version is never handed to the other workers.
+        """
+        with self._load_lock:
+            model = self._activate(version if version is not None else self.active_version())
+            if make_active and version is not None:
+                self.set_active(version)
+            return model
+
+    def reload_if_changed(self):
+        """
+        Activate the active version if it differs from the serving one, or if
+        its files changed. A fingerprint that failed to load is not retried.
+        """
+        # ✅ Checked under the load lock, so an activation in progress is not undone
+        with self._load_lock:
+            version = self.active_version()
+            try:
+                fingerprint = self._fingerprint(version)
+            except FileNotFoundError as e:
+                self.last_error = str(e)
+                return None
+
+            if fingerprint in (self.fingerprint, self.failed_fingerprint):
+                return None
+
+            try:
+                return self._activate(version)
+            except Exception as e:
+                self.failed_fingerprint = fingerprint
+                print(f"⚠️ Model version {version or 'unversioned'} was not activated: {e}")
+                return None
+
+    def _activate(self, version, warm_up=True):
+        fingerprint = self._fingerprint(version)
+        try:
+            model = FraudEnsembleModel(
+                model_dir=self.version_dir(version), mmap_mode=self.mmap_mode, version=version
+            )
+            if warm_up:
+                self._warm_up(model)
+        except Exception as e:
+            MODEL_LOAD_FAILURES.inc()
+            self.last_error = str(e)
+            raise
+
+        self.fingerprint = fingerprint
+        self.last_error = None
+        self.swap(model)
+        return model
+
+    def _warm_up(self, model):
+        """
+        Score the canned transactions once, so the first real batch is not
+        slow and a broken version is rejected before it serves anything.
+        """
+        if not self.warm_up_transactions:
+            return
+
+        results = model.predict_batch(self.warm_up_transactions)
+        fraud_percents = np.array([fraud_percent for fraud_percent, _ in results], dtype=np.float64)
+        if not np.all(np.isfinite(fraud_percents)):
+            raise ValueError(f"❌ Model version {model.version} produced non-finite scores during warm-up")
+
+    def swap(self, model):
+        """
+        Serve model from now on and notify the swap listeners.
+        """
+        previous, self.current = self.current, model
+        self.loaded_at = datetime.now().isoformat()
+        MODEL_SWAPS.inc()
+
+        if previous is not None:
+            REGISTRY.gauge("fraud_model_active", "1 for the model version being served", version=previous.version).set(0)
+            for listener in self._swap_listeners:
+                listener()
+        REGISTRY.gauge("fraud_model_active", "1 for the model version being served", version=model.version).set(1)
+
+        print(f"✅ Serving model version {model.version}")
+
+    def predict_batch(self, transactions):
+        """
+        Score transactions with the serving model. Rows are
+        (fraud_percent, anomaly_percent, model_version).
+        """
+        model = self.ensure_loaded()
+        return [
+            (fraud_percent, anomaly_percent, model.version)
+            for fraud_percent, anomaly_percent in model.predict_batch(transactions)
+        ]
+
+    async def watch(self, interval_seconds, executor=None):
+        """
+        Poll the models directory and swap in new or changed versions.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval_seconds)
+            if self.current is None:
+                continue
+            await loop.run_in_executor(executor, self.reload_if_changed)
+
+    def status(self):
+        model = self.current
+        return {
+            "serving_version": model.version if model is not None else None,
+            "models": model.model_names if model is not None else [],
+            "weights": model.weights if model is not None else {},
+            "active_version": self.active_version(),
+            "versions": self.versions(),
+            "loaded_at": self.loaded_at,
+            "last_error": self.last_error,
+        }
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def publish(registry, source_dir, version, weights=None):
+    """
+    Copy a directory of trained models into a new version with its manifest.
+    The version appears atomically, so a watcher never sees it half copied.
+    """
+    versions_dir = os.path.join(registry.root, VERSIONS_DIR)
+    target = os.path.join(versions_dir, version)
+    if os.path.exists(target):
+        raise FileExistsError(f"Model version {version} already exists")
+
+    # ✅ Weights default to the source's own manifest, then the built-in ones
+    source = FraudEnsembleModel(model_dir=os.path.abspath(source_dir), lazy=True)
+    manifest = {
+        "version": version,
+        "weights": weights or source.weights,
+        "created_at": datetime.now().isoformat(),
+    }
+
+    os.makedirs(versions_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=versions_dir, prefix=".staging_")
+    for name in os.listdir(source_dir):
+        path = os.path.join(source_dir, name)
+        if os.path.isfile(path) and name not in (ACTIVE_FILE, FraudEnsembleModel.MANIFEST_FILE):
+            shutil.copy2(path, staging)
+
+    with open(os.path.join(staging, FraudEnsembleModel.MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.chmod(staging, 0o755)
+    os.rename(staging, target)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage versioned fraud model sets.")
+    parser.add_argument("--root", default="models")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="Show published versions and the active one")
+
+    publish_parser = commands.add_parser("publish", help="Publish a directory of trained models as a version")
+    publish_parser.add_argument("source_dir")
+    publish_parser.add_argument("--version", default=time.strftime("%Y%m%d-%H%M%S"))
+    publish_parser.add_argument("--weights", help='JSON object, e.g. {"xgb_fraud_model.pkl": 0.2, ...}')
+    publish_parser.add_argument("--activate", action="store_true")
+
+    activate_parser = commands.add_parser("activate", help="Make a published version the active one")
+    activate_parser.add_argument("version")
+
+    args = parser.parse_args()
+    registry = ModelRegistry(root=args.root)
+
+    if args.command == "list":
+        active = registry.active_version()
+        for version in registry.versions():
+            print(f"{'*' if version == active else ' '} {version}")
+        if active is None:
+            print("No versions published; serving the models in the root directory")
+        return 0
+
+    if args.command == "publish":
+        weights = json.loads(args.weights) if args.weights else None
+        manifest = publish(registry, args.source_dir, args.version, weights)
+        print(f"✅ Published model version {manifest['version']}")
+        if args.activate:
+            registry.set_active(manifest["version"])
+            print(f"✅ Model version {manifest['version']} is now active")
+        return 0
+
+    try:
+        registry.set_active(args.version)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ Model version {args.version} is now active")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
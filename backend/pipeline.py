@@ -0,0 +1,294 @@
+import os
+import time
+import json
+import uuid
+import asyncio
+import threading
+import itertools
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from backend.metrics import REGISTRY, stage_timer
+
+FEED_SCORE_SECONDS = stage_timer("feed_score")
+FEED_RESULTS = REGISTRY.counter("fraud_feed_results_total", "Results written by feed pipelines")
+FEED_ERRORS = REGISTRY.counter("fraud_feed_errors_total", "Feed transactions that failed to score")
+
+# Marks the end of a stream between pipeline stages
+_END = object()
+
+
+class ResultRingBuffer:
+    """
+    Fixed-capacity store for scored results. Each result is tagged with a
+    monotonically increasing sequence number; once full, the oldest results
+    are dropped.
+
+    Subscribers get an asyncio.Event that is set on every append, so append
+    should be called from the event loop thread.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self._items = deque(maxlen=capacity)
+        self._next_sequence = 1
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def append(self, result: Dict[str, Any]) -> int:
+        with self._lock:
+            sequence = self._next_sequence
+            self._next_sequence += 1
+            result["sequence"] = sequence
+            self._items.append(result)
+
+        for event in self._subscribers:
+            event.set()
+        return sequence
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._items)
+
+    def page(self, offset: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Retained results from offset (0 is the oldest retained), at most limit.
+        """
+        with self._lock:
+            return list(itertools.islice(self._items, offset, offset + limit))
+
+    def latest(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        The newest limit retained results, oldest first.
+        """
+        with self._lock:
+            start = max(0, len(self._items) - limit)
+            return list(itertools.islice(self._items, start, None))
+
+    def since(self, sequence: int, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Results with a sequence number greater than sequence, at most limit.
+        Results already dropped from the buffer are skipped.
+        """
+        with self._lock:
+            first_sequence = self._next_sequence - len(self._items)
+            start = max(0, sequence + 1 - first_sequence)
+            return list(itertools.islice(self._items, start, start + limit))
+
+    def subscribe(self) -> asyncio.Event:
+        event = asyncio.Event()
+        self._subscribers.add(event)
+        return event
+
+    def unsubscribe(self, event: asyncio.Event) -> None:
+        self._subscribers.discard(event)
+
+    @property
+    def latest_sequence(self) -> int:
+        return self._next_sequence - 1
+
+    @property
+    def total_appended(self) -> int:
+        return self._next_sequence - 1
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class JsonlResultLog:
+    """
+    Append-only JSON Lines log of scored results on disk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def append(self, result: Dict[str, Any]) -> None:
+        line = json.dumps(result, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class FeedPipeline:
+    """
+    Source -> scoring -> sink pipeline joined by bounded queues.
+
+    The source is an async iterator of transactions. A full queue blocks the
+    stage before it, so a slow scorer or sink throttles the source instead of
+    letting work pile up in memory. score runs in the default executor; when
+    it is None, source items are passed to the sinks unchanged.
+    """
+
+    def __init__(self, api_source: str, source: AsyncIterator[Dict[str, Any]],
+                 score: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]],
+                 sinks: List[Callable[[Dict[str, Any]], Any]], queue_size: int = 100):
+        self.feed_id = uuid.uuid4().hex
+        self.api_source = api_source
+        self.source = source
+        self.score = score
+        self.sinks = sinks
+
+        self._scoring_queue = asyncio.Queue(maxsize=queue_size)
+        self._sink_queue = asyncio.Queue(maxsize=queue_size)
+
+        self.state = "pending"
+        self.received = 0
+        self.processed = 0
+        self.errors = 0
+        self.started_at = None
+        self.finished_at = None
+
+    async def _produce(self):
+        try:
+            async for transaction in self.source:
+                await self._scoring_queue.put(transaction)
+                self.received += 1
+        finally:
+            # ✅ Close the source even when cancelled mid-stream, so tasks it
+            # started (e.g. merge_sources pumps) are stopped too
+            aclose = getattr(self.source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        await self._scoring_queue.put(_END)
+
+    async def _score(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            transaction = await self._scoring_queue.get()
+            if transaction is _END:
+                await self._sink_queue.put(_END)
+                return
+
+            if self.score is None:
+                await self._sink_queue.put(transaction)
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = await loop.run_in_executor(None, self.score, transaction)
+            except Exception as e:
+                self.errors += 1
+                FEED_ERRORS.inc()
+                print(f"⚠️ Error scoring transaction in feed {self.feed_id}: {e}")
+                continue
+            finally:
+                FEED_SCORE_SECONDS.observe(time.perf_counter() - start)
+            await self._sink_queue.put(result)
+
+    async def _sink(self):
+        while True:
+            result = await self._sink_queue.get()
+            if result is _END:
+                return
+
+            # Multi-source feeds tag each result with the provider it came from
+            result.setdefault("api_source", self.api_source)
+            result["feed_id"] = self.feed_id
+            for sink in self.sinks:
+                sink(result)
+            self.processed += 1
+            FEED_RESULTS.inc()
+
+    async def run(self):
+        """
+        Run all stages until the source is exhausted or the feed is cancelled.
+        """
+        self.state = "running"
+        self.started_at = datetime.now().isoformat()
+        stages = [
+            asyncio.create_task(self._produce()),
+            asyncio.create_task(self._score()),
+            asyncio.create_task(self._sink()),
+        ]
+
+        try:
+            await asyncio.gather(*stages)
+            self.state = "completed"
+            print(f"Automated feed from {self.api_source} completed successfully")
+        except asyncio.CancelledError:
+            self.state = "cancelled"
+            raise
+        except Exception as e:
+            self.state = "failed"
+            print(f"Error in automated feed {self.feed_id}: {e}")
+        finally:
+            for stage in stages:
+                stage.cancel()
+            # ✅ Wait for the stages to unwind, so nothing outlives the feed
+            await asyncio.gather(*stages, return_exceptions=True)
+            self.finished_at = datetime.now().isoformat()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "feed_id": self.feed_id,
+            "api_source": self.api_source,
+            "status": self.state,
+            "received": self.received,
+            "processed": self.processed,
+            "errors": self.errors,
+            "queued": self._scoring_queue.qsize() + self._sink_queue.qsize(),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class FeedManager:
+    """
+    Tracks running feed pipelines by ID so they can be inspected and cancelled.
+    """
+
+    def __init__(self, max_finished: int = 100):
+        self.max_finished = max_finished
+        self._feeds: Dict[str, FeedPipeline] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _prune(self):
+        finished = [feed_id for feed_id, task in self._tasks.items() if task.done()]
+        for feed_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._tasks[feed_id]
+            del self._feeds[feed_id]
+
+    def start(self, pipeline: FeedPipeline) -> str:
+        self._prune()
+        self._feeds[pipeline.feed_id] = pipeline
+        self._tasks[pipeline.feed_id] = asyncio.create_task(pipeline.run())
+        return pipeline.feed_id
+
+    async def stop(self, feed_id: str) -> bool:
+        task = self._tasks.get(feed_id)
+        if task is None:
+            return False
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        return True
+
+    async def stop_all(self) -> List[str]:
+        running = [feed_id for feed_id, task in self._tasks.items() if not task.done()]
+        for feed_id in running:
+            await self.stop(feed_id)
+        return running
+
+    def get(self, feed_id: str) -> Optional[FeedPipeline]:
+        return self._feeds.get(feed_id)
+
+    @property
+    def running_count(self) -> int:
+        return sum(1 for task in self._tasks.values() if not task.done())
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [pipeline.status() for pipeline in self._feeds.values()]
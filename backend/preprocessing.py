@@ -0,0 +1,186 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+
+# Code used for categories that were not seen while fitting
+UNKNOWN_CATEGORY = -1
+
+
+class FeaturePreprocessor:
+    """
+    Pre-fitted preprocessing for the ensemble: category-to-code lookup tables,
+    fill values for missing numbers and standard-scaler means and scales.
+
+    Fitted once offline and stored as JSON next to the model pickles, then
+    applied as a pure NumPy transform at inference time.
+    """
+
+    def __init__(self, columns, categories, means, scales, fill_values):
+        self.columns = list(columns)
+        self.categories = {col: dict(codes) for col, codes in categories.items()}
+        self.means = dict(means)
+        self.scales = dict(scales)
+        self.fill_values = dict(fill_values)
+
+        # ✅ Per-column vectors so the transform is one broadcast per batch
+        self._offset = np.array([self.means.get(col, 0.0) for col in self.columns], dtype=np.float64)
+        self._scale = np.array([self.scales.get(col, 1.0) for col in self.columns], dtype=np.float64)
+        self._fill = np.array([self.fill_values.get(col, 0.0) for col in self.columns], dtype=np.float64)
+
+    @classmethod
+    def fit(cls, df, categorical_cols, numerical_cols, columns=None):
+        """
+        Fit lookup tables and scaler statistics on a training DataFrame.
+        Without columns, every categorical column and every other numeric or
+        boolean column is used; identifiers, timestamps and other text are skipped.
+        """
+        import pandas as pd
+
+        if columns is None:
+            columns = [col for col in df.columns if col in categorical_cols or pd.api.types.is_numeric_dtype(df[col])]
+        columns = list(columns)
+
+        missing = [col for col in columns if col not in df.columns]
+        if missing:
+            raise ValueError(f"Columns not in the training data: {', '.join(missing)}")
+
+        categories = {}
+        for col in categorical_cols:
+            if col in columns:
+                # ✅ Same codes a LabelEncoder would assign (sorted classes). str() per value,
+                # like transform, so missing values get a code of their own on any pandas version
+                classes = sorted(df[col].map(str).unique())
+                categories[col] = {value: code for code, value in enumerate(classes)}
+
+        means, scales, fill_values = {}, {}, {}
+        for col in columns:
+            if col in categories:
+                continue
+            try:
+                values = df[col].astype(np.float64).to_numpy()
+            except ValueError:
+                raise ValueError(f"Column {col} is not numeric; list it as categorical or leave it out") from None
+            fill_values[col] = float(np.nanmedian(values)) if not np.isnan(values).all() else 0.0
+            if col in numerical_cols:
+                std = float(np.nanstd(values))
+                means[col] = float(np.nanmean(values))
+                scales[col] = std if std > 0 else 1.0
+
+        return cls(columns, categories, means, scales, fill_values)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a fitted preprocessor from a JSON artifact.
+        """
+        with open(path, "r") as f:
+            state = json.load(f)
+        return cls(
+            state["columns"], state["categories"], state["means"],
+            state["scales"], state["fill_values"]
+        )
+
+    def save(self, path):
+        """
+        Write the fitted preprocessor to a JSON artifact.
+        """
+        state = {
+            "columns": self.columns,
+            "categories": self.categories,
+            "means": self.means,
+            "scales": self.scales,
+            "fill_values": self.fill_values,
+        }
+        with open(path, "w") as f:
+            json.dump(state, f, indent=2)
+
+    def transform(self, transactions, out=None):
+        """
+        Turn a list of transaction dicts or TransactionRecords into a scaled
+        (N, n_features) matrix, written into out when one is given.
+        """
+        matrix = out if out is not None else np.empty((len(transactions), len(self.columns)), dtype=np.float64)
+
+        for j, col in enumerate(self.columns):
+            lookup = self.categories.get(col)
+            if lookup is not None:
+                matrix[:, j] = [lookup.get(str(t.get(col)), UNKNOWN_CATEGORY) for t in transactions]
+            else:
+                matrix[:, j] = [np.nan if t.get(col) is None else t[col] for t in transactions]
+
+        # ✅ Fill missing values, then standardize in one pass
+        missing = np.isnan(matrix)
+        if missing.any():
+            matrix[missing] = np.broadcast_to(self._fill, matrix.shape)[missing]
+
+        matrix -= self._offset
+        matrix /= self._scale
+        return matrix
+
+    def transform_frame(self, df, out=None):
+        """
+        Same as transform, but reads the columns of a DataFrame directly
+        instead of going through one dict per row.
+        """
+        import pandas as pd
+
+        matrix = out if out is not None else np.empty((len(df), len(self.columns)), dtype=np.float64)
+
+        for j, col in enumerate(self.columns):
+            if col not in df.columns:
+                matrix[:, j] = np.nan
+                continue
+
+            lookup = self.categories.get(col)
+            if lookup is not None:
+                matrix[:, j] = df[col].map(str).map(lookup).fillna(UNKNOWN_CATEGORY).to_numpy(dtype=np.float64)
+            else:
+                matrix[:, j] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+
+        missing = np.isnan(matrix)
+        if missing.any():
+            matrix[missing] = np.broadcast_to(self._fill, matrix.shape)[missing]
+
+        matrix -= self._offset
+        matrix /= self._scale
+        return matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the ensemble preprocessing artifact from training data.")
+    parser.add_argument("data", help="Training data CSV with the model feature columns")
+    parser.add_argument("--target", default="IsFraud", help="Label column to exclude from features")
+    parser.add_argument("--columns", help="Comma-separated feature columns, in model order "
+                                          "(default: categorical, numeric and boolean columns of the CSV)")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "models", "preprocessor.json"))
+    args = parser.parse_args()
+
+    import pandas as pd
+    from ensemble import FraudEnsembleModel
+
+    df = pd.read_csv(args.data)
+    if args.target in df.columns:
+        df = df.drop(columns=[args.target])
+
+    columns = [col.strip() for col in args.columns.split(",")] if args.columns else None
+    try:
+        preprocessor = FeaturePreprocessor.fit(
+            df, FraudEnsembleModel.CATEGORICAL_COLS, FraudEnsembleModel.NUMERICAL_COLS, columns=columns
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    skipped = [col for col in df.columns if col not in preprocessor.columns]
+    if skipped:
+        print(f"⚠️ Not used as features: {', '.join(skipped)}")
+
+    preprocessor.save(args.output)
+    print(f"✅ Preprocessor saved to {args.output} with {len(preprocessor.columns)} feature columns")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+import os
+import json
+import time
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.metrics import REGISTRY, stage_timer
+
+STORE_WRITE_SECONDS = stage_timer("result_store_write")
+STORE_QUERY_SECONDS = stage_timer("result_store_query")
+STORE_WRITTEN = REGISTRY.counter("fraud_result_store_written_total", "Results written to the durable store")
+STORE_DROPPED = REGISTRY.counter("fraud_result_store_dropped_total", "Results dropped because the write queue was full")
+
+# Risk bands, the same as classify_risk in main.py
+RISK_CLASSES = ["Low", "Medium", "High"]
+
+# Marks the end of the write queue
+_STOP = object()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    user_id TEXT,
+    transaction_id TEXT,
+    api_source TEXT,
+    feed_id TEXT,
+    risk_class TEXT,
+    overall_risk REAL,
+    fraud_probability REAL,
+    compliance_risk REAL,
+    behavior_anomaly REAL,
+    transaction_amount REAL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_timestamp ON results (timestamp);
+CREATE INDEX IF NOT EXISTS idx_results_user ON results (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_results_user_risk ON results (user_id, risk_class, timestamp);
+CREATE INDEX IF NOT EXISTS idx_results_source ON results (api_source, timestamp);
+CREATE INDEX IF NOT EXISTS idx_results_risk ON results (risk_class, timestamp);
+"""
+
+INSERT = """
+INSERT INTO results (
+    timestamp, user_id, transaction_id, api_source, feed_id, risk_class, overall_risk,
+    fraud_probability, compliance_risk, behavior_anomaly, transaction_amount, payload
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def classify_risk(score: Optional[float]) -> Optional[str]:
+    if score is None:
+        return None
+    if score < 33:
+        return "Low"
+    elif score < 66:
+        return "Medium"
+    else:
+        return "High"
+
+
+def _epoch(timestamp: Any) -> float:
+    """
+    Epoch seconds for an ISO 8601 string or a number; now if missing or invalid.
+    """
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, str):
+        try:
+            return datetime.fromisoformat(timestamp).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _row(result: Dict[str, Any]) -> Tuple:
+    overall_risk = _float(result.get("overall_risk"))
+    transaction_id = result.get("transaction_id")
+    return (
+        _epoch(result.get("timestamp")),
+        result.get("user_id"),
+        str(transaction_id) if transaction_id is not None else None,
+        result.get("api_source"),
+        result.get("feed_id"),
+        result.get("risk_class") or classify_risk(overall_risk),
+        overall_risk,
+        _float(result.get("fraud_probability")),
+        _float(result.get("compliance_risk")),
+        _float(result.get("behavior_anomaly")),
+        _float(result.get("transaction_amount")),
+        json.dumps(result, default=str),
+    )
+
+
+class SQLiteResultStore:
+    """
+    Durable result store in SQLite (WAL mode), indexed by timestamp, user,
+    API source and risk class.
+
+    append() only puts the result on a queue. A background thread writes
+    the queue in batches of up to batch_size rows per transaction, at least
+    every flush_interval seconds, so requests never wait on the disk. When
+    the queue is full, results are dropped and counted rather than blocking.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 0.5,
+                 max_queue: int = 100000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.close()
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._writer = threading.Thread(target=self._write_loop, name="result-store-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def append(self, result: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(result)
+        except queue.Full:
+            STORE_DROPPED.inc()
+
+    def _write_loop(self) -> None:
+        connection = self._connect()
+        stopping = False
+
+        while not stopping:
+            result = self._queue.get()
+            if result is _STOP:
+                break
+            batch = [result]
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    result = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                # ✅ Write the partial batch now rather than waiting out the interval
+                if result is _STOP:
+                    stopping = True
+                    break
+                batch.append(result)
+
+            start = time.perf_counter()
+            try:
+                rows = [_row(result) for result in batch]
+                with connection:
+                    connection.executemany(INSERT, rows)
+                STORE_WRITTEN.inc(len(rows))
+            except Exception as e:
+                print(f"⚠️ Error writing {len(batch)} results to {self.path}: {e}")
+            finally:
+                STORE_WRITE_SECONDS.observe(time.perf_counter() - start)
+
+        connection.close()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Write everything still queued, then stop the writer thread. Gives up
+        after timeout seconds if the writer cannot keep up or is stuck.
+        """
+        deadline = time.monotonic() + timeout
+        try:
+            # ✅ The queue is bounded; a stuck writer must not hang shutdown
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            print(f"⚠️ Result store {self.path} is still busy; {self.queued} queued results were not written")
+            return
+        self._writer.join(max(0.0, deadline - time.monotonic()))
+
+    def query(self, user_id: Optional[str] = None, api_source: Optional[str] = None,
+              risk_class: Optional[str] = None, start: Optional[float] = None, end: Optional[float] = None,
+              limit: int = 100, before: Optional[Tuple[float, int]] = None) -> Dict[str, Any]:
+        """
+        Results matching every given filter, newest first. start and end are
+        epoch seconds. Pages are keyset-paginated: pass the returned
+        next_before as before to get the next, older page.
+        """
+        clauses, params = [], []
+        for column, value in (("user_id", user_id), ("api_source", api_source), ("risk_class", risk_class)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        if before is not None:
+            clauses.append("(timestamp, id) < (?, ?)")
+            params.extend(before)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT id, timestamp, payload FROM results {where} ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        started = time.perf_counter()
+        connection = self._connect()
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+            STORE_QUERY_SECONDS.observe(time.perf_counter() - started)
+
+        next_before = (rows[-1][1], rows[-1][0]) if len(rows) == limit else None
+        return {"results": [json.loads(payload) for _, _, payload in rows], "next_before": next_before}
+
+    def summary(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Result counts and mean overall risk per API source and risk class.
+        """
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                f"SELECT api_source, risk_class, COUNT(*), AVG(overall_risk) FROM results {where} "
+                "GROUP BY api_source, risk_class ORDER BY api_source, risk_class",
+                params,
+            ).fetchall()
+        finally:
+            connection.close()
+
+        return [
+            {"api_source": api_source, "risk_class": risk_class, "count": count,
+             "mean_overall_risk": round(mean, 2) if mean is not None else None}
+            for api_source, risk_class, count, mean in rows
+        ]
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
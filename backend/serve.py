@@ -0,0 +1,131 @@
+import os
+import gc
+import sys
+import signal
+import socket
+import argparse
+import importlib
+import uvicorn
+
+# Worker exit code when its warm-up fails; the server stops instead of restarting it
+WARM_UP_FAILED = 3
+
+
+def start_worker(scoring_api, sock, host, port):
+    """
+    Fork a worker process that warms up the inherited models, then serves
+    the app on the shared listening socket.
+    """
+    pid = os.fork()
+    if pid == 0:
+        # ✅ Child: default signal handling, then run a single uvicorn server
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        # ✅ First predictions run here, after the fork, so each worker starts
+        # its own XGBoost/LightGBM OpenMP thread pool
+        try:
+            scoring_api.model_registry.warm_up()
+        except Exception as e:
+            print(f"❌ Worker {os.getpid()} failed to warm up: {e}")
+            os._exit(WARM_UP_FAILED)
+
+        config = uvicorn.Config(scoring_api.app, host=host, port=port)
+        uvicorn.Server(config).run(sockets=[sock])
+        os._exit(0)
+    return pid
+
+
+def serve(host, port, workers):
+    """
+    Load the models once in this process, then fork workers that inherit them.
+
+    Forked workers share the parent's memory pages copy-on-write, so the four
+    models are held once instead of once per worker. Freezing the garbage
+    collector moves every loaded object out of the collected generations,
+    which keeps GC passes in the workers from touching (and copying) them.
+
+    The parent only loads the models; it never predicts. XGBoost and LightGBM
+    start an OpenMP thread pool on their first prediction, and that pool is
+    not usable in a forked child, so each worker warms up after the fork.
+
+    The sharing lasts until the first hot swap. The model watcher and
+    /admin/models/reload load the new version in each worker separately, so
+    every worker then holds its own copy. Restart the server to share one
+    copy again, or set MODEL_MMAP_MODE=r so the model arrays are read from
+    the page cache and shared even after a swap.
+    """
+    if not hasattr(os, "fork"):
+        print("❌ Multi-process serving needs os.fork. Run uvicorn main:app instead.")
+        return 1
+
+    # ✅ Load the ensemble models and encoders exactly once, before forking
+    scoring_api = importlib.import_module("main")
+    scoring_api.model_registry.ensure_loaded(warm_up=False)
+    scoring_api.core.warm_up()
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children = {start_worker(scoring_api, sock, host, port) for _ in range(workers)}
+    print(f"✅ Serving on http://{host}:{port} with {workers} workers sharing one model copy")
+
+    stopping = False
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    exit_code = 0
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+
+        children.discard(pid)
+        if stopping:
+            continue
+
+        if os.waitstatus_to_exitcode(status) == WARM_UP_FAILED:
+            # ✅ A replacement would fail the same way; stop instead of looping
+            print("❌ The models failed to warm up in a worker. Stopping.")
+            exit_code = 1
+            shutdown(signal.SIGTERM, None)
+            continue
+
+        # ✅ Replace a crashed worker; it inherits the same loaded models
+        print(f"⚠️ Worker {pid} exited, starting a replacement")
+        children.add(start_worker(scoring_api, sock, host, port))
+
+    sock.close()
+    return exit_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the fraud detection API from several processes.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    return serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import os
+import sys
+import types
+import importlib.util
+import asyncio
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Backend modules import each other flat (from metrics import ...), the API
+# side as a package (from backend.metrics import ...)
+for path in (BACKEND_DIR, os.path.dirname(BACKEND_DIR)):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# No directory watcher in tests; models are swapped in directly
+os.environ.setdefault("MODEL_WATCH_INTERVAL_S", "0")
+
+# No results.db under backend/data/ when the feed API is imported
+os.environ.setdefault("RESULTS_DB_PATH", "")
+
+
+# Velocity features given outright, so a request does not depend on the feature store
+VELOCITY = {"TransactionsLast1Hr": 1, "TransactionsLast24Hr": 4, "AvgTransactionAmount": 120.0,
+            "TimeSinceLastTransaction": 2.5, "AmountDeviationFromAvg": 80.0}
+
+
+def sample_transaction(**overrides):
+    """
+    A valid /detect_fraud request body.
+    """
+    transaction = {
+        "TransactionAmount": 200.0, "DistanceFromHome": 5.0, "UserAccountAgeDays": 300,
+        "PaymentMethod": "CreditCard", "CardType": "Visa", "CardIssuer": "BankA", "CardCountry": "US",
+        "MerchantCategory": "Groceries", "MerchantCountry": "US", "DeviceType": "Desktop",
+        "DeviceOS": "Windows", "Browser": "Chrome",
+        "IsHighRiskMerchant": False, "IPIsProxy": False, "IsNewDevice": False,
+        "IsEmailGeneric": False, "IsHoliday": False,
+    }
+    transaction.update(overrides)
+    return transaction
+
+
+class AppClient:
+    """
+    Synchronous client for an ASGI app, on one event loop kept for the test.
+    """
+
+    def __init__(self, app):
+        import httpx
+
+        self.runner = asyncio.Runner()
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    def run(self, coroutine):
+        return self.runner.run(coroutine)
+
+    def get(self, url, **kwargs):
+        return self.run(self.client.get(url, **kwargs))
+
+    def post(self, url, **kwargs):
+        return self.run(self.client.post(url, **kwargs))
+
+    def close(self):
+        self.run(self.client.aclose())
+        self.runner.close()
+
+
+@pytest.fixture
+def scoring_app(monkeypatch):
+    """
+    main.app with stand-in models and a stubbed compliance call, and fresh
+    feature store and score cache.
+    """
+    import benchmark
+    import main
+    from cache import ScoreCache
+    from feature_store import VelocityFeatureStore
+
+    async def stub_compliance_risk(transaction_data):
+        return 40.0
+
+    main.model_registry.swap(benchmark.build_stand_in_ensemble(benchmark.sample_transactions(64, seed=0)))
+    monkeypatch.setattr(main, "get_compliance_risk", stub_compliance_risk)
+    monkeypatch.setattr(main, "feature_store", VelocityFeatureStore())
+    monkeypatch.setattr(main, "score_cache", ScoreCache())
+
+    client = AppClient(main.app)
+    async def start():
+        await main.start_scoring()
+        await main.warm_up_future
+
+    client.run(start())
+    try:
+        yield client
+    finally:
+        # ✅ The batcher belongs to this test's loop; the executor is kept for the next test
+        client.run(main.ensemble_batcher.stop())
+        client.close()
+
+
+@pytest.fixture
+def run_compliance():
+    """
+    run(handler, scenario, **kwargs) awaits scenario(client) for a
+    ComplianceClient whose requests go to handler through an
+    httpx.MockTransport, then closes the client. No backoff between retries.
+    """
+    import httpx
+    from core import ComplianceClient
+
+    def run(handler, scenario, **kwargs):
+        kwargs.setdefault("backoff", 0)
+        client = ComplianceClient(api_url="http://groq.test/chat", api_key="test",
+                                  transport=httpx.MockTransport(handler), **kwargs)
+
+        async def main():
+            try:
+                return await scenario(client)
+            finally:
+                await client.aclose()
+
+        return asyncio.run(main())
+
+    return run
+
+
+class StandInAgent:
+    """
+    Takes the place of agents.core.FraudDetectionAgent, which is not part of
+    this repository. The results endpoints never call it.
+    """
+
+
+@pytest.fixture
+def results_api(monkeypatch):
+    """
+    The feed API (api.py) with an empty results buffer of capacity 100.
+    """
+    if importlib.util.find_spec("agents") is None:
+        agents = types.ModuleType("agents")
+        agents.core = types.ModuleType("agents.core")
+        agents.core.FraudDetectionAgent = StandInAgent
+        monkeypatch.setitem(sys.modules, "agents", agents)
+        monkeypatch.setitem(sys.modules, "agents.core", agents.core)
+
+    from backend import api
+    from backend.pipeline import ResultRingBuffer
+
+    monkeypatch.setattr(api, "results_store", ResultRingBuffer(capacity=100))
+    client = AppClient(api.app)
+    try:
+        yield client
+    finally:
+        client.close()
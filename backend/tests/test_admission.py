@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+import main
+from admission import AdmissionController, AdmissionRejected, PRIORITY_BULK, PRIORITY_HIGH, PRIORITY_NORMAL
+from conftest import sample_transaction
+
+
+def rejection(coroutine):
+    with pytest.raises(AdmissionRejected) as error:
+        asyncio.run(coroutine)
+    return error.value
+
+
+def test_full_queue_rejects_with_429():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=1)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        try:
+            await controller.acquire()
+        finally:
+            waiter.cancel()
+
+    error = rejection(scenario())
+    assert (error.status_code, error.reason) == (429, "queue_full")
+    assert error.retry_after >= 1
+
+
+def test_waiting_too_long_rejects_with_503():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, queue_timeout_ms=20)
+        await controller.acquire()
+        await controller.acquire()
+
+    error = rejection(scenario())
+    assert (error.status_code, error.reason) == (503, "queue_timeout")
+
+
+def test_higher_priority_request_evicts_the_worst_waiter():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=1)
+        await controller.acquire()
+        bulk = asyncio.create_task(controller.acquire(PRIORITY_BULK))
+        await asyncio.sleep(0)
+        high = asyncio.create_task(controller.acquire(PRIORITY_HIGH))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as error:
+            await bulk
+        controller.release()
+        await high
+        return error.value, controller
+
+    error, controller = asyncio.run(scenario())
+    assert (error.status_code, error.reason) == (429, "evicted")
+    assert controller.active == 1 and controller.waiting == 0
+
+
+def test_released_slots_go_to_the_highest_priority_waiter_first():
+    admitted = []
+
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1)
+        await controller.acquire()
+
+        async def wait(name, priority):
+            await controller.acquire(priority)
+            admitted.append(name)
+            controller.release()
+
+        waiters = [asyncio.create_task(wait(name, priority)) for name, priority in
+                   (("bulk", PRIORITY_BULK), ("normal", PRIORITY_NORMAL), ("high", PRIORITY_HIGH))]
+        await asyncio.sleep(0)
+        controller.release()
+        await asyncio.gather(*waiters)
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert admitted == ["high", "normal", "bulk"]
+    assert controller.active == 0
+
+
+def test_degraded_between_degrade_and_recover_depth():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, degrade_depth=3, recover_depth=1)
+        await controller.acquire()
+        waiters = [asyncio.create_task(controller.acquire()) for _ in range(3)]
+        await asyncio.sleep(0)
+        states = [controller.degraded]
+
+        for _ in waiters:
+            controller.release()
+            await asyncio.sleep(0)
+            states.append(controller.degraded)
+        return states
+
+    assert asyncio.run(scenario()) == [True, True, False, False]
+
+
+def test_retry_after_grows_with_the_queue_and_is_capped():
+    controller = AdmissionController(max_concurrency=2, max_retry_after_s=30)
+    controller.service_seconds = 1.0
+    assert controller.retry_after() == 1
+
+    controller._waiters = [None] * 9
+    assert controller.retry_after() == 5
+
+    controller._waiters = [None] * 1000
+    assert controller.retry_after() == 30
+
+
+@pytest.mark.parametrize("controller, status_code, reason", [
+    (AdmissionController(max_concurrency=1, max_queue=0), 429, "queue_full"),
+    (AdmissionController(max_concurrency=1, queue_timeout_ms=20), 503, "queue_timeout"),
+])
+def test_endpoints_answer_overload_with_retry_after(scoring_app, monkeypatch, controller, status_code, reason):
+    monkeypatch.setattr(main, "admission", controller)
+    scoring_app.run(controller.acquire())
+
+    for url, body in (("/detect_fraud", sample_transaction(UserID="U1")),
+                      ("/detect_fraud/batch", [sample_transaction(UserID="U1")])):
+        response = scoring_app.post(url, json=body)
+        assert response.status_code == status_code
+        assert response.json()["reason"] == reason
+        assert int(response.headers["retry-after"]) >= 1
+
+    # ✅ Rejected requests never reach the feature store
+    assert len(main.feature_store) == 0
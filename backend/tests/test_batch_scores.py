@@ -0,0 +1,83 @@
+import json
+
+import httpx
+
+from core import parse_batch_scores
+
+
+def test_scores_are_matched_by_id():
+    reply = '{"scores": [{"id": 1, "risk_score": 0.2}, {"id": 0, "risk_score": 0.75}]}'
+    assert parse_batch_scores(reply, 2) == [75.0, 20.0]
+
+
+def test_missing_items_come_back_as_none():
+    reply = '{"scores": [{"id": 0, "risk_score": 0.1}, {"id": 2, "risk_score": 0.3}]}'
+    assert parse_batch_scores(reply, 4) == [10.0, None, 30.0, None]
+
+
+def test_invalid_entries_are_treated_as_missing():
+    reply = json.dumps({"results": [
+        {"id": 0, "risk_score": 1.5},
+        {"id": 1, "risk_score": "high"},
+        {"id": 7, "risk_score": 0.5},
+        {"id": 2, "risk_score": True},
+        {"id": 3, "score": 0.4},
+    ]})
+    assert parse_batch_scores(reply, 4) == [None, None, None, 40.0]
+
+
+def test_bare_arrays_and_fenced_replies_are_accepted():
+    assert parse_batch_scores("[0.1, 0.2]", 2) == [10.0, 20.0]
+    assert parse_batch_scores('```json\n{"scores": [{"id": 0, "risk_score": 0.9}]}\n```', 1) == [90.0]
+
+
+def test_unparseable_reply_leaves_every_item_missing():
+    assert parse_batch_scores("I cannot help with that.", 3) == [None, None, None]
+
+
+def score_batch(batch):
+    async def scenario(client):
+        return await client.score_batch(batch)
+
+    return scenario
+
+
+def batch_handler(skip_first=()):
+    """
+    Scores every transaction at its first feature, leaving out the ids in
+    skip_first on the first request. Records the batch sizes sent.
+    """
+    sizes = []
+
+    def handler(request):
+        transactions = json.loads(json.loads(request.content)["messages"][1]["content"])["transactions"]
+        skip = skip_first if not sizes else ()
+        sizes.append(len(transactions))
+        scores = [{"id": t["id"], "risk_score": t["features"][0]} for t in transactions if t["id"] not in skip]
+        content = json.dumps({"scores": scores})
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    return handler, sizes
+
+
+def test_items_missing_from_the_reply_are_resent_on_their_own(run_compliance):
+    handler, sizes = batch_handler(skip_first={1, 3})
+    batch = [[0.1], [0.2], [0.3], [0.4]]
+
+    assert run_compliance(handler, score_batch(batch)) == [10.0, 20.0, 30.0, 40.0]
+    assert sizes == [4, 2]
+
+
+def test_items_still_missing_after_the_retries_are_none(run_compliance):
+    handler, sizes = batch_handler(skip_first={1})
+
+    assert run_compliance(handler, score_batch([[0.1], [0.2]]), batch_retries=0) == [10.0, None]
+    assert sizes == [2]
+
+
+def test_batches_are_split_and_duplicates_sent_once(run_compliance):
+    handler, sizes = batch_handler()
+    batch = [[0.1], [0.2], [0.1], [0.3], [0.4]]
+
+    assert run_compliance(handler, score_batch(batch), batch_size=2) == [10.0, 20.0, 10.0, 30.0, 40.0]
+    assert sorted(sizes) == [2, 2]
@@ -0,0 +1,117 @@
+import time
+import asyncio
+
+import pytest
+
+from batcher import MicroBatcher
+
+
+def run_batches(n_requests, stagger_s=0.0, **kwargs):
+    """
+    Submit n_requests through a batcher, stagger_s apart. Returns each
+    caller's result and the size of every batch that was scored.
+    """
+    batches = []
+
+    async def predict_batch(transactions):
+        batches.append(len(transactions))
+        return [transaction * 10 for transaction in transactions]
+
+    async def scenario():
+        batcher = MicroBatcher(predict_batch, name="test", **kwargs)
+        await batcher.start()
+        try:
+            submits = []
+            for i in range(n_requests):
+                submits.append(asyncio.create_task(batcher.submit(i)))
+                await asyncio.sleep(stagger_s)
+            return await asyncio.gather(*submits)
+        finally:
+            await batcher.stop()
+
+    return asyncio.run(scenario()), batches
+
+
+def test_full_batches_are_flushed_without_waiting_for_the_deadline():
+    start = time.perf_counter()
+    results, batches = run_batches(8, max_batch_size=4, max_wait_ms=5000)
+
+    assert results == [i * 10 for i in range(8)]
+    assert batches == [4, 4]
+    assert time.perf_counter() - start < 1.0
+
+
+def test_partial_batch_is_flushed_when_the_wait_runs_out():
+    results, batches = run_batches(3, max_batch_size=32, max_wait_ms=20)
+
+    assert results == [0, 10, 20]
+    assert batches == [3]
+
+
+def test_requests_after_the_deadline_start_a_new_batch():
+    results, batches = run_batches(3, stagger_s=0.05, max_batch_size=32, max_wait_ms=10)
+
+    assert results == [0, 10, 20]
+    assert batches == [1, 1, 1]
+
+
+def test_errors_are_raised_in_every_caller_of_the_batch():
+    async def predict_batch(transactions):
+        raise ValueError("model failed")
+
+    async def scenario():
+        batcher = MicroBatcher(predict_batch, max_batch_size=4, max_wait_ms=10, name="test")
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    errors = asyncio.run(scenario())
+    assert [type(error) for error in errors] == [ValueError] * 3
+
+
+def test_submit_before_start_is_rejected():
+    batcher = MicroBatcher(lambda transactions: transactions, name="test")
+    with pytest.raises(RuntimeError):
+        asyncio.run(batcher.submit(1))
+
+
+def test_submit_after_stop_is_rejected():
+    async def scenario():
+        batcher = MicroBatcher(lambda transactions: transactions, name="test")
+        await batcher.start()
+        await batcher.stop()
+        await batcher.submit(1)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("max_batch_size, collect_s, expected_batches", [
+    # Stopped while the collector waits out a partial batch
+    (32, 0.05, [3]),
+    # Stopped before the collector has taken everything off the queue
+    (2, 0.0, [2, 1]),
+])
+def test_stop_scores_everything_already_submitted(max_batch_size, collect_s, expected_batches):
+    batches = []
+
+    async def predict_batch(transactions):
+        batches.append(len(transactions))
+        return [transaction * 10 for transaction in transactions]
+
+    async def scenario():
+        batcher = MicroBatcher(predict_batch, max_batch_size=max_batch_size, max_wait_ms=5000, name="test")
+        await batcher.start()
+        submits = [asyncio.create_task(batcher.submit(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        await asyncio.sleep(collect_s)
+
+        await asyncio.wait_for(batcher.stop(), timeout=1)
+        done, pending = await asyncio.wait(submits, timeout=1)
+        assert not pending
+        return [task.result() for task in submits]
+
+    assert asyncio.run(scenario()) == [0, 10, 20]
+    assert batches == expected_batches
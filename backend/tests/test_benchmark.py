@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+import benchmark
+
+
+def test_stand_in_ensemble_reads_and_leaves_nothing_on_disk(capsys):
+    before = set(os.listdir(tempfile.gettempdir()))
+    model = benchmark.build_stand_in_ensemble(benchmark.sample_transactions(64, seed=0))
+
+    assert set(os.listdir(tempfile.gettempdir())) == before
+    assert "Warning" not in capsys.readouterr().out
+    assert len(model.predict_batch(benchmark.sample_transactions(4, seed=1))) == 4
+
+
+def test_measure_reports_growth_of_the_peak_not_the_peak_itself():
+    result = benchmark.measure(lambda: {"calls": 1})
+
+    # ✅ A benchmark that allocates nothing shows no growth, however high the process peak is
+    assert benchmark.peak_rss_mb() > 0
+    assert result == {"calls": 1, "peak_rss_growth_mb": 0.0}
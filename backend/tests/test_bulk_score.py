@@ -0,0 +1,109 @@
+import gc
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+
+import benchmark
+import bulk_score
+from bulk_score import MANIFEST_FILE, part_path, read_chunks, score_chunk
+
+
+def test_parquet_chunks_have_exact_sizes_across_row_groups(tmp_path):
+    path = str(tmp_path / "input.parquet")
+    # ✅ Row groups of 7 rows do not line up with chunks of 10
+    pq.write_table(pa.table({"TransactionID": np.arange(53)}), path, row_group_size=7)
+
+    chunks = list(read_chunks(path, 10))
+
+    assert [index for index, _ in chunks] == list(range(6))
+    assert [len(df) for _, df in chunks] == [10, 10, 10, 10, 10, 3]
+    for index, df in chunks:
+        assert df["TransactionID"].tolist() == list(range(index * 10, min(53, (index + 1) * 10)))
+
+
+def test_csv_chunks_have_exact_sizes(tmp_path):
+    path = tmp_path / "input.csv"
+    path.write_text("TransactionID\n" + "".join(f"{i}\n" for i in range(25)))
+
+    assert [len(df) for _, df in read_chunks(str(path), 10)] == [10, 10, 5]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    """
+    The stand-in ensemble, loaded in place of the models on disk.
+    """
+    model = benchmark.build_stand_in_ensemble(benchmark.sample_transactions(64, seed=0))
+    monkeypatch.setattr(bulk_score, "_model", model)
+    monkeypatch.setattr(bulk_score, "_compliance_mode", "skip")
+    monkeypatch.setattr(bulk_score, "FraudEnsembleModel", lambda **kwargs: model)
+    return model
+
+
+@pytest.fixture
+def input_csv(tmp_path):
+    path = tmp_path / "input.csv"
+    df = pd.DataFrame(benchmark.sample_transactions(25, seed=1))
+    df.insert(0, "TransactionID", [f"tx-{i}" for i in range(len(df))])
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def run_bulk_score(monkeypatch, tmp_path, input_csv, *options):
+    monkeypatch.setattr(sys, "argv", ["bulk_score.py", input_csv, str(tmp_path / "out"), "--workers", "1",
+                                      "--models-root", str(tmp_path / "models"), *options])
+    try:
+        return bulk_score.main()
+    finally:
+        gc.unfreeze()
+
+
+def test_score_chunk_writes_a_complete_part(model, input_csv, tmp_path):
+    df = pd.read_csv(input_csv)
+
+    assert score_chunk(3, df, str(tmp_path), "csv")[:2] == (3, 25)
+    # ✅ Only the renamed part is left, no temporary file
+    assert sorted(os.listdir(tmp_path)) == ["input.csv", "part-000003.csv"]
+
+    part = pd.read_csv(part_path(str(tmp_path), 3, "csv"))
+    assert part["TransactionID"].tolist() == df["TransactionID"].tolist()
+    assert part["fraud_percent"].tolist() == pytest.approx([fraud for fraud, _ in model.predict_frame(df)])
+    # ✅ Without compliance scoring every row takes the /detect_fraud fallback
+    assert (part["compliance_percent"] == bulk_score.COMPLIANCE_FALLBACK_PERCENT).all()
+    assert part["degraded"].all()
+
+
+def test_rerun_skips_finished_parts(model, input_csv, tmp_path, monkeypatch, capsys):
+    out = str(tmp_path / "out")
+    assert run_bulk_score(monkeypatch, tmp_path, input_csv, "--chunk-size", "10") == 0
+    assert sorted(os.listdir(out)) == [MANIFEST_FILE, "part-000000.csv", "part-000001.csv", "part-000002.csv"]
+
+    # ✅ A finished part is left alone, a missing one is scored again
+    with open(part_path(out, 0, "csv"), "w") as f:
+        f.write("finished\n")
+    os.remove(part_path(out, 1, "csv"))
+    capsys.readouterr()
+
+    assert run_bulk_score(monkeypatch, tmp_path, input_csv, "--chunk-size", "10") == 0
+    assert "skipped 2 finished chunks" in capsys.readouterr().out
+    with open(part_path(out, 0, "csv")) as f:
+        assert f.read() == "finished\n"
+    assert len(pd.read_csv(part_path(out, 1, "csv"))) == 10
+
+
+def test_rerun_with_different_settings_is_rejected(model, input_csv, tmp_path, monkeypatch, capsys):
+    out = str(tmp_path / "out")
+    assert run_bulk_score(monkeypatch, tmp_path, input_csv, "--chunk-size", "10") == 0
+    os.remove(part_path(out, 2, "csv"))
+    capsys.readouterr()
+
+    # ✅ Parts of chunk size 10 cannot be mixed with parts of chunk size 5
+    assert run_bulk_score(monkeypatch, tmp_path, input_csv, "--chunk-size", "5") == 1
+    assert "different chunk_size" in capsys.readouterr().out
+    assert sorted(os.listdir(out)) == [MANIFEST_FILE, "part-000000.csv", "part-000001.csv"]
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import joblib
+import numpy as np
+import pytest
+
+xgboost = pytest.importorskip("xgboost")
+catboost = pytest.importorskip("catboost")
+lightgbm = pytest.importorskip("lightgbm")
+from sklearn.ensemble import IsolationForest
+
+import compiled
+from compiled import CompiledEnsemble, boundary_inputs
+
+
+@pytest.fixture(scope="module")
+def models():
+    rng = np.random.default_rng(0)
+    X = rng.normal(0, 2, (600, 6))
+    # ✅ A 0/1 column gives LightGBM splits at its zero threshold
+    X[:, 5] = rng.integers(0, 2, 600)
+    y = (X[:, 0] + X[:, 1] * X[:, 2] + X[:, 5] > 0.3).astype(int)
+    return {
+        "xgb_fraud_model.pkl": xgboost.XGBClassifier(n_estimators=20, max_depth=4).fit(X, y),
+        "catboost_fraud_model.pkl": catboost.CatBoostClassifier(iterations=20, depth=4, verbose=0, allow_writing_files=False).fit(X, y),
+        "lgbm_fraud_model.pkl": lightgbm.LGBMClassifier(n_estimators=20, verbose=-1).fit(X, y),
+        "isolation_forest_fraud_model.pkl": IsolationForest(n_estimators=20, random_state=0).fit(X),
+    }
+
+
+def library_outputs(models, X):
+    return {
+        name: model.decision_function(X) if "isolation_forest" in name else model.predict_proba(X)[:, 1]
+        for name, model in models.items()
+    }
+
+
+def test_compiled_matches_libraries_on_split_thresholds(models, tmp_path):
+    engine = CompiledEnsemble.from_models(models, n_features=6)
+    X = boundary_inputs(engine, 5000, np.random.default_rng(1))
+
+    path = str(tmp_path / compiled.COMPILED_FILE)
+    engine.save(path)
+    for candidate in (engine, CompiledEnsemble.load(path)):
+        actual = candidate.model_outputs(X)
+        for name, expected in library_outputs(models, X).items():
+            # XGBoost sums its leaves in float32
+            assert np.max(np.abs(expected - actual[name])) < 1e-6, name
+
+
+def test_compile_cli_checks_and_saves(models, tmp_path, monkeypatch):
+    for name, model in models.items():
+        joblib.dump(model, tmp_path / name)
+
+    monkeypatch.setattr(sys, "argv", ["compiled.py", "--model-dir", str(tmp_path), "--samples", "500"])
+    assert compiled.main() == 0
+    assert os.path.exists(tmp_path / compiled.COMPILED_FILE)
@@ -0,0 +1,75 @@
+import httpx
+
+FEATURES = [0.5, 1.25, -3.0, 7.0]
+
+
+def reply(content):
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+def score_each(*batch):
+    """
+    Scenario scoring each feature vector in turn; FEATURES alone by default.
+    """
+    async def scenario(client):
+        return [await client.score_processed(features) for features in batch or (FEATURES,)]
+
+    return scenario
+
+
+def test_retries_server_errors_until_a_score_comes_back(run_compliance):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(503) if len(requests) < 3 else reply("0.42")
+
+    assert run_compliance(handler, score_each(), max_retries=2) == [42.0]
+    assert len(requests) == 3
+
+
+def test_timeouts_are_retried_then_give_up_with_none(run_compliance):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    assert run_compliance(handler, score_each(), max_retries=2) == [None]
+    assert len(requests) == 3
+
+
+def test_client_errors_are_not_retried(run_compliance):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(400)
+
+    assert run_compliance(handler, score_each(), max_retries=2) == [None]
+    assert len(requests) == 1
+
+
+def test_scores_are_cached_per_rounded_feature_vector(run_compliance):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return reply("0.3")
+
+    near_duplicate = [value + 0.001 for value in FEATURES]
+    different = [value + 1 for value in FEATURES]
+
+    assert run_compliance(handler, score_each(FEATURES, near_duplicate, different)) == [30.0, 30.0, 30.0]
+    assert len(requests) == 2
+
+
+def test_failed_calls_are_not_cached(run_compliance):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(500) if len(requests) == 1 else reply("0.3")
+
+    assert run_compliance(handler, score_each(FEATURES, FEATURES), max_retries=0) == [None, 30.0]
+    assert len(requests) == 2
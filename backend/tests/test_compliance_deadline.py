@@ -0,0 +1,85 @@
+import time
+import asyncio
+
+import main
+from admission import AdmissionController, PRIORITY_BULK
+from conftest import VELOCITY, sample_transaction
+
+def expected_overall(body, compliance_percent):
+    return round((body["fraud_percent"] + compliance_percent + body["behavior_anomaly_percent"]) / 3, 2)
+
+
+def test_slow_compliance_falls_back_within_the_deadline(scoring_app, monkeypatch):
+    async def slow_compliance_risk(transaction_data):
+        await asyncio.sleep(5)
+        return 10.0
+
+    monkeypatch.setattr(main, "get_compliance_risk", slow_compliance_risk)
+    monkeypatch.setattr(main, "COMPLIANCE_DEADLINE_MS", 50.0)
+    timeouts = main.COMPLIANCE_TIMEOUTS.value
+
+    started = time.perf_counter()
+    body = scoring_app.post("/detect_fraud", json=sample_transaction(TransactionID="tx-slow", **VELOCITY)).json()
+
+    assert time.perf_counter() - started < 2
+    assert body["compliance_percent"] == main.COMPLIANCE_FALLBACK_PERCENT
+    assert body["overall_risk"] == expected_overall(body, main.COMPLIANCE_FALLBACK_PERCENT)
+    assert (body["degraded"], body["degraded_reason"]) == (True, "compliance_unavailable")
+    assert main.COMPLIANCE_TIMEOUTS.value == timeouts + 1
+
+    # ✅ Degraded responses are not cached, so a retry can get the real score
+    assert main.score_cache.get(main.score_cache_key(sample_transaction(TransactionID="tx-slow", **VELOCITY))) is None
+
+
+def test_failed_compliance_call_falls_back(scoring_app, monkeypatch):
+    async def failed_compliance_risk(transaction_data):
+        return None
+
+    monkeypatch.setattr(main, "get_compliance_risk", failed_compliance_risk)
+    body = scoring_app.post("/detect_fraud", json=sample_transaction(**VELOCITY)).json()
+
+    assert body["compliance_percent"] == main.COMPLIANCE_FALLBACK_PERCENT
+    assert (body["degraded"], body["degraded_reason"]) == (True, "compliance_unavailable")
+
+
+def test_compliance_within_the_deadline_is_used(scoring_app):
+    body = scoring_app.post("/detect_fraud", json=sample_transaction(**VELOCITY)).json()
+
+    assert body["compliance_percent"] == 40.0
+    assert body["overall_risk"] == expected_overall(body, 40.0)
+    assert (body["degraded"], body["degraded_reason"]) == (False, None)
+
+
+def test_compliance_is_shed_while_admission_is_degraded(scoring_app, monkeypatch):
+    calls = []
+
+    async def counted_compliance_risk(transaction_data):
+        calls.append(transaction_data)
+        return 40.0
+
+    controller = AdmissionController(max_concurrency=1, degrade_depth=2, recover_depth=0)
+    monkeypatch.setattr(main, "admission", controller)
+    monkeypatch.setattr(main, "get_compliance_risk", counted_compliance_risk)
+
+    async def scenario():
+        # ✅ The request waits behind a held slot with a bulk request queued after it
+        await controller.acquire()
+        request = asyncio.create_task(scoring_app.client.post("/detect_fraud", json=sample_transaction(**VELOCITY)))
+        while controller.waiting < 1:
+            await asyncio.sleep(0.001)
+        bulk = asyncio.create_task(controller.acquire(PRIORITY_BULK))
+        await asyncio.sleep(0)
+        assert controller.degraded
+
+        controller.release()
+        response = await request
+        await bulk
+        controller.release()
+        return response.json()
+
+    body = scoring_app.run(scenario())
+
+    assert calls == []
+    assert body["compliance_percent"] == main.COMPLIANCE_FALLBACK_PERCENT
+    assert (body["degraded"], body["degraded_reason"]) == (True, "load_shedding")
+    assert not controller.degraded
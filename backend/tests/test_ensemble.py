@@ -0,0 +1,53 @@
+import pytest
+
+import benchmark
+from conftest import VELOCITY, sample_transaction
+
+
+@pytest.fixture(params=["fitted", "unfitted"])
+def model(request):
+    model = benchmark.build_stand_in_ensemble(benchmark.sample_transactions(64, seed=0))
+    if request.param == "unfitted":
+        # ✅ The legacy per-transaction preprocessing path
+        model.preprocessor = None
+    return model
+
+
+def test_predict_batch_matches_predict_on_each_row(model):
+    transactions = benchmark.sample_transactions(50, seed=3)
+
+    assert model.predict_batch(transactions) == [model.predict(t) for t in transactions]
+
+
+def test_predict_batch_is_unaffected_by_earlier_larger_batches(model):
+    transactions = benchmark.sample_transactions(40, seed=4)
+    expected = [model.predict(t) for t in transactions[:5]]
+
+    # ✅ The reused feature buffer still holds rows from the bigger batch
+    model.predict_batch(transactions)
+    assert model.predict_batch(transactions[:5]) == expected
+
+
+def test_empty_batch_returns_no_rows(model):
+    assert model.predict_batch([]) == []
+
+
+def test_batch_endpoint_matches_single_requests(scoring_app):
+    bodies = [
+        sample_transaction(TransactionAmount=amount, CardType=card, **VELOCITY)
+        for amount, card in ((12.5, "Visa"), (480.0, "MasterCard"), (2600.0, "Amex"))
+    ]
+
+    response = scoring_app.post("/detect_fraud/batch", json=bodies)
+    assert response.status_code == 200
+    batch = response.json()["results"]
+
+    assert batch == [scoring_app.post("/detect_fraud", json=body).json() for body in bodies]
+    assert all(result["compliance_percent"] == 40.0 and not result["degraded"] for result in batch)
+
+
+def test_batch_endpoint_accepts_an_empty_list(scoring_app):
+    response = scoring_app.post("/detect_fraud/batch", json=[])
+
+    assert response.status_code == 200
+    assert response.json() == {"results": []}
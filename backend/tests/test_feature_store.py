@@ -0,0 +1,106 @@
+import main
+from conftest import sample_transaction
+from feature_store import NO_HISTORY_HOURS, VelocityFeatureStore
+
+START = 1_700_000_000.0
+
+
+def test_first_transaction_has_no_history():
+    features = VelocityFeatureStore().observe("U1", 50.0, START)
+
+    assert features == {
+        "TransactionsLast1Hr": 0,
+        "TransactionsLast24Hr": 0,
+        "AvgTransactionAmount": 50.0,
+        "TimeSinceLastTransaction": NO_HISTORY_HOURS,
+        "AmountDeviationFromAvg": 0.0,
+    }
+
+
+def test_counts_cover_the_transactions_before_the_current_one():
+    store = VelocityFeatureStore()
+    for minutes, amount in ((0, 10.0), (10, 20.0), (20, 30.0)):
+        store.observe("U1", amount, START + minutes * 60)
+
+    features = store.observe("U1", 100.0, START + 30 * 60)
+
+    assert features["TransactionsLast1Hr"] == 3
+    assert features["TransactionsLast24Hr"] == 3
+    assert features["AvgTransactionAmount"] == 20.0
+    assert features["TimeSinceLastTransaction"] == 0.17
+    assert features["AmountDeviationFromAvg"] == 80.0
+
+
+def test_transactions_leave_the_hour_window_but_stay_in_the_day_window():
+    store = VelocityFeatureStore()
+    store.observe("U1", 10.0, START)
+    store.observe("U1", 10.0, START + 60)
+
+    two_hours_later = store.observe("U1", 10.0, START + 2 * 3600)
+    assert two_hours_later["TransactionsLast1Hr"] == 0
+    assert two_hours_later["TransactionsLast24Hr"] == 2
+
+    two_days_later = store.observe("U1", 10.0, START + 2 * 24 * 3600)
+    assert two_days_later["TransactionsLast1Hr"] == 0
+    assert two_days_later["TransactionsLast24Hr"] == 0
+    assert two_days_later["TimeSinceLastTransaction"] == 46.0
+
+
+def test_users_are_counted_separately():
+    store = VelocityFeatureStore()
+    store.observe("U1", 10.0, START)
+    store.observe("U1", 10.0, START + 60)
+
+    assert store.observe("U2", 10.0, START + 120)["TransactionsLast1Hr"] == 0
+    assert store.observe("U1", 10.0, START + 180)["TransactionsLast1Hr"] == 2
+
+
+def test_idle_users_are_evicted_after_the_ttl():
+    store = VelocityFeatureStore(ttl_seconds=3600)
+    store.observe("idle", 10.0, START)
+    store.observe("active", 10.0, START + 1800)
+    assert len(store) == 2
+
+    store.observe("active", 10.0, START + 2 * 3600)
+    assert len(store) == 1
+
+    # ✅ An evicted user starts over with no history
+    assert store.observe("idle", 10.0, START + 2 * 3600)["TimeSinceLastTransaction"] == NO_HISTORY_HOURS
+
+
+def test_least_recently_seen_user_is_evicted_at_max_users():
+    store = VelocityFeatureStore(max_users=2)
+    store.observe("U1", 10.0, START)
+    store.observe("U2", 10.0, START + 1)
+    store.observe("U1", 10.0, START + 2)
+    store.observe("U3", 10.0, START + 3)
+
+    assert len(store) == 2
+    assert store.observe("U1", 10.0, START + 4)["TransactionsLast1Hr"] == 2
+    assert store.observe("U2", 10.0, START + 5)["TransactionsLast1Hr"] == 0
+
+
+def test_enrich_fills_only_missing_features():
+    store = VelocityFeatureStore()
+    store.observe("U1", 10.0, START)
+
+    transaction = {"UserID": "U1", "TransactionAmount": 30.0, "TransactionDateTime": START + 60,
+                   "TransactionsLast24Hr": 99}
+    store.enrich(transaction)
+
+    assert transaction["TransactionsLast1Hr"] == 1
+    assert transaction["TransactionsLast24Hr"] == 99
+    assert transaction["AvgTransactionAmount"] == 10.0
+
+    anonymous = {"TransactionAmount": 30.0}
+    assert store.enrich(anonymous) == {"TransactionAmount": 30.0}
+
+
+def test_rejected_batch_records_nothing_in_the_feature_store(scoring_app):
+    valid = sample_transaction(UserID="U1", TransactionDateTime="2024-01-01T12:00:00")
+    invalid = sample_transaction()
+
+    response = scoring_app.post("/detect_fraud/batch", json=[valid, valid, invalid])
+
+    assert response.status_code == 422
+    assert len(main.feature_store) == 0
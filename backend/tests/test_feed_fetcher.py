@@ -0,0 +1,130 @@
+import json
+import asyncio
+
+import httpx
+import pytest
+
+from backend.feed_fetcher import PlaidSource, ProviderSource, StripeSource, merge_sources
+
+STRIPE = {"base_url": "http://stripe.test", "rate_limit": 0}
+PLAID = {"base_url": "http://plaid.test", "rate_limit": 0}
+
+
+def stripe_handler(pages, failures=None):
+    """
+    Stripe /charges serving pages of charge ids in order. failures maps a
+    page index to the status codes returned before that page succeeds.
+    """
+    failures = {index: list(codes) for index, codes in (failures or {}).items()}
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        after = request.url.params.get("starting_after")
+        index = 0 if after is None else next(i + 1 for i, page in enumerate(pages) if page and page[-1] == after)
+        if failures.get(index):
+            return httpx.Response(failures[index].pop(0), headers={"retry-after": "0"})
+
+        charges = [{"id": charge_id, "amount": 1250, "currency": "usd", "customer": "cus_1"} for charge_id in pages[index]]
+        return httpx.Response(200, json={"data": charges, "has_more": index < len(pages) - 1})
+
+    return handler, requests
+
+
+def fetch(source, handler, limit=None):
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return [transaction async for transaction in source.transactions(client, limit)]
+
+    return asyncio.run(scenario())
+
+
+def test_stripe_pages_are_followed_with_the_last_charge_id():
+    handler, requests = stripe_handler([["ch_1", "ch_2"], ["ch_3", "ch_4"], ["ch_5"]])
+
+    transactions = fetch(StripeSource(STRIPE, page_size=2), handler)
+
+    assert [t["TransactionID"] for t in transactions] == ["ch_1", "ch_2", "ch_3", "ch_4", "ch_5"]
+    assert [r.url.params.get("starting_after") for r in requests] == [None, "ch_2", "ch_4"]
+    assert transactions[0]["TransactionAmount"] == 12.5
+    assert transactions[0]["Currency"] == "USD"
+    assert transactions[0]["api_source"] == "stripe"
+
+
+def test_a_503_is_retried_and_pagination_resumes_at_the_same_cursor():
+    handler, requests = stripe_handler([["ch_1", "ch_2"], ["ch_3"]], failures={1: [503]})
+
+    transactions = fetch(StripeSource(STRIPE, page_size=2, backoff=0), handler)
+
+    assert [t["TransactionID"] for t in transactions] == ["ch_1", "ch_2", "ch_3"]
+    assert [r.url.params.get("starting_after") for r in requests] == [None, "ch_2", "ch_2"]
+
+
+def test_retries_give_up_after_max_retries():
+    handler, requests = stripe_handler([["ch_1"]], failures={0: [503, 503, 503]})
+
+    with pytest.raises(RuntimeError):
+        fetch(StripeSource(STRIPE, max_retries=2, backoff=0), handler)
+    assert len(requests) == 3
+
+
+def test_client_errors_are_not_retried():
+    handler, requests = stripe_handler([["ch_1"]], failures={0: [401]})
+
+    with pytest.raises(httpx.HTTPStatusError):
+        fetch(StripeSource(STRIPE, backoff=0), handler)
+    assert len(requests) == 1
+
+
+def test_limit_stops_fetching_further_pages():
+    handler, requests = stripe_handler([["ch_1", "ch_2"], ["ch_3", "ch_4"], ["ch_5"]])
+
+    transactions = fetch(StripeSource(STRIPE, page_size=2), handler, limit=3)
+
+    assert [t["TransactionID"] for t in transactions] == ["ch_1", "ch_2", "ch_3"]
+    assert len(requests) == 2
+
+
+def test_plaid_pages_are_followed_with_next_cursor():
+    cursors = []
+
+    def handler(request):
+        cursor = json.loads(request.content).get("cursor")
+        cursors.append(cursor)
+        if cursor is None:
+            return httpx.Response(200, json={"added": [{"transaction_id": "tx_1", "amount": -5.0}],
+                                             "has_more": True, "next_cursor": "c1"})
+        return httpx.Response(200, json={"added": [{"transaction_id": "tx_2", "amount": 7.0}],
+                                         "has_more": False, "next_cursor": "c2"})
+
+    transactions = fetch(PlaidSource(PLAID), handler)
+
+    assert [t["TransactionID"] for t in transactions] == ["tx_1", "tx_2"]
+    assert [t["TransactionAmount"] for t in transactions] == [5.0, 7.0]
+    assert cursors == [None, "c1"]
+
+
+def test_merged_sources_keep_going_when_one_fails():
+    def handler(request):
+        if request.url.host == "plaid.test":
+            return httpx.Response(400)
+        return httpx.Response(200, json={"data": [{"id": "ch_1", "amount": 100}], "has_more": False})
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            sources = [PlaidSource(PLAID, backoff=0), StripeSource(STRIPE, backoff=0)]
+            return [transaction async for transaction in merge_sources(client, sources)]
+
+    transactions = asyncio.run(scenario())
+    assert [(t["api_source"], t["TransactionID"]) for t in transactions] == [("stripe", "ch_1")]
+
+
+def test_a_source_missing_a_provider_hook_cannot_be_created():
+    class HalfSource(ProviderSource):
+        name = "half"
+
+        def build_request(self, cursor):
+            return {"method": "GET", "url": "http://half.test"}
+
+    with pytest.raises(TypeError, match="normalize"):
+        HalfSource({})
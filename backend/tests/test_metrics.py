@@ -0,0 +1,84 @@
+import re
+
+import main
+from conftest import VELOCITY, sample_transaction
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="[^"]*",?)*\})? (\S+)$')
+
+
+def parse_metrics(text):
+    """
+    Samples of a Prometheus text exposition as {(name, labels): value},
+    checking that each family is announced by HELP and TYPE lines first.
+    """
+    assert text.endswith("\n")
+    samples, types = {}, {}
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            continue
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert kind in ("counter", "gauge", "histogram")
+            types[name] = kind
+            continue
+
+        match = SAMPLE.match(line)
+        assert match, f"not a sample line: {line!r}"
+        name, labels, value = match.group(1), match.group(2) or "", float(match.group(3))
+        family = re.sub(r"_(bucket|sum|count)$", "", name) if name not in types else name
+        assert family in types, f"{name} has no TYPE line"
+        samples[(name, labels)] = value
+    return samples, types
+
+
+def get_metrics(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    return parse_metrics(response.text)
+
+
+def test_metrics_count_fallbacks_and_model_errors(scoring_app, monkeypatch):
+    async def failed_compliance_risk(transaction_data):
+        return None
+
+    def failing_predict_proba(X):
+        raise RuntimeError("model failed")
+
+    monkeypatch.setattr(main, "get_compliance_risk", failed_compliance_risk)
+    monkeypatch.setattr(main.model_registry.current.models["xgb_fraud_model.pkl"], "predict_proba", failing_predict_proba)
+
+    before, _ = get_metrics(scoring_app)
+    assert scoring_app.post("/detect_fraud", json=sample_transaction(**VELOCITY)).status_code == 200
+    after, types = get_metrics(scoring_app)
+
+    def increase(name, labels=""):
+        return after[(name, labels)] - before.get((name, labels), 0.0)
+
+    assert types["fraud_compliance_fallback_total"] == "counter"
+    assert increase("fraud_compliance_fallback_total") == 1
+    assert increase("fraud_model_errors_total", '{model="xgb_fraud_model.pkl"}') == 1
+    assert increase("fraud_model_errors_total", '{model="catboost_fraud_model.pkl"}') == 0
+    assert increase("fraud_stage_duration_seconds_count", '{model="lgbm_fraud_model.pkl",stage="model"}') == 1
+
+
+def test_histograms_are_cumulative_and_end_at_inf(scoring_app):
+    assert scoring_app.post("/detect_fraud", json=sample_transaction(**VELOCITY)).status_code == 200
+    samples, types = get_metrics(scoring_app)
+
+    labels = 'model="isolation_forest_fraud_model.pkl",stage="model"'
+    assert types["fraud_stage_duration_seconds"] == "histogram"
+    buckets = [value for (name, sample_labels), value in samples.items()
+               if name == "fraud_stage_duration_seconds_bucket" and sample_labels.startswith("{" + labels + ",le=")]
+
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == samples[("fraud_stage_duration_seconds_count", "{" + labels + "}")]
+    assert samples[("fraud_stage_duration_seconds_bucket", "{" + labels + ',le="+Inf"}')] == buckets[-1]
+    assert samples[("fraud_stage_duration_seconds_sum", "{" + labels + "}")] > 0
+
+
+def test_feed_api_serves_its_metrics(results_api):
+    samples, types = get_metrics(results_api)
+
+    assert types["fraud_feed_fetch_errors_total"] == "counter"
+    assert ("fraud_feed_fetch_errors_total", "") in samples
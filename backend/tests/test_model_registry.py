@@ -0,0 +1,90 @@
+import os
+
+import joblib
+import pytest
+
+import benchmark
+import main
+from model_registry import ModelRegistry, VERSIONS_DIR, ACTIVE_FILE, publish
+from transaction_record import FIELDS
+
+
+def write_stand_in_models(directory):
+    """
+    A loadable model set: stand-in models pickled under the real file names.
+    """
+    os.makedirs(directory)
+    model = benchmark.build_stand_in_ensemble(benchmark.sample_transactions(64, seed=0))
+    for name, stand_in in model.models.items():
+        joblib.dump(stand_in, os.path.join(directory, name))
+    model.preprocessor.save(os.path.join(directory, model.PREPROCESSOR_FILE))
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    registry = ModelRegistry(root=str(tmp_path), warm_up_fields=list(FIELDS), warm_up_size=8)
+
+    write_stand_in_models(str(tmp_path / "source"))
+    publish(registry, str(tmp_path / "source"), "v1")
+    publish(registry, str(tmp_path / "source"), "v2")
+    registry.set_active("v1")
+
+    # ✅ v3 is broken: its pickle cannot be loaded
+    broken = tmp_path / VERSIONS_DIR / "v3"
+    broken.mkdir()
+    (broken / "xgb_fraud_model.pkl").write_bytes(b"not a pickle")
+
+    registry.activate()
+    monkeypatch.setattr(main, "model_registry", registry)
+    return registry
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    return {"X-Admin-Token": "secret"}
+
+
+def read_active(registry):
+    with open(os.path.join(registry.root, ACTIVE_FILE)) as f:
+        return f.read().strip()
+
+
+def test_reload_to_corrupt_version_leaves_active_unchanged(scoring_app, registry, admin):
+    response = scoring_app.post("/admin/models/reload", params={"version": "v3"}, headers=admin)
+
+    assert response.status_code == 500
+    assert read_active(registry) == "v1"
+    assert registry.current.version == "v1"
+
+
+def test_reload_to_good_version_makes_it_active(scoring_app, registry, admin):
+    response = scoring_app.post("/admin/models/reload", params={"version": "v2"}, headers=admin)
+
+    assert response.status_code == 200
+    assert read_active(registry) == "v2"
+    assert response.json()["serving_version"] == "v2"
+
+
+def test_reload_to_unknown_version_is_not_found(scoring_app, registry, admin):
+    response = scoring_app.post("/admin/models/reload", params={"version": "v9"}, headers=admin)
+
+    assert response.status_code == 404
+    assert read_active(registry) == "v1"
+
+
+@pytest.mark.parametrize("configured, headers", [
+    (None, {}),
+    (None, {"X-Admin-Token": ""}),
+    ("secret", {}),
+    ("secret", {"X-Admin-Token": "wrong"}),
+])
+def test_admin_endpoints_refuse_without_a_matching_token(scoring_app, registry, monkeypatch, configured, headers):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", configured)
+
+    assert scoring_app.get("/admin/models", headers=headers).status_code == 403
+    response = scoring_app.post("/admin/models/reload", params={"version": "v2"}, headers=headers)
+
+    assert response.status_code == 403
+    assert read_active(registry) == "v1"
+    assert registry.current.version == "v1"
@@ -0,0 +1,64 @@
+import time
+import asyncio
+
+import httpx
+
+from backend.feed_fetcher import StripeSource, merge_sources
+from backend.pipeline import FeedPipeline
+
+
+def endless_stripe_handler(request):
+    """
+    Stripe /charges that always has another page.
+    """
+    start = int(request.url.params.get("starting_after", "ch_0").split("_")[1])
+    charges = [{"id": f"ch_{start + i + 1}", "amount": 1000, "currency": "usd"} for i in range(10)]
+    return httpx.Response(200, json={"data": charges, "has_more": True})
+
+
+def slow_score(transaction):
+    time.sleep(0.01)
+    return dict(transaction)
+
+
+def test_cancelled_pipeline_closes_source_and_leaves_no_tasks():
+    async def scenario():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(endless_stripe_handler))
+        sources = [StripeSource({"base_url": "http://stripe.test", "rate_limit": 0}) for _ in range(2)]
+        pipeline = FeedPipeline("stripe", merge_sources(client, sources, queue_size=2), slow_score,
+                                sinks=[lambda result: None], queue_size=1)
+
+        task = asyncio.create_task(pipeline.run())
+        # ✅ Let the queues fill, so the producer is blocked on put()
+        await asyncio.sleep(0.1)
+        assert pipeline._scoring_queue.full()
+
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await client.aclose()
+
+        assert pipeline.state == "cancelled"
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_completed_pipeline_passes_every_transaction_to_the_sinks():
+    async def source():
+        for i in range(25):
+            yield {"TransactionID": i}
+
+    results = []
+
+    async def scenario():
+        pipeline = FeedPipeline("mock", source(), slow_score, sinks=[results.append], queue_size=4)
+        await pipeline.run()
+        return pipeline
+
+    pipeline = asyncio.run(scenario())
+    assert pipeline.state == "completed"
+    assert [result["TransactionID"] for result in results] == list(range(25))
+    assert all(result["api_source"] == "mock" and result["feed_id"] == pipeline.feed_id for result in results)
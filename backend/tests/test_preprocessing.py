@@ -0,0 +1,88 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import preprocessing
+from ensemble import FraudEnsembleModel
+from preprocessing import FeaturePreprocessor, UNKNOWN_CATEGORY
+
+
+def training_frame():
+    """
+    A training CSV as it comes from the generator: identifiers, timestamps,
+    categoricals, numbers with gaps, booleans and the label.
+    """
+    return pd.DataFrame({
+        "UserID": ["U1", "U2", "U3", "U4"],
+        "CardNumber": ["4111-1", "5500-2", "3400-3", "4111-4"],
+        "TransactionDateTime": ["2024-01-01T10:00:00", "2024-01-01T11:00:00",
+                                "2024-01-02T09:30:00", "2024-01-03T18:45:00"],
+        "TransactionAmount": [12.5, 300.0, np.nan, 75.0],
+        "DistanceFromHome": [1.0, 250.0, 3.5, 12.0],
+        "UserAccountAgeDays": [30, 700, 45, 1200],
+        "CardType": ["Visa", "MasterCard", "Amex", "Visa"],
+        "IPCountry": ["US", "GB", "US", None],
+        "IsNewDevice": [True, False, False, True],
+        "IsFraud": [0, 1, 0, 0],
+    })
+
+
+def test_fit_skips_text_columns_that_are_not_categorical():
+    preprocessor = FeaturePreprocessor.fit(
+        training_frame().drop(columns=["IsFraud"]),
+        FraudEnsembleModel.CATEGORICAL_COLS, FraudEnsembleModel.NUMERICAL_COLS,
+    )
+
+    assert preprocessor.columns == ["TransactionAmount", "DistanceFromHome", "UserAccountAgeDays",
+                                    "CardType", "IPCountry", "IsNewDevice"]
+
+
+def test_fit_rejects_a_listed_text_column():
+    with pytest.raises(ValueError, match="UserID is not numeric"):
+        FeaturePreprocessor.fit(training_frame(), FraudEnsembleModel.CATEGORICAL_COLS,
+                                FraudEnsembleModel.NUMERICAL_COLS, columns=["TransactionAmount", "UserID"])
+
+
+def test_cli_artifact_transforms_like_the_fitted_preprocessor(tmp_path, monkeypatch):
+    df = training_frame()
+    data, output = tmp_path / "train.csv", tmp_path / "preprocessor.json"
+    df.to_csv(data, index=False)
+
+    monkeypatch.setattr(sys, "argv", ["preprocessing.py", str(data), "--output", str(output)])
+    assert preprocessing.main() == 0
+
+    loaded = FeaturePreprocessor.load(str(output))
+    fitted = FeaturePreprocessor.fit(
+        pd.read_csv(data).drop(columns=["IsFraud"]),
+        FraudEnsembleModel.CATEGORICAL_COLS, FraudEnsembleModel.NUMERICAL_COLS,
+    )
+    assert loaded.columns == fitted.columns
+
+    unseen = {"TransactionAmount": None, "DistanceFromHome": 8.0, "UserAccountAgeDays": 90,
+              "CardType": "Discover", "IPCountry": "US", "IsNewDevice": False}
+    records = df.to_dict("records") + [unseen]
+
+    expected = fitted.transform(records)
+    np.testing.assert_array_equal(loaded.transform(records), expected)
+    np.testing.assert_array_equal(loaded.transform_frame(pd.DataFrame(records)), expected)
+
+    # ✅ Unseen categories get their own code, missing numbers the training median
+    card_type = loaded.columns.index("CardType")
+    assert loaded.transform([unseen])[0, card_type] == UNKNOWN_CATEGORY
+    assert not np.isnan(expected).any()
+
+
+def test_cli_uses_the_listed_columns_in_order(tmp_path, monkeypatch):
+    data, output = tmp_path / "train.csv", tmp_path / "preprocessor.json"
+    training_frame().to_csv(data, index=False)
+
+    monkeypatch.setattr(sys, "argv", ["preprocessing.py", str(data), "--output", str(output),
+                                      "--columns", "CardType, TransactionAmount"])
+    assert preprocessing.main() == 0
+    assert FeaturePreprocessor.load(str(output)).columns == ["CardType", "TransactionAmount"]
+
+    monkeypatch.setattr(sys, "argv", ["preprocessing.py", str(data), "--output", str(output),
+                                      "--columns", "CardNumber"])
+    assert preprocessing.main() == 1
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+import benchmark
+import main
+from conftest import AppClient
+
+
+class GatedRegistry:
+    """
+    Stands in for the model registry; loading blocks until the gate opens,
+    then serves the stand-in ensemble or raises error.
+    """
+
+    def __init__(self, error=None):
+        self.current = None
+        self.error = error
+        self.gate = threading.Event()
+
+    def ensure_loaded(self):
+        self.gate.wait(10)
+        if self.error is not None:
+            raise self.error
+        self.current = benchmark.build_stand_in_ensemble(benchmark.sample_transactions(64, seed=0))
+        return self.current
+
+
+@pytest.fixture
+def starting_app():
+    """
+    main.app just after startup, with the warm-up still running.
+    """
+    client = AppClient(main.app)
+    client.run(main.start_scoring())
+    try:
+        yield client
+    finally:
+        client.run(main.ensemble_batcher.stop())
+        client.close()
+
+
+@pytest.fixture
+def gated_registry(request, monkeypatch):
+    registry = GatedRegistry(error=getattr(request, "param", None))
+    monkeypatch.setattr(main, "model_registry", registry)
+    yield registry
+    registry.gate.set()
+
+
+def wait_for_warm_up(client):
+    async def settle():
+        try:
+            await main.warm_up_future
+        except Exception:
+            pass
+
+    client.run(settle())
+
+
+def test_ready_reports_warming_up_then_ready(gated_registry, starting_app):
+    response = starting_app.get("/ready")
+    assert (response.status_code, response.json()) == (503, {"status": "warming_up"})
+
+    # ✅ Liveness does not wait for the models
+    assert starting_app.get("/health").status_code == 200
+
+    gated_registry.gate.set()
+    wait_for_warm_up(starting_app)
+
+    response = starting_app.get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready", "models": list(gated_registry.current.weights),
+                               "model_version": "unversioned"}
+
+
+@pytest.mark.parametrize("gated_registry", [FileNotFoundError("no model version is published")], indirect=True)
+def test_ready_reports_a_failed_warm_up(gated_registry, starting_app):
+    gated_registry.gate.set()
+    wait_for_warm_up(starting_app)
+
+    response = starting_app.get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "failed", "detail": "no model version is published"}
+    assert starting_app.get("/health").status_code == 200
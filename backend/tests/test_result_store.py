@@ -0,0 +1,127 @@
+import time
+import sqlite3
+
+import pytest
+
+from backend.result_store import SQLiteResultStore
+
+START = 1_700_000_000.0
+
+
+def result(i, timestamp, user_id="U1", api_source="stripe", overall_risk=20.0):
+    return {"transaction_id": i, "timestamp": timestamp, "user_id": user_id,
+            "api_source": api_source, "overall_risk": overall_risk}
+
+
+def ids(page):
+    return [result["transaction_id"] for result in page["results"]]
+
+
+@pytest.fixture
+def store(tmp_path):
+    """
+    A store holding ten results; 3 and 4 share a timestamp.
+    """
+    store = SQLiteResultStore(str(tmp_path / "results.db"), batch_size=4, flush_interval=0.05)
+    rows = [
+        result(0, START, "U1", "stripe", 10.0),
+        result(1, START + 10, "U2", "plaid", 50.0),
+        result(2, START + 20, "U1", "plaid", 90.0),
+        result(3, START + 30, "U1", "stripe", 20.0),
+        result(4, START + 30, "U2", "stripe", 70.0),
+        result(5, START + 40, "U1", "stripe", 40.0),
+        result(6, START + 50, "U2", "plaid", 30.0),
+        result(7, START + 60, "U1", "stripe", 80.0),
+        result(8, START + 70, "U2", "stripe", 60.0),
+        result(9, START + 80, "U1", "plaid", 5.0),
+    ]
+    for row in rows:
+        store.append(row)
+    store.close()
+    return store
+
+
+def test_close_writes_every_queued_result(store):
+    assert ids(store.query(limit=100)) == [9, 8, 7, 6, 5, 4, 3, 2, 1, 0]
+    assert store.queued == 0
+
+
+def test_writer_flushes_full_batches_without_waiting_for_the_interval(tmp_path):
+    store = SQLiteResultStore(str(tmp_path / "results.db"), batch_size=3, flush_interval=30)
+    for i in range(4):
+        store.append(result(i, START + i))
+
+    deadline = time.monotonic() + 5
+    while len(store.query()["results"]) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # ✅ The full batch is written at once, the fourth waits for close()
+    assert ids(store.query()) == [2, 1, 0]
+    store.close()
+    assert ids(store.query()) == [3, 2, 1, 0]
+
+
+def test_filters_combine(store):
+    assert ids(store.query(user_id="U1")) == [9, 7, 5, 3, 2, 0]
+    assert ids(store.query(api_source="plaid")) == [9, 6, 2, 1]
+    assert ids(store.query(user_id="U2", risk_class="High")) == [4]
+    assert ids(store.query(risk_class="Medium")) == [8, 5, 1]
+    assert ids(store.query(start=START + 30, end=START + 60)) == [6, 5, 4, 3]
+    assert ids(store.query(user_id="U3")) == []
+
+
+def test_keyset_pages_cover_every_result_once_across_equal_timestamps(store):
+    pages, before = [], None
+    while True:
+        page = store.query(limit=3, before=before)
+        pages.append(ids(page))
+        before = page["next_before"]
+        if before is None:
+            break
+
+    assert pages == [[9, 8, 7], [6, 5, 4], [3, 2, 1], [0]]
+
+
+def test_keyset_pages_respect_filters(store):
+    first = store.query(user_id="U1", limit=2)
+    second = store.query(user_id="U1", limit=2, before=tuple(first["next_before"]))
+
+    assert ids(first) == [9, 7]
+    assert ids(second) == [5, 3]
+
+
+def test_summary_groups_by_source_and_risk_class(store):
+    assert store.summary() == [
+        {"api_source": "plaid", "risk_class": "High", "count": 1, "mean_overall_risk": 90.0},
+        {"api_source": "plaid", "risk_class": "Low", "count": 2, "mean_overall_risk": 17.5},
+        {"api_source": "plaid", "risk_class": "Medium", "count": 1, "mean_overall_risk": 50.0},
+        {"api_source": "stripe", "risk_class": "High", "count": 2, "mean_overall_risk": 75.0},
+        {"api_source": "stripe", "risk_class": "Low", "count": 2, "mean_overall_risk": 15.0},
+        {"api_source": "stripe", "risk_class": "Medium", "count": 2, "mean_overall_risk": 50.0},
+    ]
+    assert store.summary(start=START + 70) == [
+        {"api_source": "plaid", "risk_class": "Low", "count": 1, "mean_overall_risk": 5.0},
+        {"api_source": "stripe", "risk_class": "Medium", "count": 1, "mean_overall_risk": 60.0},
+    ]
+
+
+def test_close_gives_up_when_the_writer_is_stuck(tmp_path):
+    path = str(tmp_path / "results.db")
+    store = SQLiteResultStore(path, batch_size=1, flush_interval=0, max_queue=1)
+
+    # ✅ Another connection holds the write lock, so the writer blocks on its first insert
+    blocker = sqlite3.connect(path)
+    blocker.execute("BEGIN EXCLUSIVE")
+    store.append(result(0, START))
+    time.sleep(0.1)
+    store.append(result(1, START + 1))
+    store.append(result(2, START + 2))
+
+    started = time.monotonic()
+    store.close(timeout=0.2)
+    assert time.monotonic() - started < 2
+
+    blocker.rollback()
+    blocker.close()
+    store.close()
+    assert ids(store.query()) == [1, 0]
@@ -0,0 +1,149 @@
+import json
+import asyncio
+
+from backend.pipeline import ResultRingBuffer
+
+
+def filled_buffer(capacity, n_results):
+    buffer = ResultRingBuffer(capacity=capacity)
+    for i in range(n_results):
+        buffer.append({"TransactionID": i})
+    return buffer
+
+
+def sequences(results):
+    return [result["sequence"] for result in results]
+
+
+def test_ring_buffer_keeps_the_newest_results_after_wrapping():
+    buffer = filled_buffer(5, 12)
+
+    assert len(buffer) == 5
+    assert buffer.total_appended == buffer.latest_sequence == 12
+    assert sequences(buffer.page(0, 3)) == [8, 9, 10]
+    assert sequences(buffer.page(3, 10)) == [11, 12]
+    assert buffer.page(5, 10) == []
+    assert sequences(buffer.latest(3)) == [10, 11, 12]
+    assert sequences(buffer.latest(10)) == [8, 9, 10, 11, 12]
+
+
+def test_since_skips_dropped_results_after_wrapping():
+    buffer = filled_buffer(5, 12)
+
+    assert sequences(buffer.since(0)) == [8, 9, 10, 11, 12]
+    assert sequences(buffer.since(9)) == [10, 11, 12]
+    assert sequences(buffer.since(9, limit=1)) == [10]
+    assert buffer.since(12) == []
+    assert buffer.since(50) == []
+
+
+def fill_results(n_results):
+    from backend import api
+
+    for i in range(n_results):
+        api.results_store.append({"TransactionID": i})
+
+
+def test_results_default_to_the_newest_page(results_api):
+    fill_results(250)
+
+    body = results_api.get("/api/automated-feed/results").json()
+
+    assert sequences(body["results"]) == list(range(151, 251))
+    assert body["total"] == body["latest_sequence"] == 250
+    assert body["next_since"] == 250
+    assert body["next_offset"] is None
+
+
+def test_results_by_offset_and_since(results_api):
+    fill_results(250)
+
+    by_offset = results_api.get("/api/automated-feed/results", params={"offset": 90, "limit": 20}).json()
+    assert sequences(by_offset["results"]) == list(range(241, 251))
+    assert by_offset["next_offset"] == 100
+
+    by_since = results_api.get("/api/automated-feed/results", params={"since": 245}).json()
+    assert sequences(by_since["results"]) == [246, 247, 248, 249, 250]
+    assert by_since["next_since"] == 250
+
+    caught_up = results_api.get("/api/automated-feed/results", params={"since": 250}).json()
+    assert caught_up["results"] == [] and caught_up["next_since"] == 250
+
+
+async def read_events(app, n_events, query="", headers=(), during=None):
+    """
+    Read n_events Server-Sent Events from the results stream, then
+    disconnect. during() is called once the stream has started.
+    """
+    disconnected = asyncio.Event()
+    request_sent = False
+    chunks = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            chunks.append(message)
+            if during is not None:
+                during()
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b"").decode())
+            if "".join(chunks[1:]).count("\n\n") >= n_events:
+                disconnected.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/automated-feed/stream", "raw_path": b"/api/automated-feed/stream",
+        "query_string": query.encode(), "root_path": "", "server": ("test", 80), "client": ("test", 1234),
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+    }
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+
+    start, body = chunks[0], "".join(chunks[1:])
+    return start, [event for event in body.split("\n\n") if event]
+
+
+def parse_event(event):
+    fields = dict(line.split(": ", 1) for line in event.splitlines())
+    return int(fields["id"]), fields["event"], json.loads(fields["data"])
+
+
+def test_stream_sends_results_after_since_then_new_ones(results_api):
+    from backend import api
+
+    fill_results(3)
+    start, events = results_api.run(read_events(
+        api.app, 3, query="since=1", during=lambda: api.results_store.append({"TransactionID": "new"})
+    ))
+
+    assert start["status"] == 200
+    assert dict(start["headers"])[b"content-type"].startswith(b"text/event-stream")
+    parsed = [parse_event(event) for event in events]
+    assert [(sequence, name) for sequence, name, _ in parsed] == [(2, "result"), (3, "result"), (4, "result")]
+    assert parsed[-1][2]["TransactionID"] == "new"
+
+
+def test_stream_resumes_from_last_event_id(results_api):
+    from backend import api
+
+    fill_results(5)
+    _, events = results_api.run(read_events(api.app, 2, headers=[("last-event-id", "3")]))
+
+    assert [parse_event(event)[0] for event in events] == [4, 5]
+
+
+def test_stream_sends_keepalives_while_idle(results_api, monkeypatch):
+    from backend import api
+
+    monkeypatch.setattr(api, "STREAM_KEEPALIVE_SECONDS", 0.01)
+    fill_results(2)
+    _, events = results_api.run(read_events(api.app, 1))
+
+    # ✅ Without since or Last-Event-ID the stream starts after the latest result
+    assert events == [": keepalive"]
@@ -0,0 +1,35 @@
+import main
+from conftest import sample_transaction
+
+
+def test_repeated_payload_without_transaction_id_is_recorded_each_time(scoring_app):
+    body = sample_transaction(UserID="U1", TransactionDateTime="2024-01-01T12:00:00")
+
+    for _ in range(3):
+        assert scoring_app.post("/detect_fraud", json=body).status_code == 200
+
+    # ✅ Each identical charge reaches the velocity store
+    features = main.feature_store.observe("U1", 200.0, "2024-01-01T12:00:00")
+    assert features["TransactionsLast1Hr"] == 3
+
+
+def test_replayed_transaction_id_is_served_from_cache(scoring_app):
+    body = sample_transaction(UserID="U2", TransactionDateTime="2024-01-01T12:00:00", TransactionID="tx-1")
+
+    first = scoring_app.post("/detect_fraud", json=body).json()
+    second = scoring_app.post("/detect_fraud", json=body).json()
+
+    assert first == second
+    features = main.feature_store.observe("U2", 200.0, "2024-01-01T12:00:00")
+    assert features["TransactionsLast1Hr"] == 1
+
+
+def test_batch_without_transaction_ids_records_every_transaction(scoring_app):
+    body = sample_transaction(UserID="U3", TransactionDateTime="2024-01-01T12:00:00")
+
+    response = scoring_app.post("/detect_fraud/batch", json=[body, body])
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 2
+
+    features = main.feature_store.observe("U3", 200.0, "2024-01-01T12:00:00")
+    assert features["TransactionsLast1Hr"] == 2
@@ -0,0 +1,20 @@
+import numpy as np
+
+from transaction_generator import SEEDED_NOW, generate_mock_transactions, iter_mock_transaction_chunks
+
+
+def test_seeded_runs_are_identical_including_datetimes():
+    first = generate_mock_transactions(100, seed=7, fraud_rate=0.1)
+    second = generate_mock_transactions(100, seed=7, fraud_rate=0.1)
+
+    for name in first:
+        assert np.array_equal(first[name], second[name]), name
+    assert max(first["TransactionDateTime"]) <= SEEDED_NOW.isoformat()
+
+
+def test_seeded_chunk_streams_are_identical():
+    first = [chunk["TransactionDateTime"] for chunk in iter_mock_transaction_chunks(250, chunk_size=100, seed=3)]
+    second = [chunk["TransactionDateTime"] for chunk in iter_mock_transaction_chunks(250, chunk_size=100, seed=3)]
+
+    assert [len(chunk) for chunk in first] == [100, 100, 50]
+    assert all(np.array_equal(a, b) for a, b in zip(first, second))
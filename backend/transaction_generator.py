@@ -0,0 +1,195 @@
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Value pools shared by the single and the vectorized mock generators
+CURRENCIES = ['USD', 'EUR', 'GBP', 'JPY', 'CAD']
+PRODUCT_CATEGORIES = ['Electronics', 'Clothing', 'Food', 'Travel', 'Entertainment']
+PAYMENT_METHODS = ['Credit Card', 'Debit Card', 'PayPal', 'Bank Transfer']
+CARD_TYPES = ['Visa', 'MasterCard', 'American Express', 'Discover']
+CARD_ISSUERS = ['Chase', 'Citi', 'Bank of America', 'Wells Fargo']
+CARD_COUNTRIES = ['US', 'UK', 'CA', 'DE', 'FR']
+COUNTRIES = ['US', 'UK', 'CA', 'DE', 'FR', 'JP']
+STATES = ['CA', 'NY', 'TX', 'FL', 'IL']
+CITIES = ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix']
+DEVICE_TYPES = ['Mobile', 'Desktop', 'Tablet']
+OPERATING_SYSTEMS = ['iOS', 'Android', 'Windows', 'macOS', 'Linux']
+BROWSERS = ['Chrome', 'Firefox', 'Safari', 'Edge']
+SCREEN_RESOLUTIONS = ['1920x1080', '1366x768', '2560x1440', '3840x2160']
+MERCHANT_CATEGORIES = ['Retail', 'Travel', 'Food', 'Services']
+EMAIL_DOMAINS = ['gmail.com', 'yahoo.com', 'hotmail.com']
+
+# Reference time for seeded runs without an explicit now, so they are reproducible
+SEEDED_NOW = datetime(2024, 1, 1)
+
+
+def _choice(rng, values, n):
+    return np.asarray(values)[rng.integers(0, len(values), n)]
+
+
+def _join(*parts):
+    """
+    Element-wise string concatenation of arrays and scalars.
+    """
+    result = np.asarray(parts[0]).astype(str)
+    for part in parts[1:]:
+        result = np.char.add(result, np.asarray(part).astype(str))
+    return result
+
+
+def _inject_fraud(rng, columns, is_fraud):
+    """
+    Overwrite the rows flagged in is_fraud with a typical card-fraud pattern:
+    a large amount far from home on a new device behind a proxy, in a burst
+    of rapid transactions from a country other than the card's.
+    """
+    k = int(is_fraud.sum())
+    if k == 0:
+        return
+
+    columns['TransactionAmount'][is_fraud] = np.round(rng.uniform(5000, 10000, k), 2)
+    columns['DistanceFromHome'][is_fraud] = np.round(rng.uniform(1000, 5000, k), 2)
+    columns['TransactionsLast1Hr'][is_fraud] = rng.integers(5, 16, k)
+    columns['TransactionsLast24Hr'][is_fraud] = rng.integers(15, 41, k)
+    columns['TimeSinceLastTransaction'][is_fraud] = np.round(rng.uniform(0, 0.25, k), 2)
+    columns['UserAccountAgeDays'][is_fraud] = rng.integers(1, 31, k)
+    columns['IsHighRiskMerchant'][is_fraud] = True
+    columns['IPIsProxy'][is_fraud] = True
+    columns['IsNewDevice'][is_fraud] = True
+    columns['AmountDeviationFromAvg'][is_fraud] = np.round(
+        columns['TransactionAmount'][is_fraud] - columns['AvgTransactionAmount'][is_fraud], 2
+    )
+
+    # ✅ IP country differs from the card country
+    card_countries = columns['CardCountry'][is_fraud]
+    other = _choice(rng, COUNTRIES, k)
+    same = other == card_countries
+    other[same] = 'JP'
+    columns['IPCountry'][is_fraud] = other
+
+
+def _default_now(seed):
+    return SEEDED_NOW if seed is not None else datetime.now()
+
+
+def generate_mock_transactions(n: int, seed: Optional[int] = None, fraud_rate: Optional[float] = None,
+                               now: Optional[datetime] = None, as_dataframe: bool = False):
+    """
+    Generate n mock transactions at once as columnar NumPy arrays, with the
+    same fields as TransactionService.generate_mock_transaction.
+
+    With fraud_rate=None, IsFraud is a random label as in the single
+    generator. With a float, that fraction of rows is labelled fraud and
+    rewritten to follow a fraud pattern, so detection quality can be checked
+    under load.
+
+    Datetimes fall in the 30 days before now. When now is not given it is
+    SEEDED_NOW if a seed is, so the same seed always gives the same rows,
+    and the current time otherwise.
+    """
+    rng = np.random.default_rng(seed)
+    now = now or _default_now(seed)
+
+    # Transaction datetime within the last 30 days, to the minute like the single generator
+    offsets = (rng.integers(0, 31, n) * 86400 + rng.integers(0, 24, n) * 3600
+               + rng.integers(0, 60, n) * 60).astype('timedelta64[s]')
+    datetimes = np.datetime64(now, 'us') - offsets
+
+    avg_amount = np.round(rng.uniform(50, 500, n), 2)
+    octets = rng.integers(1, 256, (4, n))
+
+    columns = {
+        'TransactionID': rng.integers(10000000, 100000000, n),
+        'UserID': _join('USER_', rng.integers(100000, 1000000, n)),
+        'TransactionDateTime': np.datetime_as_string(datetimes, unit='us'),
+        'TransactionAmount': np.round(rng.uniform(10, 10000, n), 2),
+        'ProductCategory': _choice(rng, PRODUCT_CATEGORIES, n),
+        'Currency': _choice(rng, CURRENCIES, n),
+        'PaymentMethod': _choice(rng, PAYMENT_METHODS, n),
+
+        # Card Information
+        'CardNumber': _join(rng.integers(4000, 5000, n), ' **** **** ', rng.integers(1000, 10000, n)),
+        'CardType': _choice(rng, CARD_TYPES, n),
+        'CardIssuer': _choice(rng, CARD_ISSUERS, n),
+        'CardCountry': _choice(rng, CARD_COUNTRIES, n),
+        'CardCVV': rng.integers(100, 1000, n),
+        'CardExpiry': _join(np.char.zfill(rng.integers(1, 13, n).astype(str), 2), '/', rng.integers(24, 29, n)),
+
+        # Billing Information
+        'BillingAddress': _join(rng.integers(100, 10000, n), ' Main St'),
+        'BillingZIP': rng.integers(10000, 100000, n),
+        'BillingCity': _choice(rng, CITIES, n),
+        'BillingState': _choice(rng, STATES, n),
+        'BillingCountry': _choice(rng, COUNTRIES, n),
+
+        # IP and Location
+        'IPAddress': _join(octets[0], '.', octets[1], '.', octets[2], '.', octets[3]),
+        'IPCountry': _choice(rng, COUNTRIES, n),
+        'DistanceFromHome': np.round(rng.uniform(0, 5000, n), 2),
+
+        # Device Information
+        'DeviceType': _choice(rng, DEVICE_TYPES, n),
+        'DeviceOS': _choice(rng, OPERATING_SYSTEMS, n),
+        'Browser': _choice(rng, BROWSERS, n),
+        'ScreenResolution': _choice(rng, SCREEN_RESOLUTIONS, n),
+
+        # Transaction History
+        'TransactionsLast1Hr': rng.integers(0, 6, n),
+        'TransactionsLast24Hr': rng.integers(0, 21, n),
+        'AvgTransactionAmount': avg_amount,
+        'TimeSinceLastTransaction': np.round(rng.uniform(0, 24, n), 2),
+        'UserAccountAgeDays': rng.integers(1, 3651, n),
+
+        # Merchant Information
+        'MerchantID': rng.integers(1000, 10000, n),
+        'MerchantCategory': _choice(rng, MERCHANT_CATEGORIES, n),
+        'MerchantCountry': _choice(rng, COUNTRIES, n),
+        'IsHighRiskMerchant': rng.random(n) < 0.5,
+
+        # Risk Indicators
+        'IsFraud': rng.integers(0, 2, n),
+        'IPIsProxy': rng.random(n) < 0.5,
+        'IsNewDevice': rng.random(n) < 0.5,
+        'UserEmail': _join('user_', rng.integers(100, 1000, n), '@', _choice(rng, EMAIL_DOMAINS, n)),
+        'IsEmailGeneric': rng.random(n) < 0.5,
+        'AmountDeviationFromAvg': np.round(rng.uniform(-200, 200, n), 2),
+        'IsHoliday': rng.random(n) < 0.5,
+    }
+
+    if fraud_rate is not None:
+        is_fraud = rng.random(n) < fraud_rate
+        columns['IsFraud'] = is_fraud.astype(np.int64)
+        _inject_fraud(rng, columns, is_fraud)
+
+    if as_dataframe:
+        import pandas as pd
+        return pd.DataFrame(columns)
+
+    return columns
+
+
+def iter_mock_transaction_chunks(total: int, chunk_size: int = 10000, seed: Optional[int] = None,
+                                 fraud_rate: Optional[float] = None, now: Optional[datetime] = None,
+                                 as_dataframe: bool = False) -> Iterator[Any]:
+    """
+    Stream total mock transactions as chunks of at most chunk_size rows.
+    Each chunk draws from its own child seed, so the stream is reproducible.
+    """
+    seeds = np.random.SeedSequence(seed)
+    now = now or _default_now(seed)
+    remaining = total
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        yield generate_mock_transactions(size, seed=seeds.spawn(1)[0], fraud_rate=fraud_rate,
+                                         now=now, as_dataframe=as_dataframe)
+        remaining -= size
+
+
+def columns_to_records(columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """
+    Convert columnar arrays into a list of transaction dicts with Python values.
+    """
+    names = list(columns)
+    values = [columns[name].tolist() for name in names]
+    return [dict(zip(names, row)) for row in zip(*values)]
@@ -0,0 +1,58 @@
+# Model-relevant request fields, in the fixed order used for feature vectors
+NUMERICAL_FIELDS = (
+    "TransactionAmount", "AvgTransactionAmount", "AmountDeviationFromAvg",
+    "TransactionsLast1Hr", "TransactionsLast24Hr", "TimeSinceLastTransaction",
+    "DistanceFromHome", "UserAccountAgeDays"
+)
+
+CATEGORICAL_FIELDS = (
+    "PaymentMethod", "CardType", "CardIssuer", "CardCountry", "MerchantCategory",
+    "MerchantCountry", "DeviceType", "DeviceOS", "Browser"
+)
+
+BOOLEAN_FIELDS = (
+    "IsHighRiskMerchant", "IPIsProxy", "IsNewDevice", "IsEmailGeneric", "IsHoliday"
+)
+
+FIELDS = NUMERICAL_FIELDS + CATEGORICAL_FIELDS + BOOLEAN_FIELDS
+
+
+class TransactionRecord:
+    """
+    Compact, fixed-layout transaction used on the scoring path in place of a
+    dict. Fields not in FIELDS read as None, like a missing dict key, so the
+    record can be passed anywhere a transaction dict is read with get().
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, *values):
+        for name, value in zip(FIELDS, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def from_mapping(cls, transaction_data):
+        record = cls.__new__(cls)
+        for name in FIELDS:
+            setattr(record, name, transaction_data.get(name))
+        return record
+
+    def get(self, name, default=None):
+        return getattr(self, name, default) if name in _FIELD_SET else default
+
+    def __getitem__(self, name):
+        if name not in _FIELD_SET:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def keys(self):
+        return FIELDS
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def __repr__(self):
+        return f"TransactionRecord({self.to_dict()!r})"
+
+
+_FIELD_SET = frozenset(FIELDS)
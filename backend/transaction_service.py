@@ -12,6 +12,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the FraudDetectionAgent
 from agents.core import FraudDetectionAgent
+from backend.transaction_generator import (
+    BROWSERS, CARD_COUNTRIES, CARD_ISSUERS, CARD_TYPES, CITIES, COUNTRIES, CURRENCIES,
+    DEVICE_TYPES, EMAIL_DOMAINS, MERCHANT_CATEGORIES, OPERATING_SYSTEMS, PAYMENT_METHODS,
+    PRODUCT_CATEGORIES, SCREEN_RESOLUTIONS, STATES,
+    generate_mock_transactions, iter_mock_transaction_chunks,
+)
 
 class TransactionService:
     def __init__(self):
@@ -24,10 +30,14 @@ class TransactionService:
                 'base_url': 'https://sandbox.plaid.com',
                 'client_id': os.environ.get('PLAID_CLIENT_ID', ''),
                 'secret': os.environ.get('PLAID_SECRET', ''),
+                'access_token': os.environ.get('PLAID_ACCESS_TOKEN', ''),
+                'rate_limit': float(os.environ.get('PLAID_RATE_LIMIT', '5')),
             },
             'stripe': {
                 'base_url': 'https://api.stripe.com/v1',
                 'api_key': os.environ.get('STRIPE_API_KEY', ''),
+                'rate_limit': float(os.environ.get('STRIPE_RATE_LIMIT', '20')),
+                'burst': 5,
             }
         }
     
@@ -41,25 +51,6 @@ class TransactionService:
         
         # Transaction Details
         amount = round(random.uniform(10, 10000), 2)
-        currencies = ['USD', 'EUR', 'GBP', 'JPY', 'CAD']
-        product_categories = ['Electronics', 'Clothing', 'Food', 'Travel', 'Entertainment']
-        payment_methods = ['Credit Card', 'Debit Card', 'PayPal', 'Bank Transfer']
-        
-        # Card Details
-        card_types = ['Visa', 'MasterCard', 'American Express', 'Discover']
-        card_issuers = ['Chase', 'Citi', 'Bank of America', 'Wells Fargo']
-        card_countries = ['US', 'UK', 'CA', 'DE', 'FR']
-        
-        # Location Details
-        countries = ['US', 'UK', 'CA', 'DE', 'FR', 'JP']
-        states = ['CA', 'NY', 'TX', 'FL', 'IL']
-        cities = ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix']
-        
-        # Device Details
-        device_types = ['Mobile', 'Desktop', 'Tablet']
-        operating_systems = ['iOS', 'Android', 'Windows', 'macOS', 'Linux']
-        browsers = ['Chrome', 'Firefox', 'Safari', 'Edge']
-        screen_resolutions = ['1920x1080', '1366x768', '2560x1440', '3840x2160']
         
         # Generate transaction datetime within last 30 days
         current_time = datetime.now()
@@ -74,35 +65,35 @@ class TransactionService:
             'UserID': user_id,
             'TransactionDateTime': transaction_datetime,
             'TransactionAmount': amount,
-            'ProductCategory': random.choice(product_categories),
-            'Currency': random.choice(currencies),
-            'PaymentMethod': random.choice(payment_methods),
+            'ProductCategory': random.choice(PRODUCT_CATEGORIES),
+            'Currency': random.choice(CURRENCIES),
+            'PaymentMethod': random.choice(PAYMENT_METHODS),
             
             # Card Information
             'CardNumber': f'{random.randint(4000, 4999)} **** **** {random.randint(1000, 9999)}',
-            'CardType': random.choice(card_types),
-            'CardIssuer': random.choice(card_issuers),
-            'CardCountry': random.choice(card_countries),
+            'CardType': random.choice(CARD_TYPES),
+            'CardIssuer': random.choice(CARD_ISSUERS),
+            'CardCountry': random.choice(CARD_COUNTRIES),
             'CardCVV': random.randint(100, 999),
             'CardExpiry': f'{random.randint(1, 12):02d}/{random.randint(24, 28)}',
             
             # Billing Information
             'BillingAddress': f'{random.randint(100, 9999)} Main St',
             'BillingZIP': random.randint(10000, 99999),
-            'BillingCity': random.choice(cities),
-            'BillingState': random.choice(states),
-            'BillingCountry': random.choice(countries),
+            'BillingCity': random.choice(CITIES),
+            'BillingState': random.choice(STATES),
+            'BillingCountry': random.choice(COUNTRIES),
             
             # IP and Location
             'IPAddress': f'{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}',
-            'IPCountry': random.choice(countries),
+            'IPCountry': random.choice(COUNTRIES),
             'DistanceFromHome': round(random.uniform(0, 5000), 2),
             
             # Device Information
-            'DeviceType': random.choice(device_types),
-            'DeviceOS': random.choice(operating_systems),
-            'Browser': random.choice(browsers),
-            'ScreenResolution': random.choice(screen_resolutions),
+            'DeviceType': random.choice(DEVICE_TYPES),
+            'DeviceOS': random.choice(OPERATING_SYSTEMS),
+            'Browser': random.choice(BROWSERS),
+            'ScreenResolution': random.choice(SCREEN_RESOLUTIONS),
             
             # Transaction History
             'TransactionsLast1Hr': random.randint(0, 5),
@@ -113,18 +104,34 @@ class TransactionService:
             
             # Merchant Information
             'MerchantID': random.randint(1000, 9999),
-            'MerchantCategory': random.choice(['Retail', 'Travel', 'Food', 'Services']),
-            'MerchantCountry': random.choice(countries),
+            'MerchantCategory': random.choice(MERCHANT_CATEGORIES),
+            'MerchantCountry': random.choice(COUNTRIES),
             'IsHighRiskMerchant': random.choice([True, False]),
             
             # Risk Indicators
             'IsFraud': random.randint(0, 1),
             'IPIsProxy': random.choice([True, False]),
             'IsNewDevice': random.choice([True, False]),
-            'UserEmail': f'user_{random.randint(100, 999)}@{random.choice(["gmail.com", "yahoo.com", "hotmail.com"])}',
+            'UserEmail': f'user_{random.randint(100, 999)}@{random.choice(EMAIL_DOMAINS)}',
             'IsEmailGeneric': random.choice([True, False]),
             'AmountDeviationFromAvg': round(random.uniform(-200, 200), 2),
             'IsHoliday': random.choice([True, False])
         }
         
-        return transaction
\ No newline at end of file
+        return transaction
+    
+    def generate_mock_transactions(self, n: int, seed: Optional[int] = None,
+                                   fraud_rate: Optional[float] = None, as_dataframe: bool = False):
+        """
+        Generate n mock transactions at once as columnar NumPy arrays
+        (or a DataFrame), for load testing
+        """
+        return generate_mock_transactions(n, seed=seed, fraud_rate=fraud_rate, as_dataframe=as_dataframe)
+    
+    def stream_mock_transactions(self, total: int, chunk_size: int = 10000, seed: Optional[int] = None,
+                                 fraud_rate: Optional[float] = None, as_dataframe: bool = False):
+        """
+        Stream mock transactions as an iterator of columnar chunks
+        """
+        return iter_mock_transaction_chunks(total, chunk_size=chunk_size, seed=seed,
+                                            fraud_rate=fraud_rate, as_dataframe=as_dataframe)